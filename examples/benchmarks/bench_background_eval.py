@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: wall-clock time of a MAPPO training run with evaluation at
+every log interval, pausing training for it (MinibatchRlEval) versus run on
+weight snapshots in background processes (MinibatchRlBackgroundEval with an
+EvalService).  Same training and evaluation sizes; the difference is the
+evaluation time taken off the training loop (needs CPUs to spare for the eval
+workers).  Uses the random grid env of bench_step_ahead.
+"""
+import time
+
+import torch
+
+from bench_step_ahead import RandomGridEnv
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.runners.background_eval import MinibatchRlBackgroundEval
+from rlpyt.runners.minibatch_rl import MinibatchRlEval
+from rlpyt.samplers.eval_service import EvalService
+from rlpyt.samplers.serial.sampler import SerialSampler
+from rlpyt.utils.logging import logger
+
+
+def train_time(background, env_kwargs, n_steps, log_interval_steps,
+        eval_n_envs, eval_max_steps, n_workers):
+    sampler = SerialSampler(
+        EnvCls=RandomGridEnv,
+        env_kwargs=env_kwargs,
+        eval_env_kwargs=env_kwargs,
+        batch_T=5,
+        batch_B=16,
+        max_decorrelation_steps=0,
+        eval_n_envs=0 if background else eval_n_envs,
+        eval_max_steps=eval_max_steps,
+    )
+    runner_kwargs = dict(
+        algo=MAPPO(),
+        agent=WildlifeGraphAgent(model_kwargs=dict(basis=None)),
+        sampler=sampler,
+        n_steps=n_steps,
+        log_interval_steps=log_interval_steps,
+        seed=0,
+    )
+    if background:
+        runner = MinibatchRlBackgroundEval(eval_service=EvalService(
+            EnvCls=RandomGridEnv,
+            env_kwargs=env_kwargs,
+            n_envs=eval_n_envs,
+            max_steps=eval_max_steps,
+            n_workers=n_workers,
+        ), **runner_kwargs)
+    else:
+        runner = MinibatchRlEval(**runner_kwargs)
+    start = time.perf_counter()
+    runner.train()
+    return time.perf_counter() - start, runner
+
+
+def main(n_agents, grid_size, n_steps, log_interval_steps, eval_n_envs,
+        eval_max_steps, n_workers):
+    torch.set_num_threads(1)
+    logger.disable()
+    env_kwargs = dict(n_agents=n_agents, grid_size=grid_size)
+    args = (env_kwargs, n_steps, log_interval_steps, eval_n_envs,
+        eval_max_steps, n_workers)
+    t_blocking, runner = train_time(False, *args)
+    print(f"  pausing for eval: {t_blocking:6.2f} s training run, "
+          f"{runner._cum_eval_time:6.2f} s of it evaluating")
+    t_background, runner = train_time(True, *args)
+    print(f"eval in background: {t_background:6.2f} s training run "
+          f"({t_blocking / t_background:.2f}x), {runner._cum_eval_time:6.2f} "
+          f"s evaluating in {n_workers} workers, "
+          f"{runner._cum_eval_skipped} snapshots skipped as workers were busy")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--n_steps', type=int, default=8000)
+    parser.add_argument('--log_interval_steps', type=int, default=1600)
+    parser.add_argument('--eval_n_envs', type=int, default=8)
+    parser.add_argument('--eval_max_steps', type=int, default=1600)
+    parser.add_argument('--n_workers', type=int, default=1)
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.n_steps,
+         args.log_interval_steps, args.eval_n_envs, args.eval_max_steps,
+         args.n_workers)
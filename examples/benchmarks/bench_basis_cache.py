@@ -0,0 +1,57 @@
+"""
+Micro-benchmark: construction time of the equivariant (basis) models, as
+paid at every worker start, example subprocess, etc., with the on-disk basis
+cache disabled, cold (first construction), and warm, with the basis
+computations served from the cache (hits) and computed (misses).
+"""
+import tempfile
+import time
+
+from rlpyt.models import basis_cache
+from rlpyt.models.pg.traffic_ff_model import TrafficBasisGraphModel
+from rlpyt.models.pg.wildlife_ff_model import WildlifeBasisGraphModel
+
+
+def construct(env, n_agents, grid_size):
+    if env == "wildlife":
+        return WildlifeBasisGraphModel(
+            image_shape=(n_agents + 1, grid_size, grid_size), output_size=5,
+            n_agents=n_agents, basis="eqgraph")
+    return TrafficBasisGraphModel(image_shape=(13, grid_size, grid_size),
+        output_size=5, basis="eqgraph")
+
+
+def timeit(fn, n_repeat):
+    start = time.perf_counter()
+    for _ in range(n_repeat):
+        fn()
+    return (time.perf_counter() - start) / n_repeat
+
+
+def main(env, n_agents, grid_size, n_repeat):
+    build = lambda: construct(env, n_agents, grid_size)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        basis_cache.BASIS_CACHE_DIR = ""
+        uncached = timeit(build, n_repeat)
+        basis_cache.BASIS_CACHE_DIR = cache_dir
+        stats = basis_cache.cache_stats
+        cold = timeit(build, 1)
+        cold_misses = stats["misses"]
+        warm = timeit(build, n_repeat)
+    print(f"{env} n_agents={n_agents}: uncached {uncached:.3f}s, "
+          f"cold {cold:.3f}s ({cold_misses} bases computed), warm "
+          f"{warm:.3f}s ({stats['hits']} bases loaded, "
+          f"{stats['misses'] - cold_misses} computed) per construction")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--env', choices=['wildlife', 'traffic'],
+                        default='wildlife')
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--n_repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(args.env, args.n_agents, args.grid_size, args.n_repeat)
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: shared-memory observation buffer size and per-iteration
+traffic for float32 observations versus uint8 (``obs_dtype="uint8"``), i.e.
+workers writing one step into the buffer, and the master moving the whole
+[T,B] batch to the model's device and converting to float there.
+"""
+import time
+
+import numpy as np
+import torch
+
+from rlpyt.utils.buffer import buffer_from_example, torchify_buffer
+
+
+def timeit(fn, n_repeat):
+    fn()  # Warm-up.
+    start = time.perf_counter()
+    for _ in range(n_repeat):
+        fn()
+    return (time.perf_counter() - start) / n_repeat
+
+
+def main(n_agents, grid_size, T, B, n_repeat, device):
+    obs_shape = (n_agents + 1, grid_size, grid_size)
+    grid = np.random.randint(0, 2, size=(B,) + obs_shape)
+    print(f"obs shape={obs_shape} T={T} B={B}")
+    print(f"{'dtype':>8} {'buffer[MB]':>11} {'env write':>11} "
+          f"{'to device':>11}")
+    for dtype in (np.float32, np.uint8):
+        example = np.zeros(obs_shape, dtype=dtype)
+        observation = buffer_from_example(example, (T, B), share_memory=True)
+        obs_pyt = torchify_buffer(observation)
+        step_obs = grid.astype(dtype)
+
+        def env_write():
+            for t in range(T):
+                observation[t] = step_obs
+
+        def to_device():
+            obs_pyt.to(device).type(torch.float)
+
+        write = timeit(env_write, n_repeat)
+        move = timeit(to_device, n_repeat)
+        print(f"{np.dtype(dtype).name:>8} {observation.nbytes / 2 ** 20:>11.2f} "
+              f"{1e3 * write:>9.3f}ms {1e3 * move:>9.3f}ms")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--T', help='sampler time steps', type=int,
+                        default=128)
+    parser.add_argument('--B', help='sampler envs', type=int, default=16)
+    parser.add_argument('--n_repeat', type=int, default=20)
+    parser.add_argument('--cuda_idx', type=int, default=None)
+    args = parser.parse_args()
+    device = ("cpu" if args.cuda_idx is None else
+              torch.device("cuda", args.cuda_idx))
+    main(args.n_agents, args.grid_size, args.T, args.B, args.n_repeat, device)
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: MAPPO training throughput with SyncRl, data-parallel over
+1 to N processes on one machine (torch.distributed, gloo on CPU).  Each rank
+samples its own batch (SerialSampler) from the random grid env of
+bench_step_ahead, and gradients are all-reduced in buckets of
+``bucket_cap_mb``.  Scaling needs a core per rank.
+"""
+from bench_step_ahead import RandomGridEnv
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.runners.sync_rl import SyncRl
+from rlpyt.samplers.serial.sampler import SerialSampler
+
+
+def main(n_agents, grid_size, batch_T, batch_B, world_sizes, epochs,
+        minibatches, bucket_cap_mb, n_itr):
+    batch_size = batch_T * batch_B
+    base = None
+    for world_size in world_sizes:
+        sampler = SerialSampler(
+            EnvCls=RandomGridEnv,
+            env_kwargs=dict(n_agents=n_agents, grid_size=grid_size),
+            batch_T=batch_T,
+            batch_B=batch_B,
+            max_decorrelation_steps=0,
+        )
+        n_steps = n_itr * batch_size * world_size
+        runner = SyncRl(
+            algo=MAPPO(epochs=epochs, minibatches=minibatches),
+            agent=WildlifeGraphAgent(model_kwargs=dict(basis=None)),
+            sampler=sampler,
+            n_steps=n_steps,
+            log_interval_steps=n_steps,
+            affinity=[dict(master_cpus=[rank], set_affinity=False,
+                master_torch_threads=1, workers_cpus=[rank])
+                for rank in range(world_size)],
+            seed=0,
+            bucket_cap_mb=bucket_cap_mb,
+        )
+        runner.train()
+        steps_per_second = n_steps / runner._cum_time  # From after startup.
+        base = steps_per_second if base is None else base
+        print(f"world_size {world_size}: {steps_per_second:9.1f} steps / s, "
+              f"{steps_per_second / base:.2f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--batch_T', type=int, default=32)
+    parser.add_argument('--batch_B', type=int, default=8)
+    parser.add_argument('--world_sizes', type=int, nargs='+',
+                        default=[1, 2, 4])
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--minibatches', type=int, default=4)
+    parser.add_argument('--bucket_cap_mb', type=float, default=25)
+    parser.add_argument('--n_itr', type=int, default=10)
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.batch_T, args.batch_B,
+         args.world_sizes, args.epochs, args.minibatches, args.bucket_cap_mb,
+         args.n_itr)
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: per-step latency and bytes moved for one centralized
+forward over the team observation versus the per-agent runtime (one process
+per agent, states exchanged over shared memory), with the sparse message
+passing model (k nearest neighbours).  Reports the compute of one agent's
+step (encode own view, k messages, act), which is the per-agent latency
+with a core per agent, the runtime's wall-clock step (all agent processes
+on the cpus available) and whether greedy actions match the centralized
+forward's.
+"""
+import time
+
+import numpy as np
+import torch
+
+from bench_precomputed_locs import random_observation
+from rlpyt.agents.pg.decentralized import DecentralizedRuntime, agent_act
+from rlpyt.models.pg.wildlife_ff_model import WildlifeGraphModel
+
+
+def main(n_agents, k, grid_size, n_steps):
+    obs_shape = (n_agents + 1, grid_size, grid_size)
+    model_kwargs = dict(image_shape=obs_shape, output_size=5,
+        n_agents=n_agents, neighbours=k)
+    model = WildlifeGraphModel(**model_kwargs).eval()
+    network = model.message_passing
+    observations = random_observation(n_steps, 1, n_agents, grid_size)[:, 0]
+    all_locs = model.extract_locs(observations)
+
+    torch.set_num_threads(1)
+    start = time.perf_counter()
+    with torch.no_grad():
+        for t in range(n_steps):
+            pi, _v = model(observations[t], None, None, locs=all_locs[t])
+            torch.multinomial(pi, num_samples=1)
+    central = (time.perf_counter() - start) / n_steps
+    central_bytes = observations[0].numpy().nbytes  # All views to one place.
+
+    with torch.no_grad():
+        states = network.encode(observations[0, :-1].type(torch.float))
+        start = time.perf_counter()
+        for t in range(n_steps):
+            state = network.encode(observations[t, :1].type(torch.float))[0]
+            agent_act(network, 0, state, states, all_locs[t], k)
+    per_agent = (time.perf_counter() - start) / n_steps
+
+    runtime = DecentralizedRuntime(WildlifeGraphModel, model_kwargs,
+        model.state_dict(), n_agents, obs_shape, greedy=True)
+    runtime.step(*runtime.local_views(observations[0], all_locs[0]))  # Warm-up.
+    actions = list()
+    start = time.perf_counter()
+    for t in range(n_steps):
+        actions.append(runtime.step(*runtime.local_views(observations[t],
+            all_locs[t])))
+    decentral = (time.perf_counter() - start) / n_steps
+    runtime.shutdown()
+    msg = runtime.message_nbytes
+    received = (min(k, n_agents - 1) * runtime.board.states[0].nbytes +
+        (n_agents - 1) * runtime.board.locs[0].nbytes)  # All locations.
+    with torch.no_grad():
+        pi, _v = model(observations, None, None, locs=all_locs)
+    match = (pi.argmax(dim=-1) == torch.from_numpy(np.stack(actions))).float().mean()
+
+    print(f"n_agents={n_agents} k={k} grid={grid_size}")
+    print(f"  centralized:    {1e3 * central:7.3f} ms/step, "
+          f"{central_bytes} B/step gathered")
+    print(f"  one agent:      {1e3 * per_agent:7.3f} ms/step, {msg} B "
+          f"message, {received} B received")
+    print(f"  runtime (wall): {1e3 * decentral:7.3f} ms/step, "
+          f"greedy actions match centralized: {100 * match:.1f}%")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=16)
+    parser.add_argument('--neighbours', type=int, default=4)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--n_steps', type=int, default=200)
+    args = parser.parse_args()
+    main(args.n_agents, args.neighbours, args.grid_size, args.n_steps)
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: serial sampler startup time (initialize(), i.e. time to the
+first obtain_samples()) by decorrelation_mode: "serial" (one env after
+another), "pool" (envs stepped in a process pool) and "snapshot" (first run
+decorrelates and writes the snapshot file, later runs restore from it).
+Uses the random grid env of bench_step_ahead.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import torch
+
+from bench_step_ahead import RandomGridEnv
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.samplers.serial.sampler import SerialSampler
+
+
+def startup_time(n_agents, grid_size, batch_B, max_steps, mode, kwargs):
+    sampler = SerialSampler(
+        EnvCls=RandomGridEnv,
+        env_kwargs=dict(n_agents=n_agents, grid_size=grid_size),
+        batch_T=5,
+        batch_B=batch_B,
+        max_decorrelation_steps=max_steps,
+        decorrelation_mode=mode,
+        decorrelation_kwargs=kwargs,
+    )
+    agent = WildlifeGraphAgent(model_kwargs=dict(basis=None))
+    start = time.perf_counter()
+    sampler.initialize(agent, seed=0, bootstrap_value=True)
+    elapsed = time.perf_counter() - start
+    lengths = sorted(int(t.Length) for t in sampler.traj_infos)
+    return elapsed, lengths
+
+
+def main(n_agents, grid_size, batch_B, max_steps, n_workers):
+    torch.set_num_threads(1)
+    folder = tempfile.mkdtemp()
+    snapshot = dict(path=os.path.join(folder, "decorrelated"))
+    try:
+        for name, mode, kwargs in (
+                ("serial", "serial", None),
+                ("pool", "pool", dict(n_workers=n_workers)),
+                ("snapshot, writing", "snapshot", snapshot),
+                ("snapshot, restoring", "snapshot", snapshot)):
+            elapsed, lengths = startup_time(n_agents, grid_size, batch_B,
+                max_steps, mode, kwargs)
+            print(f"{name:>20}: {elapsed:6.3f} s to first batch, trajectory "
+                  f"lengths {lengths[0]}..{lengths[-1]}")
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--batch_B', type=int, default=16)
+    parser.add_argument('--max_decorrelation_steps', type=int, default=400)
+    parser.add_argument('--n_workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.batch_B,
+         args.max_decorrelation_steps, args.n_workers)
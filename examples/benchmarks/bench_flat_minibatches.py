@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: serving MAPPO minibatches for all epochs of one training
+iteration, by fancy [T_idxs, B_idxs] indexing of the nested loss inputs for
+every minibatch, versus flattening the batch to [T*B] once, permuting it once
+per epoch and slicing (MAPPO.iterate_epochs()).  This is optimizer wall
+time per iteration spent outside the model.
+"""
+import time
+
+import torch
+
+from bench_precomputed_locs import random_observation
+from rlpyt.agents.base import AgentInputsLocs
+from rlpyt.algos.pg.base import LossInputs
+from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.distributions.categorical import DistInfo
+from rlpyt.utils.misc import iterate_mb_idxs
+
+
+def loss_inputs(T, B, n_agents, grid_size, n_actions, device):
+    observation = random_observation(T, B, n_agents, grid_size)
+    return LossInputs(
+        agent_inputs=AgentInputsLocs(
+            observation=observation.to(device),
+            prev_action=None,
+            prev_reward=None,
+            locs=torch.randint(grid_size, (T, B, n_agents, 2),
+                dtype=torch.int16, device=device),
+        ),
+        action=torch.randint(n_actions, (T, B, n_agents)),
+        return_=torch.randn(T, B, n_agents),
+        advantage=torch.randn(T, B, n_agents),
+        valid=None,
+        old_dist_info=DistInfo(prob=torch.rand(T, B, n_agents, n_actions)),
+    )
+
+
+def fancy_indexing(inputs, T, B, epochs, minibatches):
+    for _ in range(epochs):
+        for idxs in iterate_mb_idxs(T * B, T * B // minibatches,
+                shuffle=True):
+            yield inputs[idxs % T, idxs // T]
+
+
+def flat_slices(inputs, T, B, epochs, minibatches):
+    algo = MAPPO(epochs=epochs, minibatches=minibatches)
+    for minibatches in algo.iterate_epochs(inputs, T, B):
+        for mb_inputs, _ in minibatches:
+            yield mb_inputs
+
+
+def main(n_agents, grid_size, n_actions, T, B, epochs, minibatches, n_repeat,
+        device):
+    inputs = loss_inputs(T, B, n_agents, grid_size, n_actions, device)
+    print(f"T={T} B={B} epochs={epochs} minibatches={minibatches}")
+    times = dict()
+    for name, serve in [("fancy indexing", fancy_indexing),
+            ("flat slices", flat_slices)]:
+        elapsed = list()
+        for _ in range(n_repeat + 1):  # First is warm-up.
+            start = time.perf_counter()
+            for mb in serve(inputs, T, B, epochs, minibatches):
+                pass
+            if device != "cpu":
+                torch.cuda.synchronize(device)
+            elapsed.append(time.perf_counter() - start)
+        times[name] = min(elapsed[1:])
+        print(f"{name:>15}: {1e3 * times[name]:8.2f} ms / iteration")
+    saved = times["fancy indexing"] - times["flat slices"]
+    print(f"{'saved':>15}: {1e3 * saved:8.2f} ms / iteration "
+          f"({times['fancy indexing'] / times['flat slices']:.1f}x)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--n_actions', type=int, default=5)
+    parser.add_argument('--T', help='sampler time steps', type=int,
+                        default=128)
+    parser.add_argument('--B', help='sampler envs', type=int, default=16)
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--minibatches', type=int, default=32)
+    parser.add_argument('--n_repeat', type=int, default=5)
+    parser.add_argument('--cuda_idx', type=int, default=None)
+    args = parser.parse_args()
+    device = ("cpu" if args.cuda_idx is None else
+              torch.device("cuda", args.cuda_idx))
+    main(args.n_agents, args.grid_size, args.n_actions, args.T, args.B,
+         args.epochs, args.minibatches, args.n_repeat, device)
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: sampling forward pass (batch of B env observations, as in
+agent.step()) through the basis model versus its frozen inference export,
+after checking that both give the same outputs.
+"""
+import time
+
+import torch
+
+from bench_precomputed_locs import random_observation
+from rlpyt.models.inference import InferenceExport
+from rlpyt.models.pg.wildlife_ff_model import WildlifeBasisGraphModel
+
+
+def main(n_agents, grid_size, B, n_repeat, device):
+    model = WildlifeBasisGraphModel(image_shape=(n_agents + 1, grid_size,
+        grid_size), output_size=5, n_agents=n_agents, basis="eqgraph")
+    model.to(device).eval()
+    observation = random_observation(1, B, n_agents, grid_size)[0].to(device)
+    locs = model.extract_locs(observation)
+    exported = InferenceExport(model)
+
+    with torch.no_grad():
+        pi, v = model(observation, None, None, locs=locs)
+        pi_e, v_e = exported(observation, None, None, locs=locs)
+    print(f"max |pi - pi_export| = {(pi - pi_e).abs().max():.2e}, "
+          f"max |v - v_export| = {(v - v_e).abs().max():.2e}")
+
+    for name, fn in [("basis model", model), ("export", exported)]:
+        with torch.no_grad():
+            fn(observation, None, None, locs=locs)  # Warm-up.
+            if device != "cpu":
+                torch.cuda.synchronize(device)
+            start = time.perf_counter()
+            for _ in range(n_repeat):
+                fn(observation, None, None, locs=locs)
+            if device != "cpu":
+                torch.cuda.synchronize(device)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {B * n_repeat / elapsed:10.0f} samples/s")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--B', help='sampler envs', type=int, default=16)
+    parser.add_argument('--n_repeat', type=int, default=200)
+    parser.add_argument('--cuda_idx', type=int, default=None)
+    args = parser.parse_args()
+    device = ("cpu" if args.cuda_idx is None else
+              torch.device("cuda", args.cuda_idx))
+    main(args.n_agents, args.grid_size, args.B, args.n_repeat, device)
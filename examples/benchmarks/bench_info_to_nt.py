@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: GymEnvWrapper.step() overhead per step (beyond the wrapped
+env's own step), converting env info dicts with info_to_nt() versus the
+converter compiled from the example info (compile_info_converter()), for
+info dicts like the wildlife and traffic envs' and under gym's TimeLimit.
+Checks that both give the same env_info.  Each kind runs in its own
+process, as the info namedtuples are module-level, one schema per process.
+"""
+import multiprocessing as mp
+import time
+
+import numpy as np
+import gym
+from gym.spaces import Box, MultiDiscrete
+from gym.wrappers.time_limit import TimeLimit
+
+from rlpyt.envs.gym import GymEnvWrapper, info_to_nt
+
+INFOS = dict(
+    wildlife=lambda: dict(scapt=np.random.randint(2),
+        fcapt=np.random.randint(2), colliders=np.random.randint(3)),
+    traffic=lambda: dict(wait_time=np.random.rand(),
+        sim_time=np.random.rand()),
+)
+
+
+class InfoEnv(gym.Env):
+    """Constant observations, random info dicts of the given kind."""
+
+    def __init__(self, make_info, n_agents=3, grid_size=7):
+        self.make_info = make_info
+        self.action_space = MultiDiscrete([5] * n_agents)
+        self.observation_space = Box(0, 1, shape=(n_agents + 1, grid_size,
+            grid_size), dtype=np.float32)
+        self._observation = np.zeros(self.observation_space.shape,
+            dtype=np.float32)
+        self._reward = np.zeros(n_agents, dtype=np.float32)
+
+    def reset(self):
+        return self._observation
+
+    def step(self, action):
+        return self._observation, self._reward, [False], self.make_info()
+
+
+def time_steps(step, action, n_steps):
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        step(action)
+    return (time.perf_counter() - start) / n_steps
+
+
+def run(kind, n_steps):
+    env = TimeLimit(InfoEnv(INFOS[kind]), max_episode_steps=10 * n_steps)
+    wrapper = GymEnvWrapper(env)
+    info = env.step(env.action_space.sample())[3]
+    info["timeout"] = False
+    same = wrapper._info_to_nt(info) == info_to_nt(info)
+    action = wrapper.action_space.sample()
+    t_env = time_steps(env.step, wrapper.action_space.revert(action), n_steps)
+    t_compiled = time_steps(wrapper.step, action, n_steps)
+    wrapper._info_to_nt = info_to_nt  # As before.
+    t_walk = time_steps(wrapper.step, action, n_steps)
+    print(f"{kind:>8} info: wrapper overhead {1e6 * (t_walk - t_env):5.2f} "
+          f"us / step with info_to_nt, {1e6 * (t_compiled - t_env):5.2f} "
+          f"us compiled, same env_info: {same}")
+
+
+def main(kinds, n_steps):
+    ctx = mp.get_context("spawn")
+    for kind in kinds:
+        p = ctx.Process(target=run, args=(kind, n_steps))
+        p.start()
+        p.join()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--info', nargs='+', choices=list(INFOS),
+                        default=list(INFOS))
+    parser.add_argument('--n_steps', type=int, default=100000)
+    args = parser.parse_args()
+    main(args.info, args.n_steps)
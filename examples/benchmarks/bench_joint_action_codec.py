@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: joint action index <--> per-agent actions, comparing the
+old ``act_prod`` list (itertools.product + Python lookup) against the
+mixed-radix ``JointActionCodec`` on numpy and torch.
+"""
+import itertools
+import time
+
+import numpy as np
+import torch
+
+from rlpyt.utils.joint_action import JointActionCodec
+
+
+def timeit(fn, n_repeat):
+    fn()  # Warm-up.
+    start = time.perf_counter()
+    for _ in range(n_repeat):
+        fn()
+    return (time.perf_counter() - start) / n_repeat
+
+
+def main(n_actions, agent_counts, batch, n_repeat, device):
+    print(f"{'n_agents':>8} {'build[s]':>10} {'list dec':>10} "
+          f"{'list enc':>10} {'np dec':>10} {'np enc':>10} {'torch dec':>10} "
+          f"{'torch enc':>10}")
+    for n_agents in agent_counts:
+        codec = JointActionCodec(n_agents=n_agents, n_actions=n_actions)
+        idx_np = np.random.randint(codec.n_joint, size=batch)
+        idx_pyt = torch.from_numpy(idx_np).to(device)
+        act_np = codec.decode(idx_np)
+        act_pyt = codec.decode(idx_pyt)
+
+        start = time.perf_counter()
+        act_prod = list(itertools.product(*[range(n_actions)] * n_agents))
+        build = time.perf_counter() - start
+        lookup = {a: i for i, a in enumerate(act_prod)}
+        list_dec = timeit(lambda: [act_prod[i] for i in idx_np], n_repeat)
+        list_enc = timeit(lambda: [lookup[tuple(a)] for a in act_np], n_repeat)
+        np_dec = timeit(lambda: codec.decode(idx_np), n_repeat)
+        np_enc = timeit(lambda: codec.encode(act_np), n_repeat)
+        pyt_dec = timeit(lambda: codec.decode(idx_pyt), n_repeat)
+        pyt_enc = timeit(lambda: codec.encode(act_pyt), n_repeat)
+        print(f"{n_agents:>8} {build:>10.4f} " + " ".join(f"{1e6 * t:>8.1f}us"
+            for t in (list_dec, list_enc, np_dec, np_enc, pyt_dec, pyt_enc)))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_actions', type=int, default=5)
+    parser.add_argument('--n_agents', type=int, nargs='+',
+                        default=[2, 3, 4, 5, 6, 7, 8])
+    parser.add_argument('--batch', help='actions per call', type=int,
+                        default=16)
+    parser.add_argument('--n_repeat', type=int, default=1000)
+    parser.add_argument('--cuda_idx', type=int, default=None)
+    args = parser.parse_args()
+    device = ("cpu" if args.cuda_idx is None else
+              torch.device("cuda", args.cuda_idx))
+    main(args.n_actions, args.n_agents, args.batch, args.n_repeat, device)
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: MAPPO loss terms (likelihood ratio, entropy, perplexity,
+KL) from probabilities (DistInfo, model softmax) versus log-probabilities
+(DistInfoLogits, model log_softmax), forward + backward from the policy head
+output.  Checks both give the same values, and compares ratios for near-zero
+probabilities against the exact ratio.
+"""
+import time
+
+import torch
+import torch.nn.functional as F
+
+from rlpyt.distributions.categorical import DistInfo, DistInfoLogits
+from rlpyt.distributions.factorized import FactorizedCategorical
+from rlpyt.distributions.multicategorical import MultiCategorical
+
+
+def loss_terms(dist, DistInfoCls, normalize, head, old_head, action):
+    new = DistInfoCls(normalize(head, dim=-1))
+    old = DistInfoCls(normalize(old_head, dim=-1))
+    ratio = dist.likelihood_ratio(action, old_dist_info=old,
+        new_dist_info=new)
+    return (ratio.mean(), dist.mean_entropy(new), dist.mean_perplexity(new),
+        dist.mean_kl(old, new))
+
+
+def timed(fn, n_repeat):
+    fn()  # Warm-up.
+    start = time.perf_counter()
+    for _ in range(n_repeat):
+        fn()
+    return (time.perf_counter() - start) / n_repeat
+
+
+def main(batch, n_agents, n_actions, n_repeat, device):
+    old_head = torch.randn(batch, n_agents, n_actions, device=device)
+    head = (old_head + 0.1 * torch.randn_like(old_head)).requires_grad_()
+    action = torch.randint(n_actions, (batch, n_agents), device=device)
+    variants = [("prob", DistInfo, F.softmax),
+        ("logits", DistInfoLogits, F.log_softmax)]
+    for dist in (MultiCategorical(dim=n_actions, n_agents=n_agents,
+            n_actions=n_actions), FactorizedCategorical(n_agents, n_actions)):
+        values, times = dict(), dict()
+        for name, DistInfoCls, normalize in variants:
+            values[name] = [x.item() for x in loss_terms(dist, DistInfoCls,
+                normalize, head, old_head, action)]
+
+            def step():
+                head.grad = None
+                sum(loss_terms(dist, DistInfoCls, normalize, head, old_head,
+                    action)).backward()
+                if device != "cpu":
+                    torch.cuda.synchronize(device)
+
+            times[name] = timed(step, n_repeat)
+        diff = max(abs(x - y) / max(abs(x), 1e-6) for x, y in
+            zip(values["prob"], values["logits"]))
+        print(f"{type(dist).__name__:>21}: prob {1e3 * times['prob']:7.2f} ms, "
+              f"logits {1e3 * times['logits']:7.2f} ms "
+              f"({times['prob'] / times['logits']:.2f}x), "
+              f"max rel diff {diff:.1e}")
+
+    # Selected action with near-zero probability (here: e^-20 vs e^-25).
+    old_head = torch.zeros(1, 1, n_actions, device=device)
+    new_head = old_head.clone()
+    old_head[..., 0], new_head[..., 0] = -25., -20.
+    action = torch.zeros(1, 1, dtype=torch.long, device=device)
+    exact = torch.exp(
+        F.log_softmax(new_head, dim=-1) - F.log_softmax(old_head, dim=-1)
+        ).view(-1)[0].item()
+    dist = MultiCategorical(dim=n_actions, n_agents=1, n_actions=n_actions)
+    for name, DistInfoCls, normalize in variants:
+        ratio = dist.likelihood_ratio(action, DistInfoCls(normalize(old_head,
+            dim=-1)), DistInfoCls(normalize(new_head, dim=-1))).item()
+        print(f"{name:>8} ratio at p ~ 1e-10: {ratio:10.3f} "
+              f"(exact {exact:.3f})")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--batch', help='minibatch size', type=int,
+                        default=4096)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--n_actions', type=int, default=5)
+    parser.add_argument('--n_repeat', type=int, default=50)
+    parser.add_argument('--cuda_idx', type=int, default=None)
+    args = parser.parse_args()
+    device = ("cpu" if args.cuda_idx is None else
+              torch.device("cuda", args.cuda_idx))
+    main(args.batch, args.n_agents, args.n_actions, args.n_repeat, device)
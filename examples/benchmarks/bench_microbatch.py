@@ -0,0 +1,112 @@
+"""
+Micro-benchmark: MAPPO optimizer with gradient accumulation over micro-
+batches (microbatch_size) versus whole minibatches.  Checks the accumulated
+gradient of one minibatch matches the un-chunked one, then reports optimizer
+time and peak memory (opt_info.peakMemory, reset every iteration) per
+iteration, each size in a fresh (spawned) process (also shown as the rise
+over the resident set before optimizing).  Samples come
+from the random grid env of bench_step_ahead.
+"""
+import copy
+import multiprocessing as mp
+import time
+
+import numpy as np
+import psutil
+import torch
+
+from bench_step_ahead import RandomGridEnv
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.samplers.buffer import build_samples_buffer
+from rlpyt.samplers.collections import BatchSpec, TrajInfo
+from rlpyt.samplers.parallel.cpu.collectors import CpuResetCollector
+
+
+def sample_batch(n_agents, grid_size, batch_T, batch_B):
+    torch.manual_seed(0)
+    np.random.seed(0)
+    envs = [RandomGridEnv(n_agents, grid_size) for _ in range(batch_B)]
+    agent = WildlifeGraphAgent(model_kwargs=dict(basis=None))
+    agent.initialize(envs[0].spaces)
+    batch_spec = BatchSpec(batch_T, batch_B)
+    samples_pyt, samples_np, _ = build_samples_buffer(agent, envs[0],
+        batch_spec, bootstrap_value=True, subprocess=False)
+    collector = CpuResetCollector(rank=0, envs=envs, samples_np=samples_np,
+        batch_T=batch_T, TrajInfoCls=TrajInfo, agent=agent)
+    agent_inputs, traj_infos = collector.start_envs()
+    collector.start_agent()
+    collector.collect_batch(agent_inputs, traj_infos, 0)
+    return agent, batch_spec, samples_pyt
+
+
+def gradient(agent, batch_spec, samples, microbatch_size, minibatches):
+    algo = MAPPO(minibatches=minibatches, epochs=1,
+        microbatch_size=microbatch_size)
+    algo.initialize(agent, 1, batch_spec, mid_batch_reset=True)
+    algo.optimizer.step = lambda: None  # Keep the weights; grads remain.
+    algo.clip_grad_norm = float("inf")
+    torch.manual_seed(1)  # Same minibatch order.
+    algo.optimize_agent(0, samples)
+    return [p.grad.clone() for p in agent.parameters()]
+
+
+def run(batch_args, microbatch_size, minibatches, n_itr, results):
+    agent, batch_spec, samples = sample_batch(*batch_args)
+    algo = MAPPO(minibatches=minibatches, microbatch_size=microbatch_size)
+    algo.initialize(agent, n_itr, batch_spec, mid_batch_reset=True)
+    agent.train_mode(0)
+    rss = psutil.Process().memory_info().rss / 2 ** 20
+    start = time.perf_counter()
+    for itr in range(n_itr):
+        opt_info = algo.optimize_agent(itr, samples)
+    results.put(((time.perf_counter() - start) / n_itr,
+        opt_info.peakMemory[0], rss))
+
+
+def main(n_agents, grid_size, batch_T, batch_B, minibatches,
+        microbatch_sizes, n_itr):
+    batch_args = (n_agents, grid_size, batch_T, batch_B)
+    agent, batch_spec, samples = sample_batch(*batch_args)
+    agent.train_mode(0)
+    state_dict = copy.deepcopy(agent.state_dict())
+    reference = gradient(agent, batch_spec, samples, None, minibatches)
+    mb_size = batch_spec.size // minibatches
+    print(f"minibatch size {mb_size}")
+    ctx = mp.get_context("spawn")
+    for microbatch_size in [None] + microbatch_sizes:
+        if microbatch_size is not None:
+            agent.load_state_dict(state_dict)
+            grads = gradient(agent, batch_spec, samples, microbatch_size,
+                minibatches)
+            diff = max(((g - r).abs().max() / r.abs().max().clamp(min=1e-12)
+                ).item() for g, r in zip(grads, reference))
+        else:
+            diff = 0.
+        results = ctx.Queue()
+        p = ctx.Process(target=run, args=(batch_args, microbatch_size,
+            minibatches, n_itr, results))
+        p.start()
+        elapsed, peak, rss = results.get()
+        p.join()
+        print(f"microbatch_size {str(microbatch_size):>5}: "
+              f"{1e3 * elapsed:8.2f} ms / iteration, peak {peak:7.1f} MB "
+              f"({peak - rss:+7.1f} MB over start), "
+              f"max rel grad diff {diff:.1e}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--batch_T', type=int, default=64)
+    parser.add_argument('--batch_B', type=int, default=16)
+    parser.add_argument('--minibatches', type=int, default=1)
+    parser.add_argument('--microbatch_size', type=int, nargs='+',
+                        default=[256, 64])
+    parser.add_argument('--n_itr', type=int, default=3)
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.batch_T, args.batch_B,
+         args.minibatches, args.microbatch_size, args.n_itr)
@@ -0,0 +1,115 @@
+"""
+Micro-benchmark: MAPPO optimizer time per iteration for N seeds, as N
+separate MAPPO instances (as N processes would, but run in turn here)
+versus one MultiSeedMAPPO over a MultiSeedAgent (stacked models, one
+vmapped forward and backward).  Checks that one full-batch update of each
+seed matches its separate update.  Samples come from the random grid env of
+bench_step_ahead; each seed has its own envs and initial weights.
+"""
+import copy
+import time
+
+import torch
+
+from bench_step_ahead import RandomGridEnv
+from rlpyt.agents.multi_seed import MultiSeedAgent
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.algos.pg.multi_seed import MultiSeedMAPPO
+from rlpyt.samplers.multi_seed import MultiSeedSampler
+from rlpyt.samplers.serial.sampler import SerialSampler
+
+
+def build(n_seeds, n_agents, grid_size, batch_T, batch_B):
+    sampler = MultiSeedSampler(SerialSampler(
+        EnvCls=RandomGridEnv,
+        env_kwargs=dict(n_agents=n_agents, grid_size=grid_size),
+        batch_T=batch_T,
+        batch_B=batch_B,
+        max_decorrelation_steps=0,
+    ), n_seeds)
+    agent = MultiSeedAgent(WildlifeGraphAgent,
+        dict(model_kwargs=dict(basis=None)), n_seeds)
+    sampler.initialize(agent, seed=0, bootstrap_value=True)
+    agent.to_device()
+    samples, _ = sampler.obtain_samples(0)
+    return agent, sampler, samples
+
+
+def separate(agent, sampler, samples, algo_kwargs, n_itr):
+    """One MAPPO per seed agent; returns seconds per iteration."""
+    algos = list()
+    for seed_agent in agent.agents:
+        algo = MAPPO(**algo_kwargs)
+        algo.initialize(seed_agent, n_itr, sampler.batch_spec,
+            mid_batch_reset=True)
+        algos.append(algo)
+    start = time.perf_counter()
+    for itr in range(n_itr):
+        for algo, seed_agent, seed_samples in zip(algos, agent.agents,
+                samples):
+            seed_agent.train_mode(itr)
+            algo.optimize_agent(itr, seed_samples)
+    return (time.perf_counter() - start) / n_itr
+
+
+def stacked(agent, sampler, samples, algo_kwargs, n_itr):
+    algo = MultiSeedMAPPO(**algo_kwargs)
+    algo.initialize(agent, n_itr, sampler.batch_spec, mid_batch_reset=True)
+    start = time.perf_counter()
+    for itr in range(n_itr):
+        agent.train_mode(itr)
+        algo.optimize_agent(itr, samples)
+    agent.sync_models()
+    return (time.perf_counter() - start) / n_itr
+
+
+def check(n_agents, grid_size, batch_T, batch_B):
+    agent, sampler, samples = build(3, n_agents, grid_size, batch_T, batch_B)
+    state_dict = copy.deepcopy(agent.state_dict())
+    full_batch = dict(epochs=1, minibatches=1)
+    separate(agent, sampler, samples, full_batch, 1)
+    expected = [copy.deepcopy(a.state_dict()) for a in agent.agents]
+    agent.load_state_dict(state_dict)
+    stacked(agent, sampler, samples, full_batch, 1)
+    diff = max((a.state_dict()[k] - e[k]).abs().max().item()
+        for a, e in zip(agent.agents, expected) for k in e)
+    moved = max((e[k] - s[k]).abs().max().item()
+        for e, s in zip(expected, state_dict) for k in e)
+    print(f"one update, stacked vs separate: max param diff {diff:.1e} "
+          f"(update size {moved:.1e})")
+
+
+def main(n_seeds_list, n_agents, grid_size, batch_T, batch_B, epochs,
+        minibatches, n_itr):
+    torch.set_num_threads(1)
+    check(n_agents, grid_size, batch_T, batch_B)
+    algo_kwargs = dict(epochs=epochs, minibatches=minibatches)
+    for n_seeds in n_seeds_list:
+        agent, sampler, samples = build(n_seeds, n_agents, grid_size,
+            batch_T, batch_B)
+        state_dict = copy.deepcopy(agent.state_dict())
+        t_separate = separate(agent, sampler, samples, algo_kwargs, n_itr)
+        agent.load_state_dict(state_dict)
+        t_stacked = stacked(agent, sampler, samples, algo_kwargs, n_itr)
+        print(f"{n_seeds:>2} seeds: separate {1e3 * t_separate:8.2f} ms, "
+              f"stacked {1e3 * t_stacked:8.2f} ms / iteration "
+              f"({t_separate / t_stacked:.2f}x)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_seeds', type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--batch_T', type=int, default=32)
+    parser.add_argument('--batch_B', type=int, default=8)
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--minibatches', type=int, default=4)
+    parser.add_argument('--n_itr', type=int, default=5)
+    args = parser.parse_args()
+    main(args.n_seeds, args.n_agents, args.grid_size, args.batch_T,
+         args.batch_B, args.epochs, args.minibatches, args.n_itr)
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: wall time per iteration of MAPPO training with a
+PipelinedCpuSampler, sequential (max_policy_lag=0: sample, then optimize)
+versus pipelined (max_policy_lag=1: workers collect the next batch while the
+learner optimizes on this one).  Uses the random grid env of
+bench_step_ahead.  The overlap needs spare cores beyond the worker CPUs.
+"""
+import time
+
+from bench_step_ahead import RandomGridEnv
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.runners.pipelined_rl import PipelinedRl
+from rlpyt.samplers.parallel.cpu.collectors import CpuResetCollector
+from rlpyt.samplers.parallel.cpu.sampler import PipelinedCpuSampler
+
+
+def main(n_agents, grid_size, batch_T, batch_B, n_workers, epochs,
+        minibatches, n_itr):
+    batch_size = batch_T * batch_B
+    for max_policy_lag in (0, 1):
+        sampler = PipelinedCpuSampler(
+            EnvCls=RandomGridEnv,
+            env_kwargs=dict(n_agents=n_agents, grid_size=grid_size),
+            batch_T=batch_T,
+            batch_B=batch_B,
+            max_decorrelation_steps=0,
+            CollectorCls=CpuResetCollector,
+        )
+        runner = PipelinedRl(
+            algo=MAPPO(epochs=epochs, minibatches=minibatches),
+            agent=WildlifeGraphAgent(model_kwargs=dict(basis=None)),
+            sampler=sampler,
+            n_steps=n_itr * batch_size,
+            log_interval_steps=n_itr * batch_size,
+            affinity=dict(workers_cpus=list(range(n_workers)),
+                set_affinity=False, master_torch_threads=1),
+            seed=0,
+            max_policy_lag=max_policy_lag,
+        )
+        start = time.perf_counter()
+        runner.train()
+        elapsed = (time.perf_counter() - start) / n_itr
+        print(f"max_policy_lag {max_policy_lag}: "
+              f"{1e3 * elapsed:8.2f} ms / iteration (incl. startup)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--batch_T', type=int, default=32)
+    parser.add_argument('--batch_B', type=int, default=8)
+    parser.add_argument('--n_workers', type=int, default=2)
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--minibatches', type=int, default=4)
+    parser.add_argument('--n_itr', type=int, default=20)
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.batch_T, args.batch_B,
+         args.n_workers, args.epochs, args.minibatches, args.n_itr)
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: model time per training iteration when agent coordinates are
+re-extracted from the location grid in every forward pass, versus extracted
+once at sampling time and passed in as ``locs`` (as MAPPO does when
+``agent_info.locs`` is present).
+"""
+import time
+
+import torch
+
+from rlpyt.models.pg.wildlife_ff_model import WildlifeGraphModel
+from rlpyt.utils.misc import iterate_mb_idxs
+
+
+def random_observation(T, B, n_agents, grid_size):
+    """[T,B,n_agents+1,H,W] uint8, one cell per agent set in the last channel."""
+    obs = torch.randint(0, 2, (T, B, n_agents + 1, grid_size, grid_size),
+        dtype=torch.uint8)
+    obs[:, :, -1] = 0
+    cells = torch.rand(T * B, grid_size * grid_size).argsort(dim=-1)[:, :n_agents]
+    loc_grid = obs[:, :, -1].reshape(T * B, -1)
+    loc_grid.scatter_(1, cells, 1)
+    obs[:, :, -1] = loc_grid.view(T, B, grid_size, grid_size)
+    return obs
+
+
+def train_pass(model, observation, locs, epochs, minibatches):
+    T, B = observation.shape[:2]
+    with torch.no_grad():
+        for _ in range(epochs):
+            for idxs in iterate_mb_idxs(T * B, T * B // minibatches,
+                    shuffle=True):
+                T_idxs, B_idxs = idxs // B, idxs % B
+                mb_locs = None if locs is None else locs[T_idxs, B_idxs]
+                model(observation[T_idxs, B_idxs], None, None, locs=mb_locs)
+
+
+def main(n_agents, grid_size, T, B, epochs, minibatches, n_repeat, device):
+    model = WildlifeGraphModel(image_shape=(n_agents + 1, grid_size,
+        grid_size), output_size=5, n_agents=n_agents).to(device)
+    observation = random_observation(T, B, n_agents, grid_size).to(device)
+
+    def recompute():
+        train_pass(model, observation, None, epochs, minibatches)
+
+    def precompute():
+        locs = model.extract_locs(observation).type(torch.int16)  # Sampling.
+        train_pass(model, observation, locs, epochs, minibatches)
+
+    print(f"n_agents={n_agents} grid={grid_size} T={T} B={B} "
+          f"epochs={epochs} minibatches={minibatches}")
+    for name, fn in [("recompute", recompute), ("precompute", precompute)]:
+        fn()  # Warm-up.
+        if device != "cpu":
+            torch.cuda.synchronize(device)
+        start = time.perf_counter()
+        for _ in range(n_repeat):
+            fn()
+        if device != "cpu":
+            torch.cuda.synchronize(device)
+        elapsed = (time.perf_counter() - start) / n_repeat
+        print(f"{name:>12}: {1e3 * elapsed:8.2f} ms / itr")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--T', help='sampler time steps', type=int,
+                        default=128)
+    parser.add_argument('--B', help='sampler envs', type=int, default=8)
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--minibatches', type=int, default=4)
+    parser.add_argument('--n_repeat', type=int, default=5)
+    parser.add_argument('--cuda_idx', type=int, default=None)
+    args = parser.parse_args()
+    device = ("cpu" if args.cuda_idx is None else
+              torch.device("cuda", args.cuda_idx))
+    main(args.n_agents, args.grid_size, args.T, args.B, args.epochs,
+         args.minibatches, args.n_repeat, device)
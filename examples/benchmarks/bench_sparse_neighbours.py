@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: dense (all agents) versus sparse (k-nearest neighbour)
+communication in the wildlife graph model, from 3 to 64 agents.  Reports
+training step time (forward + backward on a minibatch) and the memory of
+activations saved for backward, for the dense symmetrizer model, and for the
+message passing network (one batched forward over an edge list) with all
+pairs of agents (k = n - 1, the dense equivalent) and with k nearest.
+"""
+import time
+
+import torch
+
+from bench_precomputed_locs import random_observation
+from rlpyt.models.pg.wildlife_ff_model import WildlifeGraphModel
+
+
+def saved_bytes(fn):
+    """Run fn, returning the bytes of tensors autograd saves for backward."""
+    total = [0]
+
+    def pack(tensor):
+        total[0] += tensor.numel() * tensor.element_size()
+        return tensor
+
+    with torch.autograd.graph.saved_tensors_hooks(pack, lambda t: t):
+        out = fn()
+    return out, total[0]
+
+
+def train_step(model, observation, locs):
+    pi, v = model(observation, None, None, locs=locs)
+    return (pi.log().mean() + v.mean())
+
+
+def main(agent_counts, k, radius, grid_size, batch, n_repeat, device):
+    print(f"{'n_agents':>8} {'dense ms':>9} {'dense MB':>9} "
+          f"{'pairs ms':>9} {'pairs MB':>9} {'knn ms':>9} {'knn MB':>9}")
+    for n_agents in agent_counts:
+        observation = random_observation(1, batch, n_agents,
+            grid_size)[0].to(device)
+        row = [n_agents]
+        for neighbours in (None, n_agents - 1, k):
+            model = WildlifeGraphModel(
+                image_shape=(n_agents, grid_size, grid_size), output_size=5,
+                n_agents=n_agents, neighbours=neighbours,
+                neighbour_radius=radius if neighbours else None).to(device)
+            locs = model.extract_locs(observation)
+            loss, nbytes = saved_bytes(
+                lambda: train_step(model, observation, locs))
+            loss.backward()  # Warm-up.
+            if device != "cpu":
+                torch.cuda.synchronize(device)
+            start = time.perf_counter()
+            for _ in range(n_repeat):
+                train_step(model, observation, locs).backward()
+            if device != "cpu":
+                torch.cuda.synchronize(device)
+            elapsed = (time.perf_counter() - start) / n_repeat
+            row += [1e3 * elapsed, nbytes / 2 ** 20]
+        print(("{:>8}" + " {:>9.2f}" * 6).format(*row))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, nargs='+',
+                        default=[3, 8, 16, 32, 64])
+    parser.add_argument('--neighbours', type=int, default=4)
+    parser.add_argument('--neighbour_radius', type=float, default=None)
+    parser.add_argument('--grid_size', type=int, default=21)
+    parser.add_argument('--batch', help='minibatch size', type=int,
+                        default=64)
+    parser.add_argument('--n_repeat', type=int, default=5)
+    parser.add_argument('--cuda_idx', type=int, default=None)
+    args = parser.parse_args()
+    device = ("cpu" if args.cuda_idx is None else
+              torch.device("cuda", args.cuda_idx))
+    main(args.n_agents, args.neighbours, args.neighbour_radius,
+         args.grid_size, args.batch, args.n_repeat, device)
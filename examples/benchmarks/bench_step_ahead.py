@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: sampler time per batch and model forward passes per batch,
+with the bootstrap value from a separate agent.value() pass at the end of
+each batch (CpuResetCollector), versus reused from the next batch's first
+step (CpuStepAheadResetCollector).  Uses a random grid env standing in for
+the wildlife env, so that time is mostly agent forward passes.
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.envs.base import Env
+from rlpyt.samplers.buffer import build_samples_buffer
+from rlpyt.samplers.collections import BatchSpec, TrajInfo
+from rlpyt.samplers.parallel.cpu.collectors import (CpuResetCollector,
+    CpuStepAheadResetCollector)
+from rlpyt.spaces.int_box import IntBox
+
+EnvInfo = namedtuple("EnvInfo", ["traj_done"])
+
+
+class RandomGridEnv(Env):
+    """Random observations [n_agents+1,H,W] (location grid last), episodes
+    of ``horizon`` steps."""
+
+    def __init__(self, n_agents, grid_size, n_actions=5, horizon=100):
+        self.n_agents, self.grid_size, self._horizon = (n_agents, grid_size,
+            horizon)
+        self._observation_space = IntBox(0, 2, shape=(n_agents + 1, grid_size,
+            grid_size), dtype="uint8")
+        self._action_space = IntBox(0, n_actions, shape=(n_agents,))
+        self._action_space.n_agents = n_agents
+        self._action_space.n_actions = n_actions
+        self._action_space.decentralized = True
+
+    def observation(self):
+        o = self._observation_space.sample()
+        o[-1] = 0
+        cells = np.random.choice(self.grid_size ** 2, self.n_agents,
+            replace=False)
+        o[-1].reshape(-1)[cells] = 1
+        return o
+
+    def reset(self):
+        self._t = 0
+        return self.observation()
+
+    def step(self, action):
+        self._t += 1
+        d = self._t >= self._horizon
+        return (self.observation(), np.zeros(self.n_agents, dtype="float32"),
+            [d], EnvInfo(traj_done=d))
+
+
+class CountingModel:
+    """Counts forward passes of the wrapped model."""
+
+    def __init__(self, model):
+        self.model, self.calls = model, 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.model(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def main(n_agents, grid_size, batch_T, batch_B, n_batches):
+    for CollectorCls in (CpuResetCollector, CpuStepAheadResetCollector):
+        envs = [RandomGridEnv(n_agents, grid_size) for _ in range(batch_B)]
+        agent = WildlifeGraphAgent(model_kwargs=dict(basis=None))
+        agent.initialize(envs[0].spaces)
+        batch_spec = BatchSpec(batch_T, batch_B)
+        _, samples_np, _ = build_samples_buffer(agent, envs[0], batch_spec,
+            bootstrap_value=True, subprocess=False)
+        collector = CollectorCls(rank=0, envs=envs, samples_np=samples_np,
+            batch_T=batch_T, TrajInfoCls=TrajInfo, agent=agent)
+        agent_inputs, traj_infos = collector.start_envs()
+        collector.start_agent()
+        agent_inputs, traj_infos, _ = collector.collect_batch(agent_inputs,
+            traj_infos, 0)  # Warm-up.
+        agent.model = CountingModel(agent.model)
+        start = time.perf_counter()
+        for itr in range(n_batches):
+            agent_inputs, traj_infos, _ = collector.collect_batch(
+                agent_inputs, traj_infos, itr)
+        elapsed = (time.perf_counter() - start) / n_batches
+        print(f"{CollectorCls.__name__:>27}: {1e3 * elapsed:7.2f} ms / batch, "
+              f"{agent.model.calls / n_batches:.1f} forward passes / batch")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--batch_T', type=int, default=5)
+    parser.add_argument('--batch_B', type=int, default=16)
+    parser.add_argument('--n_batches', type=int, default=50)
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.batch_T, args.batch_B,
+         args.n_batches)
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: MAPPO optimizer time per iteration without and with a KL
+budget (target_kl), which stops the epochs once an epoch's mean approximate
+KL from the sampling policy exceeds it.  Samples come from the random grid
+env of bench_step_ahead, collected with the agent being trained.
+"""
+import time
+
+import numpy as np
+import torch
+
+from bench_step_ahead import RandomGridEnv
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.samplers.buffer import build_samples_buffer
+from rlpyt.samplers.collections import BatchSpec, TrajInfo
+from rlpyt.samplers.parallel.cpu.collectors import CpuResetCollector
+
+
+def main(n_agents, grid_size, batch_T, batch_B, epochs, minibatches, lr,
+        target_kls, n_itr):
+    for target_kl in target_kls:
+        torch.manual_seed(0)
+        np.random.seed(0)
+        envs = [RandomGridEnv(n_agents, grid_size) for _ in range(batch_B)]
+        agent = WildlifeGraphAgent(model_kwargs=dict(basis=None))
+        agent.initialize(envs[0].spaces)
+        batch_spec = BatchSpec(batch_T, batch_B)
+        samples_pyt, samples_np, _ = build_samples_buffer(agent, envs[0],
+            batch_spec, bootstrap_value=True, subprocess=False)
+        collector = CpuResetCollector(rank=0, envs=envs,
+            samples_np=samples_np, batch_T=batch_T, TrajInfoCls=TrajInfo,
+            agent=agent)
+        agent_inputs, traj_infos = collector.start_envs()
+        collector.start_agent()
+        algo = MAPPO(learning_rate=lr, epochs=epochs, minibatches=minibatches,
+            target_kl=target_kl)
+        algo.initialize(agent, n_itr, batch_spec)
+        elapsed, n_updates, kl = 0., list(), list()
+        for itr in range(n_itr):
+            agent_inputs, traj_infos, _ = collector.collect_batch(
+                agent_inputs, traj_infos, itr)
+            agent.train_mode(itr)
+            start = time.perf_counter()
+            opt_info = algo.optimize_agent(itr, samples_pyt)
+            elapsed += time.perf_counter() - start
+            n_updates += opt_info.nUpdates
+            kl += opt_info.kl
+        print(f"target_kl {str(target_kl):>6}: "
+              f"{1e3 * elapsed / n_itr:7.2f} ms / iteration, "
+              f"{np.mean(n_updates):5.1f} of {epochs * minibatches} updates, "
+              f"mean kl {np.mean(kl):.2e}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--batch_T', type=int, default=32)
+    parser.add_argument('--batch_B', type=int, default=16)
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--minibatches', type=int, default=4)
+    parser.add_argument('--lr', type=float, default=0.001)
+    parser.add_argument('--target_kl', type=float, nargs='+',
+                        default=[None, 0.01, 0.001])
+    parser.add_argument('--n_itr', type=int, default=20)
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.batch_T, args.batch_B,
+         args.epochs, args.minibatches, args.lr, args.target_kl, args.n_itr)
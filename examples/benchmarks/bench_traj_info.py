@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: trajectory statistics time per step for B envs, as B
+TrajInfo.step() calls versus one VecTrajInfo.step(), with per-agent rewards
+and the wildlife env_info fields.  Checks that both give the same completed
+trajectory records.
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from rlpyt.samplers.collections import TrajInfo, VecTrajInfo
+from rlpyt.utils.collections import namedarraytuple_like
+
+EnvInfo = namedtuple("EnvInfo", ["scapt", "fcapt", "colliders", "wait_time",
+    "sim_time", "traj_done"])
+EnvInfoArrays = namedarraytuple_like(EnvInfo)
+
+
+def random_steps(n_steps, B, n_agents, horizon):
+    """Rewards [T,B,n_agents], env_info [T,B] and traj_done [T,B]."""
+    reward = (np.random.rand(n_steps, B, n_agents) < 0.1).astype("float32")
+    done = np.random.rand(n_steps, B) < 1 / horizon
+    env_info = EnvInfoArrays(*(np.random.rand(n_steps, B) < 0.05
+        for _ in range(3)), *np.random.rand(2, n_steps, B), done)
+    return reward, env_info, done
+
+
+def per_env(reward, env_info, done):
+    T, B = done.shape
+    traj_infos = [TrajInfo() for _ in range(B)]
+    completed = list()
+    env_info = [[EnvInfo(*env_info[t, b]) for b in range(B)]
+        for t in range(T)]  # As from each env.
+    start = time.perf_counter()
+    for t in range(T):
+        for b in range(B):
+            traj_infos[b].step(None, None, reward[t, b], done[t, b], None,
+                env_info[t][b])
+            if done[t, b]:
+                completed.append(traj_infos[b].terminate(None))
+                traj_infos[b] = TrajInfo()
+    return (time.perf_counter() - start) / T, completed
+
+
+def vectorized(reward, env_info, done):
+    T, B = done.shape
+    traj_infos = VecTrajInfo(B, TrajInfo)
+    completed = list()
+    start = time.perf_counter()
+    for t in range(T):
+        traj_infos.step(None, None, reward[t], done[t], None, env_info[t])
+        completed.extend(traj_infos.terminate(done[t]))
+    return (time.perf_counter() - start) / T, completed
+
+
+def main(B_list, n_agents, horizon, n_steps):
+    for B in B_list:
+        np.random.seed(0)
+        steps = random_steps(n_steps, B, n_agents, horizon)
+        t_list, expected = per_env(*steps)
+        t_vec, completed = vectorized(*steps)
+        key = lambda info: (info.Length, info.sim_time)
+        same = len(expected) == len(completed) and all(
+            np.allclose(np.asarray(a[k], dtype=float),
+            np.asarray(b[k], dtype=float)) for a, b in zip(
+            sorted(expected, key=key), sorted(completed, key=key)) for k in a)
+        print(f"B {B:>4}: TrajInfo {1e6 * t_list:8.1f} us, VecTrajInfo "
+              f"{1e6 * t_vec:6.1f} us / step ({t_list / t_vec:5.1f}x), "
+              f"{len(completed)} trajectories, same records: {same}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--B', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--horizon', type=int, default=100)
+    parser.add_argument('--n_steps', type=int, default=2000)
+    args = parser.parse_args()
+    main(args.B, args.n_agents, args.horizon, args.n_steps)
@@ -0,0 +1,152 @@
+"""
+Micro-benchmark: collector time per batch, outside the agent's forward
+passes, for CpuResetCollector (one env.step() per env per time step) versus
+VecCpuResetCollector, on the random grid env of bench_step_ahead as a list
+(ListVecEnv adapter) and on a natively vectorized version of it (one numpy
+step for all B envs).  Checks that the adapter gives the same samples as
+the per-env collector.
+"""
+import time
+
+import numpy as np
+import torch
+
+from bench_step_ahead import EnvInfo, RandomGridEnv
+from rlpyt.agents.pg.wildlife import WildlifeGraphAgent
+from rlpyt.envs.vector import VecEnv, VecEnvStep
+from rlpyt.samplers.buffer import build_samples_buffer
+from rlpyt.samplers.collections import BatchSpec, TrajInfo
+from rlpyt.samplers.parallel.cpu.collectors import (CpuResetCollector,
+    VecCpuResetCollector)
+from rlpyt.utils.collections import namedarraytuple_like
+
+EnvInfoArrays = namedarraytuple_like(EnvInfo)
+
+
+class RandomGridVecEnv(VecEnv):
+    """B RandomGridEnvs in numpy arrays, stepped together."""
+
+    def __init__(self, n_envs, n_agents, grid_size, n_actions=5, horizon=100):
+        self.env = RandomGridEnv(n_agents, grid_size, n_actions, horizon)
+        self._n_envs, self._horizon = n_envs, horizon
+        self._t = np.zeros(n_envs, dtype=int)
+        self._observation = np.zeros((n_envs,) +
+            self.env.observation_space.shape, dtype="uint8")
+
+    def observation(self, idxs):
+        n, (c, h, w) = len(idxs), self._observation.shape[1:]
+        o = self._observation
+        o[idxs, :-1] = np.random.randint(0, 2, size=(n, c - 1, h, w))
+        cells = np.argsort(np.random.rand(n, h * w), axis=1)[:, :c - 1]
+        location = np.zeros((n, h * w), dtype="uint8")
+        location[np.arange(n)[:, None], cells] = 1
+        o[idxs, -1] = location.reshape(n, h, w)
+        return o
+
+    def reset(self, mask=None):
+        idxs = (np.arange(self._n_envs) if mask is None else
+            np.flatnonzero(mask))
+        self._t[idxs] = 0
+        return self.observation(idxs)
+
+    def step(self, action):
+        self._t += 1
+        done = self._t >= self._horizon
+        self._t[done] = 0
+        return VecEnvStep(
+            observation=self.observation(np.arange(self._n_envs)),
+            reward=np.zeros((self._n_envs, self.env.n_agents), dtype="float32"),
+            done=done[:, None],
+            env_info=EnvInfoArrays(traj_done=done),
+            reset=done,
+        )
+
+    def sample_action(self):
+        return np.stack([self.env.action_space.sample()
+            for _ in range(self._n_envs)])
+
+    @property
+    def n_envs(self):
+        return self._n_envs
+
+    @property
+    def n_agents(self):
+        return self.env.n_agents
+
+    @property
+    def spaces(self):
+        return self.env.spaces
+
+
+def collect(CollectorCls, envs, example_env, agent, batch_spec, n_batches,
+        seed=0):
+    """Returns seconds per batch outside agent.step(), and the samples."""
+    _, samples_np, _ = build_samples_buffer(agent, example_env, batch_spec,
+        bootstrap_value=True, subprocess=False)
+    collector = CollectorCls(rank=0, envs=envs, samples_np=samples_np,
+        batch_T=batch_spec.T, TrajInfoCls=TrajInfo, agent=agent)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    agent_inputs, traj_infos = collector.start_envs()
+    collector.start_agent()
+    agent_time = [0.]
+    agent_step = agent.step
+
+    def timed_step(*args):
+        start = time.perf_counter()
+        try:
+            return agent_step(*args)
+        finally:
+            agent_time[0] += time.perf_counter() - start
+
+    agent.step = timed_step
+    start = time.perf_counter()
+    try:
+        for itr in range(n_batches):
+            agent_inputs, traj_infos, _ = collector.collect_batch(
+                agent_inputs, traj_infos, itr)
+    finally:
+        del agent.step
+    elapsed = time.perf_counter() - start - agent_time[0]
+    return elapsed / n_batches, samples_np
+
+
+def main(n_agents, grid_size, batch_T, batch_B, n_batches):
+    torch.set_num_threads(1)
+    example_env = RandomGridEnv(n_agents, grid_size)
+    agent = WildlifeGraphAgent(model_kwargs=dict(basis=None))
+    agent.initialize(example_env.spaces)
+    batch_spec = BatchSpec(batch_T, batch_B)
+    make_envs = lambda: [RandomGridEnv(n_agents, grid_size)
+        for _ in range(batch_B)]
+    t_list, samples = collect(CpuResetCollector, make_envs(), example_env,
+        agent, batch_spec, n_batches)
+    t_adapter, vec_samples = collect(VecCpuResetCollector, make_envs(),
+        example_env, agent, batch_spec, n_batches)
+    same = all(np.array_equal(a, b) for a, b in (
+        (samples.env.observation, vec_samples.env.observation),
+        (samples.env.reward, vec_samples.env.reward),
+        (samples.env.done, vec_samples.env.done),
+        (samples.agent.action, vec_samples.agent.action)))
+    print(f"ListVecEnv samples same as per-env collector's: {same}")
+    t_vec, _ = collect(VecCpuResetCollector, RandomGridVecEnv(batch_B,
+        n_agents, grid_size), example_env, agent, batch_spec, n_batches)
+    for name, t in (("CpuResetCollector, env list", t_list),
+            ("VecCpuResetCollector, ListVecEnv", t_adapter),
+            ("VecCpuResetCollector, RandomGridVecEnv", t_vec)):
+        print(f"{name:>39}: {1e3 * t:7.2f} ms / batch outside the agent "
+              f"({t_list / t:.2f}x)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--n_agents', type=int, default=3)
+    parser.add_argument('--grid_size', type=int, default=7)
+    parser.add_argument('--batch_T', type=int, default=5)
+    parser.add_argument('--batch_B', type=int, default=64)
+    parser.add_argument('--n_batches', type=int, default=50)
+    args = parser.parse_args()
+    main(args.n_agents, args.grid_size, args.batch_T, args.batch_B,
+         args.n_batches)
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: discounted returns and GAE, loop over time versus the
+vectorized reverse scan, for numpy and torch, T from 5 to 4096 and B from 16
+to 1024.  Checks that both give the same results, with done resets and
+timeouts (the _tl variants).
+"""
+import time
+
+import numpy as np
+import torch
+
+from rlpyt.algos.utils import (discount_return,
+    generalized_advantage_estimation, discount_return_tl,
+    generalized_advantage_estimation_tl, discount_return_scan,
+    generalized_advantage_estimation_scan, discount_return_tl_scan,
+    generalized_advantage_estimation_tl_scan)
+
+DISCOUNT, GAE_LAMBDA = 0.99, 0.95
+
+
+def random_batch(T, B, p_done, seed=0):
+    rng = np.random.RandomState(seed)
+    reward = rng.randn(T, B).astype(np.float32)
+    value = rng.randn(T, B).astype(np.float32)
+    bootstrap_value = rng.randn(B).astype(np.float32)
+    done = rng.rand(T, B) < p_done
+    timeout = done & (rng.rand(T, B) < 0.5)
+    return reward, value, done.astype(np.float32), bootstrap_value, timeout
+
+
+def pairs(reward, value, done, bv, timeout):
+    yield ("return", lambda f: f(reward, done, bv, DISCOUNT),
+        discount_return, discount_return_scan)
+    yield ("gae", lambda f: f(reward, value, done, bv, DISCOUNT, GAE_LAMBDA),
+        generalized_advantage_estimation,
+        generalized_advantage_estimation_scan)
+    yield ("return_tl",
+        lambda f: f(reward, done, bv, DISCOUNT, timeout, value),
+        discount_return_tl, discount_return_tl_scan)
+    yield ("gae_tl", lambda f: f(reward, value, done, bv, DISCOUNT,
+        GAE_LAMBDA, timeout), generalized_advantage_estimation_tl,
+        generalized_advantage_estimation_tl_scan)
+
+
+def max_diff(x, y):
+    x, y = (x if isinstance(x, tuple) else (x,)), (y if isinstance(y, tuple)
+        else (y,))
+    return max(float(np.abs(np.asarray(a) - np.asarray(b)).max())
+        for a, b in zip(x, y))
+
+
+def timed(fn, n_repeat):
+    fn()  # Warm-up.
+    start = time.perf_counter()
+    for _ in range(n_repeat):
+        fn()
+    return (time.perf_counter() - start) / n_repeat
+
+
+def main(Ts, Bs, p_done, n_repeat, tolerance):
+    print(f"{'lib':>5} {'fn':>9} {'T':>5} {'B':>5} {'loop ms':>9} "
+          f"{'scan ms':>9} {'speedup':>8} {'max diff':>9}")
+    for T in Ts:
+        for B in Bs:
+            batch = random_batch(T, B, p_done)
+            for lib in ("numpy", "torch"):
+                inputs = (batch if lib == "numpy" else
+                    tuple(torch.from_numpy(x) for x in batch))
+                for name, call, loop, scan in pairs(*inputs):
+                    diff = max_diff(call(loop), call(scan))
+                    assert diff < tolerance, (lib, name, T, B, diff)
+                    t_loop = timed(lambda: call(loop), n_repeat)
+                    t_scan = timed(lambda: call(scan), n_repeat)
+                    print(f"{lib:>5} {name:>9} {T:>5} {B:>5} "
+                          f"{1e3 * t_loop:>9.2f} {1e3 * t_scan:>9.2f} "
+                          f"{t_loop / t_scan:>8.1f} {diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--T', type=int, nargs='+',
+                        default=[5, 128, 1024, 4096])
+    parser.add_argument('--B', type=int, nargs='+', default=[16, 128, 1024])
+    parser.add_argument('--p_done', type=float, default=0.01)
+    parser.add_argument('--n_repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=1e-3)
+    args = parser.parse_args()
+    main(args.T, args.B, args.p_done, args.n_repeat, args.tolerance)
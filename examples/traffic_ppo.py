@@ -1,11 +1,14 @@
 from rlpyt.samplers.serial.sampler import SerialSampler
-from rlpyt.samplers.parallel.cpu.sampler import CpuSampler
-from rlpyt.samplers.parallel.gpu.sampler import GpuSampler
+from rlpyt.samplers.parallel.cpu.sampler import (CpuSampler,
+    PipelinedCpuSampler)
+from rlpyt.samplers.parallel.cpu.collectors import CpuStepAheadResetCollector
+from rlpyt.samplers.parallel.gpu.sampler import GpuSampler, GpuStepAheadSampler
 from rlpyt.samplers.parallel.gpu.alternating_sampler import AlternatingSampler
 from rlpyt.envs.gym import make as gym_make
 from rlpyt.algos.pg.ppo import PPO
 from rlpyt.algos.pg.mappo import MAPPO
 from rlpyt.runners.minibatch_rl import MinibatchRlEval
+from rlpyt.runners.pipelined_rl import PipelinedRlEval
 from rlpyt.utils.logging.context import logger_context
 
 from ops import get_agent_cls_traffic
@@ -32,19 +35,39 @@ def build_and_train(env_id="JunctionEnv-v0", run_ID=0, cuda_idx=None,
         affinity["alternating"] = True  # Sampler will check for this.
         print(f"Using Alternating GPU parallel sampler, {gpu_cpu} for "
               "sampling and optimizing.")
+    sampler_kwargs = dict()
+    if args.step_ahead:  # Bootstrap value from next batch's first step.
+        if sample_mode == "gpu":
+            Sampler = GpuStepAheadSampler
+        elif sample_mode == "alternating":
+            raise ValueError("step_ahead not supported by alternating sampler.")
+        else:
+            sampler_kwargs["CollectorCls"] = CpuStepAheadResetCollector
+    runner_kwargs = dict()
+    Runner = MinibatchRlEval
+    if args.max_policy_lag > 0:  # Sample next batch while optimizing.
+        if sample_mode != "cpu":
+            raise ValueError("max_policy_lag needs the cpu sampler.")
+        Sampler, Runner = PipelinedCpuSampler, PipelinedRlEval
+        runner_kwargs["max_policy_lag"] = args.max_policy_lag
+
+    env_kwargs = dict(id=env_id,
+                      obs_dtype="uint8" if args.compact_obs else None)
 
     sampler = Sampler(
         EnvCls=gym_make,
-        env_kwargs=dict(id=env_id),
-        eval_env_kwargs=dict(id=env_id),
+        env_kwargs=env_kwargs,
+        eval_env_kwargs=env_kwargs,
         batch_T=5,  # 5 time-steps per sampler iteration.
         batch_B=16,  # 16 parallel environments.
         max_decorrelation_steps=400,
         eval_n_envs=25,
-        eval_max_steps=12500
+        eval_max_steps=12500,
+        **sampler_kwargs
     )
 
-    algo = MAPPO(learning_rate=args.lr)
+    algo = MAPPO(learning_rate=args.lr, target_kl=args.target_kl,
+                 microbatch_size=args.microbatch_size)
 
     agentCls, agent_basis = get_agent_cls_traffic(args.network)
 
@@ -53,23 +76,32 @@ def build_and_train(env_id="JunctionEnv-v0", run_ID=0, cuda_idx=None,
                                    'kernel_sizes': args.filters,
                                    'paddings': args.paddings,
                                    'fc_sizes': args.fcs,
-                                   'strides': args.strides})
-    runner = MinibatchRlEval(
+                                   'strides': args.strides},
+                     factorized=args.factorized,
+                     inference_export=args.inference_export,
+                     logits=args.logits)
+    runner = Runner(
         algo=algo,
         agent=agent,
         sampler=sampler,
         n_steps=args.n_steps,
         log_interval_steps=5e2,
         affinity=affinity,
+        **runner_kwargs
     )
 
 
-    config = dict(env_id=env_id, lr=args.lr,
+    config = dict(env_id=env_id, lr=args.lr, target_kl=args.target_kl,
+                  microbatch_size=args.microbatch_size,
                   debug=False,
                   network=args.network, fcs=str(args.fcs),
                   filters=args.filters,
                   n_steps=args.n_steps, strides=str(args.strides),
-                  channels=str(args.channels), paddings=str(args.paddings))
+                  channels=str(args.channels), paddings=str(args.paddings),
+                  factorized=args.factorized, compact_obs=args.compact_obs,
+                  inference_export=args.inference_export,
+                  step_ahead=args.step_ahead, logits=args.logits,
+                  max_policy_lag=args.max_policy_lag)
 
     str_fc = "_".join([str(x) for x in args.fcs])
     name = (f"{args.folder}_{args.network}_lr={args.lr}_filters="
@@ -88,6 +120,11 @@ if __name__ == "__main__":
                         default='JunctionExperiment')
     parser.add_argument('--env_id', help='Gym', default='JunctionEnv-v0')
     parser.add_argument('--lr', help='Learning rate', default=0.001, type=float)
+    parser.add_argument('--target_kl', help='stop epochs early above this '
+                        'approximate KL', default=None, type=float)
+    parser.add_argument('--microbatch_size', help='accumulate gradients '
+                        'over chunks of this many samples per minibatch',
+                        default=None, type=int)
     parser.add_argument('--network', help='network type',
                         default='equivariant', type=str)
     parser.add_argument('--fcs', type=int, nargs='+', default=[256])
@@ -95,6 +132,21 @@ if __name__ == "__main__":
     parser.add_argument('--filters',  type=int, nargs='+', default=[7, 5])
     parser.add_argument('--strides', type=int, nargs='+', default=[2, 1])
     parser.add_argument('--paddings', type=int, nargs='+', default=[0, 0])
+    parser.add_argument('--factorized', help='factorize joint action '
+                        'distribution over agents', action='store_true')
+    parser.add_argument('--compact_obs', help='store grid observations as '
+                        'uint8 in sample buffers', action='store_true')
+    parser.add_argument('--inference_export', help='sample with a frozen '
+                        'export of the model', action='store_true')
+    parser.add_argument('--logits', help='model outputs log-probabilities, '
+                        'used by all distribution methods',
+                        action='store_true')
+    parser.add_argument('--step_ahead', help='reuse the first step of the '
+                        'next batch for the bootstrap value',
+                        action='store_true')
+    parser.add_argument('--max_policy_lag', help='1: cpu workers sample the '
+                        'next batch while the learner optimizes', type=int,
+                        default=0, choices=[0, 1])
     parser.add_argument('--run_ID', help='run identifier (logging)', type=int,
                         default=0)
     parser.add_argument('--n_steps', type=int, default=3e5)
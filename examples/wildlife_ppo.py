@@ -1,16 +1,62 @@
+import os
+
+import torch
+
 from rlpyt.samplers.serial.sampler import SerialSampler
-from rlpyt.samplers.parallel.cpu.sampler import CpuSampler
-from rlpyt.samplers.parallel.gpu.sampler import GpuSampler
+from rlpyt.samplers.parallel.cpu.sampler import (CpuSampler,
+    PipelinedCpuSampler)
+from rlpyt.samplers.parallel.cpu.collectors import (
+    CpuStepAheadResetCollector, VecCpuResetCollector,
+    VecCpuStepAheadResetCollector, VecCpuEvalCollector)
+from rlpyt.samplers.parallel.gpu.collectors import (VecGpuResetCollector,
+    VecGpuEvalCollector)
+from rlpyt.samplers.serial.collectors import (SerialEvalCollector,
+    VecSerialEvalCollector)
+from rlpyt.samplers.eval_service import EvalService
+from rlpyt.samplers.parallel.gpu.sampler import GpuSampler, GpuStepAheadSampler
 from rlpyt.samplers.parallel.gpu.alternating_sampler import AlternatingSampler
 from rlpyt.envs.gym import make as gym_make
 from rlpyt.algos.pg.ppo import PPO
 from rlpyt.algos.pg.mappo import MAPPO
+from rlpyt.algos.pg.multi_seed import MultiSeedMAPPO
+from rlpyt.agents.multi_seed import MultiSeedAgent
+from rlpyt.agents.pg.decentralized import DecentralizedRuntime
+from rlpyt.samplers.multi_seed import MultiSeedSampler
 from rlpyt.runners.minibatch_rl import MinibatchRlEval
+from rlpyt.runners.pipelined_rl import PipelinedRlEval
+from rlpyt.runners.multi_seed import MinibatchRlMultiSeed
+from rlpyt.runners.background_eval import (MinibatchRlBackgroundEval,
+    PipelinedRlBackgroundEval)
 from rlpyt.utils.logging.context import logger_context
+from rlpyt.utils.logging import logger
 
 from ops import get_agent_cls_wildlife
 
 
+def run_decentralized(agent, env_kwargs, n_steps):
+    """Run the trained policy with one process per agent (each encoding its
+    own view and exchanging messages with its neighbours), logging the mean
+    reward per step."""
+    env = gym_make(**env_kwargs)
+    observation = env.reset()
+    model_kwargs = dict(agent.env_model_kwargs, **agent.model_kwargs)
+    state_dict = {k: v.cpu() for k, v in agent.model.state_dict().items()}
+    runtime = DecentralizedRuntime(agent.ModelCls, model_kwargs, state_dict,
+        agent.model.n_agents, observation.shape, obs_dtype=observation.dtype)
+    total_reward = 0.
+    for _ in range(n_steps):
+        locs = agent.model.extract_locs(torch.as_tensor(observation))
+        action = runtime.step(*runtime.local_views(observation, locs.cpu()))
+        observation, reward, done, _info = env.step(action)
+        total_reward += reward
+        if done:
+            observation = env.reset()
+    runtime.shutdown()
+    logger.log(f"Decentralized execution: {n_steps} steps, mean reward "
+               f"{total_reward / n_steps:.4f}, {runtime.message_nbytes} B "
+               "message per agent per step.")
+
+
 def build_and_train(env_id="WildlifeEnv-v0", run_ID=0, cuda_idx=None,
                     sample_mode="serial", n_parallel=2, args={}):
     affinity = dict(cuda_idx=cuda_idx, workers_cpus=list(range(n_parallel)))
@@ -32,9 +78,43 @@ def build_and_train(env_id="WildlifeEnv-v0", run_ID=0, cuda_idx=None,
         affinity["alternating"] = True  # Sampler will check for this.
         print(f"Using Alternating GPU parallel sampler, {gpu_cpu} for "
               "sampling and optimizing.")
+    sampler_kwargs = dict()
+    if args.step_ahead:  # Bootstrap value from next batch's first step.
+        if sample_mode == "gpu":
+            Sampler = GpuStepAheadSampler
+        elif sample_mode == "alternating":
+            raise ValueError("step_ahead not supported by alternating sampler.")
+        else:
+            sampler_kwargs["CollectorCls"] = CpuStepAheadResetCollector
+    if args.vec_env:  # Step each sampler's envs together (see VecEnv).
+        if sample_mode == "alternating":
+            raise ValueError("vec_env not supported by alternating sampler.")
+        elif sample_mode == "gpu":
+            sampler_kwargs["CollectorCls"] = VecGpuResetCollector
+            sampler_kwargs["eval_CollectorCls"] = VecGpuEvalCollector
+        else:
+            sampler_kwargs["CollectorCls"] = (VecCpuStepAheadResetCollector
+                if args.step_ahead else VecCpuResetCollector)
+            sampler_kwargs["eval_CollectorCls"] = (VecSerialEvalCollector
+                if sample_mode == "serial" else VecCpuEvalCollector)
+    runner_kwargs = dict()
+    Runner = MinibatchRlEval
+    if args.max_policy_lag > 0:  # Sample next batch while optimizing.
+        if sample_mode != "cpu":
+            raise ValueError("max_policy_lag needs the cpu sampler.")
+        Sampler, Runner = PipelinedCpuSampler, PipelinedRlEval
+        runner_kwargs["max_policy_lag"] = args.max_policy_lag
 
-    env_kwargs = dict(id=env_id, n_agents=args.n_agents, w=args.grid_size,
-                      h=args.grid_size)
+    env_kwargs = dict(id=env_id, n_agents=args.agent_counts or args.n_agents,
+                      w=args.grid_size,
+                      h=args.grid_size,
+                      obs_dtype="uint8" if args.compact_obs else None)
+    # Pool: decorrelate envs in n_parallel processes.  Snapshot: restore
+    # decorrelated envs saved by an earlier run with this env config.
+    sampler_kwargs["decorrelation_mode"] = args.decorrelation
+    sampler_kwargs["decorrelation_kwargs"] = dict(n_workers=n_parallel,
+        path=os.path.join(args.decorrelation_dir, "_".join(
+            f"{k}={v}" for k, v in env_kwargs.items())))
 
     sampler = Sampler(
         EnvCls=gym_make,
@@ -43,38 +123,84 @@ def build_and_train(env_id="WildlifeEnv-v0", run_ID=0, cuda_idx=None,
         batch_T=5,  # 5 time-steps per sampler iteration.
         batch_B=16,  # 16 parallel environments.
         max_decorrelation_steps=400,
-        eval_n_envs=25,
-        eval_max_steps=12500
+        eval_n_envs=0 if args.background_eval else 25,
+        eval_max_steps=12500,
+        **sampler_kwargs
     )
+    if args.background_eval:  # Evaluate in other processes, not pausing.
+        runner_kwargs["eval_service"] = EvalService(
+            EnvCls=gym_make,
+            env_kwargs=env_kwargs,
+            n_envs=25,
+            max_steps=12500,
+            n_workers=args.background_eval,
+            eval_CollectorCls=(VecSerialEvalCollector if args.vec_env else
+                SerialEvalCollector),
+        )
+        Runner = (PipelinedRlBackgroundEval if Runner is PipelinedRlEval else
+            MinibatchRlBackgroundEval)
 
-    algo = MAPPO(learning_rate=args.lr)
+    algo = MAPPO(learning_rate=args.lr, target_kl=args.target_kl,
+                 microbatch_size=args.microbatch_size)
 
     agentCls, agent_basis = get_agent_cls_wildlife(args.network)
 
-    agent = agentCls(model_kwargs={'basis': agent_basis,
-                                   'channels': args.channels,
-                                   'kernel_sizes': args.filters,
-                                   'paddings': args.paddings,
-                                   'fc_sizes': args.fcs,
-                                   'strides': args.strides,
-                                   'n_agents': args.n_agents})
-    runner = MinibatchRlEval(
+    agent_kwargs = dict(model_kwargs={'basis': agent_basis,
+                                      'channels': args.channels,
+                                      'kernel_sizes': args.filters,
+                                      'paddings': args.paddings,
+                                      'fc_sizes': args.fcs,
+                                      'strides': args.strides,
+                                      'n_agents': args.n_agents,
+                                      'agent_counts': args.agent_counts,
+                                      'neighbours': args.neighbours,
+                                      'neighbour_radius':
+                                          args.neighbour_radius},
+                        factorized=args.factorized,
+                        inference_export=args.inference_export,
+                        logits=args.logits)
+    agent = agentCls(**agent_kwargs)
+    if args.decentralized_steps and (args.neighbours is None or
+            args.n_seeds > 1):
+        raise ValueError("decentralized_steps needs neighbours and one seed.")
+    if args.n_seeds > 1:  # Train n_seeds stacked models in this process.
+        if sample_mode != "serial":
+            raise ValueError("n_seeds needs the serial sampler.")
+        if args.background_eval:
+            raise ValueError("background_eval not supported with n_seeds.")
+        agent = MultiSeedAgent(agentCls, agent_kwargs, args.n_seeds)
+        sampler = MultiSeedSampler(sampler, args.n_seeds)
+        algo = MultiSeedMAPPO(learning_rate=args.lr, target_kl=args.target_kl,
+                              microbatch_size=args.microbatch_size)
+        Runner = MinibatchRlMultiSeed  # (Logs training trajectories.)
+    runner = Runner(
         algo=algo,
         agent=agent,
         sampler=sampler,
         n_steps=args.n_steps,
         log_interval_steps=5e2,
         affinity=affinity,
+        **runner_kwargs
     )
 
 
-    config = dict(env_id=env_id, lr=args.lr,
+    config = dict(env_id=env_id, lr=args.lr, target_kl=args.target_kl,
+                  microbatch_size=args.microbatch_size,
                   debug=False,
                   network=args.network, fcs=str(args.fcs),
                   grid_size=args.grid_size, filters=args.filters,
-                  n_agents=args.n_agents,
+                  n_agents=args.n_agents, agent_counts=args.agent_counts,
+                  neighbours=args.neighbours,
+                  neighbour_radius=args.neighbour_radius,
                   n_steps=args.n_steps, strides=str(args.strides),
-                  channels=str(args.channels), paddings=str(args.paddings))
+                  channels=str(args.channels), paddings=str(args.paddings),
+                  factorized=args.factorized, compact_obs=args.compact_obs,
+                  inference_export=args.inference_export,
+                  step_ahead=args.step_ahead, vec_env=args.vec_env,
+                  logits=args.logits,
+                  max_policy_lag=args.max_policy_lag, n_seeds=args.n_seeds,
+                  decorrelation=args.decorrelation,
+                  background_eval=args.background_eval)
 
     str_fc = "_".join([str(x) for x in args.fcs])
     name = (f"{args.folder}_{args.network}_nagents={args.n_agents}_"
@@ -84,6 +210,8 @@ def build_and_train(env_id="WildlifeEnv-v0", run_ID=0, cuda_idx=None,
     # Use same string for name and log_dir
     with logger_context(name, run_ID, name, config):
         runner.train()
+        if args.decentralized_steps:
+            run_decentralized(agent, env_kwargs, args.decentralized_steps)
 
 
 if __name__ == "__main__":
@@ -94,8 +222,22 @@ if __name__ == "__main__":
                         default='WildlifeExperiment')
     parser.add_argument('--env_id', help='Gym', default='WildlifeEnv-v0')
     parser.add_argument('--lr', help='Learning rate', default=0.001, type=float)
+    parser.add_argument('--target_kl', help='stop epochs early above this '
+                        'approximate KL', default=None, type=float)
+    parser.add_argument('--microbatch_size', help='accumulate gradients '
+                        'over chunks of this many samples per minibatch',
+                        default=None, type=int)
     parser.add_argument('--n_agents', help='Number of agents', default=3,
                         type=int)
+    parser.add_argument('--agent_counts', help='team sizes to train on '
+                        'together (padded, overrides n_agents)', type=int,
+                        nargs='+', default=None)
+    parser.add_argument('--neighbours', help='communicate with k nearest '
+                        'agents only, by message passing (default: all; '
+                        'not with the equivariant network)', type=int,
+                        default=None)
+    parser.add_argument('--neighbour_radius', help='and only within this '
+                        'distance', type=float, default=None)
     parser.add_argument('--grid_size', help='height&width of grid',
                         default=21, type=int)
     parser.add_argument('--network', help='network type',
@@ -105,6 +247,40 @@ if __name__ == "__main__":
     parser.add_argument('--filters',  type=int, nargs='+', default=[7, 5])
     parser.add_argument('--strides', type=int, nargs='+', default=[2, 1])
     parser.add_argument('--paddings', type=int, nargs='+', default=[0, 0])
+    parser.add_argument('--factorized', help='factorize joint action '
+                        'distribution over agents', action='store_true')
+    parser.add_argument('--compact_obs', help='store grid observations as '
+                        'uint8 in sample buffers', action='store_true')
+    parser.add_argument('--inference_export', help='sample with a frozen '
+                        'export of the model', action='store_true')
+    parser.add_argument('--logits', help='model outputs log-probabilities, '
+                        'used by all distribution methods',
+                        action='store_true')
+    parser.add_argument('--step_ahead', help='reuse the first step of the '
+                        'next batch for the bootstrap value',
+                        action='store_true')
+    parser.add_argument('--vec_env', help='step all envs of a sampler '
+                        'together, writing whole batch slices',
+                        action='store_true')
+    parser.add_argument('--decorrelation', help='decorrelate envs at '
+                        'startup one after another, in a process pool, or '
+                        'from a snapshot', default='serial',
+                        choices=['serial', 'pool', 'snapshot'])
+    parser.add_argument('--decorrelation_dir', help='folder of decorrelated '
+                        'env snapshots', default='decorrelated_envs')
+    parser.add_argument('--max_policy_lag', help='1: cpu workers sample the '
+                        'next batch while the learner optimizes', type=int,
+                        default=0, choices=[0, 1])
+    parser.add_argument('--n_seeds', help='train this many seeds at once '
+                        'as one stacked model (serial sampler only)',
+                        type=int, default=1)
+    parser.add_argument('--background_eval', help='evaluate weight '
+                        'snapshots in this many processes while training '
+                        'continues (0: pause training to evaluate)',
+                        type=int, default=0)
+    parser.add_argument('--decentralized_steps', help='after training, run '
+                        'the policy for this many steps with one process '
+                        'per agent (needs neighbours)', type=int, default=0)
     parser.add_argument('--run_ID', help='run identifier (logging)', type=int,
                         default=0)
     parser.add_argument('--n_steps', type=int, default=3e5)
@@ -1,7 +1,6 @@
 import multiprocessing as mp
 import torch
 from torch.nn.parallel import DistributedDataParallel as DDP
-from torch.nn.parallel import DistributedDataParallelCPU as DDPC
 
 from rlpyt.utils.quick_args import save__init__args
 from rlpyt.utils.collections import namedarraytuple
@@ -57,6 +56,13 @@ class BaseAgent:
     def make_env_to_model_kwargs(self, env_spaces):
         return {}
 
+    @property
+    def model_input_fields(self):
+        """AgentInputs fields consumed by the model.  A model class can declare
+        e.g. ``agent_input_fields = ("observation",)`` so unused inputs are
+        neither converted nor moved to device (passed as None instead)."""
+        return getattr(self.ModelCls, "agent_input_fields", AgentInputs._fields)
+
     def to_device(self, cuda_idx=None):
         """Overwite/extend for format other than 'self.model' for network(s)."""
         if cuda_idx is None:
@@ -69,15 +75,18 @@ class BaseAgent:
         self.model.to(self.device)
         logger.log(f"Initialized agent model on device: {self.device}.")
 
-    def data_parallel(self):
+    def data_parallel(self, bucket_cap_mb=25):
         """Overwrite/extend for format other than 'self.model' for network(s)
-        which will have gradients through them."""
+        which will have gradients through them.  Gradients are all-reduced
+        in buckets of ``bucket_cap_mb`` during backward (gloo on CPU)."""
         if self.device.type == "cpu":
-            self.model = DDPC(self.model)
-            logger.log("Initialized DistributedDataParallelCPU agent model.")
+            self.model = DDP(self.model, bucket_cap_mb=bucket_cap_mb)
+            logger.log("Initialized DistributedDataParallel agent model on "
+                "CPU.")
         else:
             self.model = DDP(self.model,
-                device_ids=[self.device.index], output_device=self.device.index)
+                device_ids=[self.device.index], output_device=self.device.index,
+                bucket_cap_mb=bucket_cap_mb)
             logger.log("Initialized DistributedDataParallel agent model on "
                 f"device {self.device}.")
 
@@ -163,6 +172,8 @@ class BaseAgent:
 
 AgentInputsRnn = namedarraytuple("AgentInputsRnn",  # Training only.
     ["observation", "prev_action", "prev_reward", "init_rnn_state"])
+AgentInputsLocs = namedarraytuple("AgentInputsLocs",  # Training only.
+    ["observation", "prev_action", "prev_reward", "locs"])
 
 
 class RecurrentAgentMixin:
@@ -0,0 +1,76 @@
+
+from rlpyt.models.stacked import StackedModels
+
+
+class MultiSeedAgent:
+    """N independent agents ``AgentCls(**agent_kwargs)``, one per seed, to
+    train N seeds of an experiment in one process (with MultiSeedSampler,
+    MultiSeedMAPPO and MinibatchRlMultiSeed).  Each seed agent is initialized by its own sampler
+    and samples with its own model.  For training, their models are stacked
+    into ``model`` (StackedModels), whose parameters the optimizer updates;
+    sync_models() copies them back into the seed agents."""
+
+    def __init__(self, AgentCls, agent_kwargs, n_seeds):
+        self.agents = [AgentCls(**agent_kwargs) for _ in range(n_seeds)]
+        self.n_seeds = n_seeds
+        self.model = None
+
+    def to_device(self, cuda_idx=None):
+        for agent in self.agents:
+            agent.to_device(cuda_idx)
+        self.model = StackedModels([agent.model for agent in self.agents])
+        self.model.to(self.device)
+
+    def sync_models(self):
+        """New weights in the seed agents, if trained."""
+        if self.model is not None:
+            self.model.copy_to_models()
+
+    def parameters(self):
+        return self.model.parameters()
+
+    def state_dict(self):
+        self.sync_models()
+        return [agent.state_dict() for agent in self.agents]
+
+    def load_state_dict(self, state_dicts):
+        for agent, state_dict in zip(self.agents, state_dicts):
+            agent.load_state_dict(state_dict)
+        if self.model is not None:
+            self.model.copy_from_models()
+
+    def train_mode(self, itr):
+        for agent in self.agents:
+            agent.train_mode(itr)
+        self.model.train()
+
+    def sample_mode(self, itr):
+        for agent in self.agents:
+            agent.sample_mode(itr)
+        if self.model is not None:
+            self.model.eval()
+
+    def eval_mode(self, itr):
+        for agent in self.agents:
+            agent.eval_mode(itr)
+        if self.model is not None:
+            self.model.eval()
+
+    def sync_shared_memory(self):
+        pass  # Seed agents sample in this process.
+
+    @property
+    def device(self):
+        return self.agents[0].device
+
+    @property
+    def distribution(self):
+        return self.agents[0].distribution
+
+    @property
+    def recurrent(self):
+        return self.agents[0].recurrent
+
+    @property
+    def model_input_fields(self):
+        return self.agents[0].model_input_fields
@@ -4,4 +4,6 @@ from rlpyt.utils.collections import namedarraytuple
 AgentInfo = namedarraytuple("AgentInfo", ["dist_info", "value"])
 AgentInfoRnn = namedarraytuple("AgentInfoRnn",
     ["dist_info", "value", "prev_rnn_state"])
+AgentInfoLocs = namedarraytuple("AgentInfoLocs",
+    ["dist_info", "value", "locs"])
 
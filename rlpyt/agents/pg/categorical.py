@@ -3,26 +3,57 @@ import torch
 
 from rlpyt.agents.base import (AgentStep, BaseAgent, RecurrentAgentMixin,
     AlternatingRecurrentAgentMixin)
-from rlpyt.agents.pg.base import AgentInfo, AgentInfoRnn
-from rlpyt.distributions.categorical import Categorical, DistInfo
+from rlpyt.agents.pg.base import AgentInfo, AgentInfoRnn, AgentInfoLocs
+from rlpyt.distributions.categorical import (Categorical, DistInfo,
+    DistInfoLogits)
 from rlpyt.distributions.multicategorical import MultiCategorical
+from rlpyt.distributions.factorized import FactorizedCategorical
+from rlpyt.models.inference import InferenceExport
 from rlpyt.utils.buffer import buffer_to, buffer_func, buffer_method
 
+LOCS_DTYPE = torch.int16  # Grid coordinates, stored in agent_info.
+
 
 class CategoricalPgAgent(BaseAgent):
 
-    def __call__(self, observation, prev_action, prev_reward):
-        prev_action = self.distribution.to_onehot(prev_action)
-        model_inputs = buffer_to((observation, prev_action, prev_reward),
-            device=self.device)
-        pi, value = self.model(*model_inputs)
-        return buffer_to((DistInfo(prob=pi), value), device="cpu")
+    def __init__(self, factorized=False, inference_export=False, logits=False,
+            **kwargs):
+        """With ``factorized=True`` the joint action distribution is a product
+        of per-agent categoricals, so nothing of size n_actions**n_agents is
+        built (model must output per-agent probabilities).  With
+        ``inference_export=True``, sampling and evaluation use a frozen copy
+        of the model, exported once per weight sync (see
+        ``InferenceExport``), while training keeps the model itself.  With
+        ``logits=True``, the model outputs log-probabilities (built with
+        ``log_softmax=True``) and dist_info is ``DistInfoLogits``."""
+        super().__init__(**kwargs)
+        self.factorized = factorized
+        self.inference_export = inference_export
+        self.logits = logits
+        if logits:
+            self.model_kwargs = dict(self.model_kwargs, log_softmax=True)
+        self._inference = None
+
+    def __call__(self, observation, prev_action, prev_reward, locs=None):
+        """Training forward; ``locs`` are agent coordinates recorded at
+        sampling time (``agent_info.locs``), if available."""
+        model_inputs = self.model_inputs(observation, prev_action, prev_reward)
+        if locs is None:
+            pi, value = self.model(*model_inputs)
+        else:
+            pi, value = self.model(*model_inputs,
+                locs=locs.to(self.device))
+        return buffer_to((self.dist_info(pi), value), device="cpu")
 
     def initialize(self, env_spaces, share_memory=False,
             global_B=1, env_ranks=None):
         super().initialize(env_spaces, share_memory,
             global_B=global_B, env_ranks=env_ranks)
-        if env_spaces.action.decentralized:
+        if self.factorized:
+            self.distribution = FactorizedCategorical(
+                n_agents=env_spaces.action.n_agents,
+                n_actions=env_spaces.action.n_actions)
+        elif env_spaces.action.decentralized:
             self.distribution = MultiCategorical(dim=env_spaces.action.n_actions**env_spaces.action.n_agents,
                                             n_agents=env_spaces.action.n_agents,
                                             n_actions=env_spaces.action.n_actions)
@@ -33,27 +64,86 @@ class CategoricalPgAgent(BaseAgent):
 
     @torch.no_grad()
     def step(self, observation, prev_action, prev_reward):
-        prev_action = self.distribution.to_onehot(prev_action)
-        model_inputs = buffer_to((observation, prev_action, prev_reward),
-            device=self.device)
-        pi, value = self.model(*model_inputs)
-        dist_info = DistInfo(prob=pi)
+        model_inputs = self.model_inputs(observation, prev_action, prev_reward)
+        locs = self.extract_locs(model_inputs[0])
+        model = self.inference_model
+        if locs is None:
+            pi, value = model(*model_inputs)
+        else:
+            pi, value = model(*model_inputs, locs=locs)
+        dist_info = self.dist_info(pi)
         #print("pi", pi.shape)
         #print("distinfo", dist_info.prob.shape)
         action = self.distribution.sample(dist_info)
-        agent_info = AgentInfo(dist_info=dist_info, value=value)
+        if locs is None:
+            agent_info = AgentInfo(dist_info=dist_info, value=value)
+        else:  # Recorded once here, reused by every training pass.
+            agent_info = AgentInfoLocs(dist_info=dist_info, value=value,
+                locs=locs.type(LOCS_DTYPE))
         #print("aginfo", agent_info.dist_info.prob.shape)
         action, agent_info = buffer_to((action, agent_info), device="cpu")
         return AgentStep(action=action, agent_info=agent_info)
 
     @torch.no_grad()
     def value(self, observation, prev_action, prev_reward):
-        prev_action = self.distribution.to_onehot(prev_action)
-        model_inputs = buffer_to((observation, prev_action, prev_reward),
-            device=self.device)
-        _pi, value = self.model(*model_inputs)
+        model_inputs = self.model_inputs(observation, prev_action, prev_reward)
+        locs = self.extract_locs(model_inputs[0])  # Not traced, as in step().
+        model = self.inference_model
+        if locs is None:
+            _pi, value = model(*model_inputs)
+        else:
+            _pi, value = model(*model_inputs, locs=locs)
         return value.to("cpu")
 
+    @property
+    def inference_model(self):
+        """Model used in step() and value()."""
+        return self.model if self._inference is None else self._inference
+
+    def train_mode(self, itr):
+        super().train_mode(itr)
+        self._inference = None
+
+    def sample_mode(self, itr):
+        super().sample_mode(itr)
+        self.export_inference()
+
+    def eval_mode(self, itr):
+        super().eval_mode(itr)
+        self.export_inference()
+
+    def recv_shared_memory(self):
+        recv_count = self._recv_count
+        super().recv_shared_memory()
+        if self._recv_count != recv_count:  # New weights.
+            self.export_inference()
+
+    def export_inference(self):
+        """Re-export from current weights (traced lazily, per input shape)."""
+        if self.inference_export:
+            self._inference = InferenceExport(self.model)
+
+    def dist_info(self, pi):
+        return DistInfoLogits(logits=pi) if self.logits else DistInfo(prob=pi)
+
+    def model_inputs(self, observation, prev_action, prev_reward):
+        """One-hot prev_action and move inputs to device, skipping any the
+        model does not consume (see ``model_input_fields``)."""
+        fields = self.model_input_fields
+        prev_action = (self.distribution.to_onehot(prev_action)
+            if "prev_action" in fields else None)
+        prev_reward = prev_reward if "prev_reward" in fields else None
+        return buffer_to((observation, prev_action, prev_reward),
+            device=self.device)
+
+    def extract_locs(self, observation):
+        """Agent coordinates from the observation, or None if the model does
+        not provide ``extract_locs()``."""
+        model = getattr(self.model, "module", self.model)  # Unwrap DDP.
+        if not hasattr(model, "extract_locs"):
+            return None
+        return model.extract_locs(observation)
+
 
 class RecurrentCategoricalPgAgentBase(BaseAgent):
 
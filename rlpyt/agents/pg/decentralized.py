@@ -0,0 +1,125 @@
+import multiprocessing as mp
+
+import numpy as np
+import torch
+
+from rlpyt.models.pg.neighbourhood import knn_neighbours
+from rlpyt.utils.buffer import np_mp_array
+from rlpyt.utils.collections import AttrDict
+from rlpyt.samplers.parallel.worker import initialize_worker
+from rlpyt.utils.seed import make_seed
+
+
+class DecentralizedRuntime:
+    """Executes a trained team policy with one process per agent, each
+    running only its own part of the model's message passing (a model with
+    ``message_passing``, a NeighbourhoodNetwork, e.g. WildlifeGraphModel
+    with ``neighbours``).  Each step, every agent encodes its own view (its
+    observation channel) into its state and publishes the state and its
+    location on a shared-memory message board; after that round, it reads
+    the states of its k nearest neighbours (within the radius), computes
+    their messages, and acts from its state and their mean.  So per agent
+    and step: one encoding and k messages, against n encodings and n*k
+    messages for the centralized forward, with the same actions (same
+    neighbours and ties).  The driver (e.g. an env loop) hands out the local
+    views and collects the actions.  Each agent process has its own seed
+    (``seed`` + rank), so sampled actions are independent."""
+
+    def __init__(self, ModelCls, model_kwargs, state_dict, n_agents, obs_shape,
+            obs_dtype=np.uint8, greedy=False, cpus=None, seed=None):
+        """``obs_shape`` is the team observation [n_agents+1,H,W] (location
+        grid last).  ``cpus``: one (list of) cpu(s) per agent process."""
+        model = ModelCls(**model_kwargs)
+        model.load_state_dict(state_dict)
+        network = getattr(model, "message_passing", None)
+        if network is None:
+            raise ValueError("DecentralizedRuntime needs a model with "
+                "per-agent message passing (message_passing), e.g. "
+                "WildlifeGraphModel with neighbours.")
+        network.eval()
+        seed = make_seed() if seed is None else seed
+        self.n_agents = n_agents
+        self.obs_shape = obs_shape
+        state_size = network.encoder.output_size
+        self.board = AttrDict(
+            views=np_mp_array((n_agents,) + tuple(obs_shape[1:]),
+                obs_dtype),  # Sensors.
+            own_locs=np_mp_array((n_agents, 2), np.int16),
+            states=np_mp_array((n_agents, state_size), np.float32),
+            locs=np_mp_array((n_agents, 2), np.int16),
+            actions=np_mp_array((n_agents,), np.int64),
+        )
+        self.ctrl = AttrDict(
+            quit=mp.RawValue("b", False),
+            barrier_step=mp.Barrier(n_agents + 1),  # Agents and driver.
+            barrier_msg=mp.Barrier(n_agents),  # Agents only.
+        )
+        self.procs = [mp.Process(target=agent_process, kwargs=dict(
+            rank=rank, network=network, k=model.neighbours,
+            radius=model.neighbour_radius, board=self.board, ctrl=self.ctrl,
+            greedy=greedy, cpu=None if cpus is None else cpus[rank],
+            seed=seed + rank))
+            for rank in range(n_agents)]
+        for p in self.procs:
+            p.start()
+
+    @property
+    def message_nbytes(self):
+        """Bytes each agent publishes per step (its state and location)."""
+        return self.board.states[0].nbytes + self.board.locs[0].nbytes
+
+    def step(self, views, locs):
+        """One decision round; ``views[i]`` and ``locs[i]`` are what agent i
+        senses.  Returns the agents' actions [n_agents]."""
+        self.board.views[:] = views
+        self.board.own_locs[:] = locs
+        self.ctrl.barrier_step.wait()  # Start of round.
+        self.ctrl.barrier_step.wait()  # Actions written.
+        return self.board.actions.copy()
+
+    def local_views(self, observation, locs):
+        """Split a team observation into the agents' views (for simulation)."""
+        return np.asarray(observation)[:-1], np.asarray(locs)
+
+    def shutdown(self):
+        self.ctrl.quit.value = True
+        self.ctrl.barrier_step.wait()
+        for p in self.procs:
+            p.join()
+
+
+def agent_act(network, rank, state, states, locs, k, radius=None):
+    """Agent ``rank``'s policy logits [A], from its own state [S], the
+    published states [n,S] and locations [n,2] (read for its neighbours
+    only)."""
+    neighbours, valid = knn_neighbours(locs.unsqueeze(0), k, radius)
+    neighbours = neighbours[0, rank][valid[0, rank]]
+    if len(neighbours) > 0:
+        message = network.message(states[neighbours],
+            locs[neighbours] - locs[rank]).mean(dim=0)
+    else:
+        message = torch.zeros_like(state)
+    logits, _value = network.act(state.unsqueeze(0), message.unsqueeze(0))
+    return logits[0]
+
+
+def agent_process(rank, network, k, radius, board, ctrl, greedy=False,
+        cpu=None, seed=None):
+    initialize_worker(rank, seed, cpu, torch_threads=1)
+    states = torch.from_numpy(board.states)
+    locs = torch.from_numpy(board.locs)
+    while True:
+        ctrl.barrier_step.wait()
+        if ctrl.quit.value:
+            break
+        with torch.no_grad():
+            view = torch.from_numpy(board.views[rank]).type(torch.float)
+            state = network.encode(view.unsqueeze(0))[0]
+            states[rank] = state  # Publish own message.
+            board.locs[rank] = board.own_locs[rank]
+            ctrl.barrier_msg.wait()  # All messages published.
+            logits = agent_act(network, rank, state, states, locs.long(), k,
+                radius)
+        board.actions[rank] = (logits.argmax() if greedy else
+            torch.multinomial(logits.softmax(dim=-1), num_samples=1)[0]).item()
+        ctrl.barrier_step.wait()  # Round done (board rewritten after).
@@ -8,8 +8,9 @@ class WildlifeMixin:
     def make_env_to_model_kwargs(self, env_spaces):
         """Get args for model from environment."""
         im_shape = env_spaces.observation.shape
+        im_shape = getattr(im_shape, "grid", im_shape)  # Padded agents.
         im_shp = (env_spaces.action.n_agents,)+im_shape[1:]
-        if env_spaces.action.decentralized:
+        if env_spaces.action.decentralized or self.factorized:
             out = env_spaces.action.n_actions*env_spaces.action.n_agents
         else:
             out = env_spaces.action.n_actions**env_spaces.action.n_agents
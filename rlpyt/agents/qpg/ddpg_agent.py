@@ -1,7 +1,6 @@
 
 import torch
 from torch.nn.parallel import DistributedDataParallel as DDP
-from torch.nn.parallel import DistributedDataParallelCPU as DDPC
 
 from rlpyt.agents.base import BaseAgent, AgentStep
 from rlpyt.utils.quick_args import save__init__args
@@ -65,12 +64,9 @@ class DdpgAgent(BaseAgent):
         self.q_model.to(self.device)
         self.target_q_model.to(self.device)
 
-    def data_parallel(self):
-        super().data_parallel()  # Takes care of self.model.
-        if self.device.type == "cpu":
-            self.q_model = DDPC(self.q_model)
-        else:
-            self.q_model = DDP(self.q_model)
+    def data_parallel(self, bucket_cap_mb=25):
+        super().data_parallel(bucket_cap_mb)  # Takes care of self.model.
+        self.q_model = DDP(self.q_model, bucket_cap_mb=bucket_cap_mb)
 
     def make_env_to_model_kwargs(self, env_spaces):
         assert len(env_spaces.action.shape) == 1
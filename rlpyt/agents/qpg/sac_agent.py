@@ -3,7 +3,6 @@ import numpy as np
 import torch
 from collections import namedtuple
 from torch.nn.parallel import DistributedDataParallel as DDP
-from torch.nn.parallel import DistributedDataParallelCPU as DDPC
 
 from rlpyt.agents.base import BaseAgent, AgentStep
 from rlpyt.models.qpg.mlp import QofMuMlpModel, PiMlpModel
@@ -78,11 +77,10 @@ class SacAgent(BaseAgent):
         self.target_q1_model.to(self.device)
         self.target_q2_model.to(self.device)
 
-    def data_parallel(self):
-        super().data_parallel
-        DDP_WRAP = DDPC if self.device.type == "cpu" else DDP
-        self.q1_model = DDP_WRAP(self.q1_model)
-        self.q2_model = DDP_WRAP(self.q2_model)
+    def data_parallel(self, bucket_cap_mb=25):
+        super().data_parallel(bucket_cap_mb)
+        self.q1_model = DDP(self.q1_model, bucket_cap_mb=bucket_cap_mb)
+        self.q2_model = DDP(self.q2_model, bucket_cap_mb=bucket_cap_mb)
 
     def give_min_itr_learn(self, min_itr_learn):
         self.min_itr_learn = min_itr_learn  # From algo.
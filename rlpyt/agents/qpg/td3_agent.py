@@ -1,6 +1,5 @@
 
 from torch.nn.parallel import DistributedDataParallel as DDP
-from torch.nn.parallel import DistributedDataParallelCPU as DDPC
 
 from rlpyt.agents.qpg.ddpg_agent import DdpgAgent
 from rlpyt.utils.buffer import buffer_to
@@ -46,12 +45,9 @@ class Td3Agent(DdpgAgent):
         self.q2_model.to(self.device)
         self.target_q2_model.to(self.device)
 
-    def data_parallel(self):
-        super().data_parallel()
-        if self.device.type == "cpu":
-            self.q2_model = DDPC(self.q2_model)
-        else:
-            self.q2_model = DDP(self.q2_model)
+    def data_parallel(self, bucket_cap_mb=25):
+        super().data_parallel(bucket_cap_mb)
+        self.q2_model = DDP(self.q2_model, bucket_cap_mb=bucket_cap_mb)
 
     def give_min_itr_learn(self, min_itr_learn):
         self.min_itr_learn = min_itr_learn  # From algo.
@@ -1,9 +1,15 @@
 
-# import torch
+import torch
+import torch.distributed
 from collections import namedtuple
 
 from rlpyt.algos.base import RlAlgorithm
+from rlpyt.agents.base import AgentInputs, AgentInputsLocs
+from rlpyt.utils.buffer import buffer_func, buffer_to
+from rlpyt.utils.collections import namedarraytuple
+from rlpyt.utils.misc import iterate_mb_idxs
 from rlpyt.algos.utils import (discount_return, generalized_advantage_estimation,
+    discount_return_scan, generalized_advantage_estimation_scan,
     valid_from_done)
 
 # Convention: traj_info fields CamelCase, opt_info fields lowerCamelCase
@@ -11,6 +17,59 @@ OptInfo = namedtuple("OptInfo", ["loss", "gradNorm", "entropy", "perplexity",
                                  "value_error", "value", "return_", "adv",
                                  "ratio"])
 AgentTrain = namedtuple("AgentTrain", ["dist_info", "value"])
+LossInputs = namedarraytuple("LossInputs",
+    ["agent_inputs", "action", "return_", "advantage", "valid", "old_dist_info"])
+
+
+class OptInfoAccumulator:
+    """Collects per-minibatch diagnostics as tensors where they are computed,
+    and transfers them to Python floats all at once in ``opt_info()``,
+    instead of an ``.item()`` device sync for every value.  If distributed,
+    values are averaged over ranks (all must append alike)."""
+
+    def __init__(self, OptInfoCls=OptInfo):
+        self.OptInfoCls = OptInfoCls
+        self._values = {f: list() for f in OptInfoCls._fields}
+
+    def append(self, **values):
+        for k, v in values.items():
+            self._values[k].append(v.detach() if torch.is_tensor(v) else v)
+
+    def opt_info(self):
+        """OptInfo of lists, one value per append() (appended tensors of
+        several values are flattened in order)."""
+        opt_info = {k: list(v) for k, v in self._values.items()}
+        groups = dict()  # One transfer per device.
+        for k, v in self._values.items():
+            if len(v) > 0 and torch.is_tensor(v[0]):
+                fields, tensors = groups.setdefault(v[0].device, ([], []))
+                tensors.append(torch.stack(v).reshape(-1).type(torch.float))
+                fields.append((k, len(tensors[-1])))
+        for fields, tensors in groups.values():
+            values = torch.cat(tensors).tolist()
+            start = 0
+            for k, n in fields:
+                opt_info[k] = values[start:start + n]
+                start += n
+        if (torch.distributed.is_available() and
+                torch.distributed.is_initialized()):
+            opt_info = self._mean_over_ranks(opt_info)
+        return self.OptInfoCls(**opt_info)
+
+    @staticmethod
+    def _mean_over_ranks(opt_info):
+        """One all-reduce for all fields."""
+        device = (torch.device("cuda", torch.cuda.current_device())
+            if torch.distributed.get_backend() == "nccl" else "cpu")
+        values = torch.tensor([x for v in opt_info.values() for x in v],
+            dtype=torch.float64, device=device)
+        torch.distributed.all_reduce(values)
+        values = (values / torch.distributed.get_world_size()).tolist()
+        start = 0
+        for k, v in opt_info.items():
+            opt_info[k] = values[start:start + len(v)]
+            start += len(v)
+        return opt_info
 
 
 class PolicyGradientAlgo(RlAlgorithm):
@@ -30,16 +89,64 @@ class PolicyGradientAlgo(RlAlgorithm):
         self.batch_spec = batch_spec
         self.mid_batch_reset = mid_batch_reset
 
+    def iterate_epochs(self, loss_inputs, T, B, init_rnn_state=None):
+        """Yields, for each epoch, an iterator of (loss_inputs,
+        init_rnn_state) minibatches.  If recurrent, uses whole trajectories,
+        only shuffles B.  Else, the [T,B] batch is flattened to [T*B] once,
+        permuted once per epoch, and minibatches are contiguous slices
+        (views) of it, instead of fancy indexing every field for every
+        minibatch."""
+        if init_rnn_state is not None:
+            mb_size = B // self.minibatches
+            for _ in range(self.epochs):
+                yield ((loss_inputs[:, B_idxs], init_rnn_state[B_idxs])
+                    for B_idxs in iterate_mb_idxs(B, mb_size, shuffle=True))
+            return
+        mb_size = T * B // self.minibatches
+        flat_inputs = buffer_func(loss_inputs,
+            lambda x: x.reshape((T * B,) + tuple(x.shape[2:])))
+        for _ in range(self.epochs):
+            yield slice_minibatches(flat_inputs[torch.randperm(T * B)],
+                T * B, mb_size)  # One copy per epoch.
+
+    def build_loss_inputs(self, samples):
+        """LossInputs [T,B] of a batch of samples, model inputs on the
+        agent's device."""
+        fields = self.agent.model_input_fields  # Skip inputs model ignores.
+        agent_inputs = AgentInputs(  # Move inputs to device once, index there.
+            observation=samples.env.observation,
+            prev_action=(samples.agent.prev_action
+                if "prev_action" in fields else None),
+            prev_reward=(samples.env.prev_reward
+                if "prev_reward" in fields else None),
+        )
+        if "locs" in samples.agent.agent_info:  # Recorded by agent.step().
+            agent_inputs = AgentInputsLocs(*agent_inputs,
+                locs=samples.agent.agent_info.locs)
+        agent_inputs = buffer_to(agent_inputs, device=self.agent.device)
+        return_, advantage, valid = self.process_returns(samples)
+        return LossInputs(  # So can slice all.
+            agent_inputs=agent_inputs,
+            action=samples.agent.action,
+            return_=return_,
+            advantage=advantage,
+            valid=valid,
+            old_dist_info=samples.agent.agent_info.dist_info,
+        )
+
     def process_returns(self, samples):
         reward, done, value, bv = (samples.env.reward, samples.env.done,
             samples.agent.agent_info.value, samples.agent.bootstrap_value)
         done = done.type(reward.dtype)
+        vectorized = getattr(self, "vectorized_returns", False)
 
         if self.gae_lambda == 1:  # GAE reduces to empirical discounted.
-            return_ = discount_return(reward, done, bv, self.discount)
+            return_ = (discount_return_scan if vectorized else
+                discount_return)(reward, done, bv, self.discount)
             advantage = return_ - value
         else:
-            advantage, return_ = generalized_advantage_estimation(
+            advantage, return_ = (generalized_advantage_estimation_scan
+                if vectorized else generalized_advantage_estimation)(
                 reward, value, done, bv, self.discount, self.gae_lambda)
 
         if not self.mid_batch_reset or self.agent.recurrent:
@@ -58,3 +165,8 @@ class PolicyGradientAlgo(RlAlgorithm):
             advantage[:] = (advantage - adv_mean) / max(adv_std, 1e-6)
 
         return return_, advantage, valid
+
+
+def slice_minibatches(inputs, length, mb_size):
+    for start in range(0, length - mb_size + 1, mb_size):
+        yield inputs[start:start + mb_size], None
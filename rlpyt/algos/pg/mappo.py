@@ -1,20 +1,24 @@
 
+import contextlib
 import torch
+import torch.distributed
+from collections import namedtuple
 
-from rlpyt.algos.pg.base import PolicyGradientAlgo, OptInfo
-from rlpyt.agents.base import AgentInputs, AgentInputsRnn
+from rlpyt.algos.pg.base import (PolicyGradientAlgo, OptInfo as PgOptInfo,
+    OptInfoAccumulator)
+from rlpyt.agents.base import AgentInputsRnn
 from rlpyt.utils.tensor import valid_mean
 from rlpyt.utils.quick_args import save__init__args
-from rlpyt.utils.buffer import buffer_to, buffer_method
-from rlpyt.utils.collections import namedarraytuple
-from rlpyt.utils.misc import iterate_mb_idxs
+from rlpyt.utils.buffer import buffer_method
 
-LossInputs = namedarraytuple("LossInputs",
-    ["agent_inputs", "action", "return_", "advantage", "valid", "old_dist_info"])
+OptInfo = namedtuple("OptInfo", PgOptInfo._fields + ("kl", "nUpdates",
+    "peakMemory"))
 
 
 class MAPPO(PolicyGradientAlgo):
 
+    opt_info_fields = tuple(f for f in OptInfo._fields)  # copy
+
     def __init__(
             self,
             discount=0.99,
@@ -30,8 +34,16 @@ class MAPPO(PolicyGradientAlgo):
             epochs=4,
             ratio_clip=0.1,
             normalize_advantage=False,
-            ratio_prod=True
+            ratio_prod=True,
+            vectorized_returns=True,
+            target_kl=None,
+            microbatch_size=None,
             ):
+        """With ``target_kl``, stops the epochs early once an epoch's mean
+        approximate KL from the sampling policy exceeds it.  With
+        ``microbatch_size``, each minibatch's forward and backward run in
+        chunks of that many samples, gradients accumulated before the one
+        optimizer step (lower peak memory, same updates)."""
         if optim_kwargs is None:
             optim_kwargs = dict()
         save__init__args(locals())
@@ -39,62 +51,149 @@ class MAPPO(PolicyGradientAlgo):
 
     def initialize(self, *args, **kwargs):
         super().initialize(*args, **kwargs)
+        if self.agent.distribution.factorized and not self.ratio_prod:
+            raise ValueError("A factorized distribution gives one joint "
+                "ratio per sample, which needs ratio_prod=True (per-agent "
+                "advantages are not reduced to match it).")
         self._batch_size = self.batch_spec.size // self.minibatches  # For logging.
 
     def optimize_agent(self, itr, samples):
         recurrent = self.agent.recurrent
-        agent_inputs = AgentInputs(  # Move inputs to device once, index there.
-            observation=samples.env.observation,
-            prev_action=samples.agent.prev_action,
-            prev_reward=samples.env.prev_reward,
-        )
-        agent_inputs = buffer_to(agent_inputs, device=self.agent.device)
-        return_, advantage, valid = self.process_returns(samples)
-        loss_inputs = LossInputs(  # So can slice all.
-            agent_inputs=agent_inputs,
-            action=samples.agent.action,
-            return_=return_,
-            advantage=advantage,
-            valid=valid,
-            old_dist_info=samples.agent.agent_info.dist_info,
-        )
+        loss_inputs = self.build_loss_inputs(samples)
         if recurrent:
             # Leave in [B,N,H] for slicing to minibatches.
             init_rnn_state = samples.agent.agent_info.prev_rnn_state[0]  # T=0.
         T, B = samples.env.reward.shape[:2]
-        opt_info = OptInfo(*([] for _ in range(len(OptInfo._fields))))
-        # If recurrent, use whole trajectories, only shuffle B; else shuffle all.
-        batch_size = B if self.agent.recurrent else T * B
-        mb_size = batch_size // self.minibatches
-        for _ in range(self.epochs):
-            for idxs in iterate_mb_idxs(batch_size, mb_size, shuffle=True):
-                T_idxs = slice(None) if recurrent else idxs % T
-                B_idxs = idxs if recurrent else idxs // T
+        self.reset_peak_memory()
+        opt_info = OptInfoAccumulator(OptInfo)  # Transferred once, at end.
+        n_updates = 0
+        for minibatches in self.iterate_epochs(loss_inputs, T, B,
+                init_rnn_state if recurrent else None):
+            epoch_kl = list()
+            for mb_inputs, rnn_state in minibatches:
                 self.optimizer.zero_grad()
-                rnn_state = init_rnn_state[B_idxs] if recurrent else None
-                # NOTE: if not recurrent, will lose leading T dim, should be OK.
-                loss, entropy, perplexity, value_error, value_m, return_m, adv_m, ratio = self.loss(
-                    *loss_inputs[T_idxs, B_idxs], rnn_state)
-                #print("loss", loss, loss.shape)
-                loss.backward()
+                if self.microbatch_size is None:
+                    # NOTE: if not recurrent, will lose leading T dim, should be OK.
+                    loss, entropy, perplexity, value_error, value_m, return_m, adv_m, ratio, kl = self.loss(
+                        *mb_inputs, rnn_state)
+                    #print("loss", loss, loss.shape)
+                    loss.backward()
+                else:
+                    loss, entropy, perplexity, value_error, value_m, return_m, adv_m, ratio, kl = self.accumulate_gradients(
+                        mb_inputs, rnn_state)
                 grad_norm = torch.nn.utils.clip_grad_norm_(
                     self.agent.parameters(), self.clip_grad_norm)
                 self.optimizer.step()
 
-                opt_info.loss.append(loss.item())
-                opt_info.gradNorm.append(grad_norm)
-                opt_info.entropy.append(entropy.item())
-                opt_info.perplexity.append(perplexity.item())
-                opt_info.value_error.append(value_error.item())
-                opt_info.value.append(value_m.item())
-                opt_info.return_.append(return_m.item())
-                opt_info.adv.append(adv_m.item())
-                opt_info.ratio.append(ratio.item())
+                opt_info.append(loss=loss, gradNorm=grad_norm,
+                    entropy=entropy, perplexity=perplexity,
+                    value_error=value_error, value=value_m, return_=return_m,
+                    adv=adv_m, ratio=ratio, kl=kl)
+                epoch_kl.append(kl)
                 self.update_counter += 1
-        return opt_info
+                n_updates += 1
+            if self.target_kl is not None and self.kl_exceeded(
+                    torch.stack(epoch_kl).mean()):
+                break
+        opt_info.append(nUpdates=n_updates, peakMemory=self.peak_memory())
+        return opt_info.opt_info()
+
+    def accumulate_gradients(self, mb_inputs, rnn_state=None):
+        """Forward and backward of the minibatch in chunks of
+        ``microbatch_size`` samples (whole trajectories if recurrent).  Each
+        chunk's policy and value terms, and its entropy term, are weighted
+        by the chunk's share of the minibatch's terms of each (loss_count()),
+        so the accumulated gradient is that of the un-chunked loss.  Under
+        DistributedDataParallel, gradients are all-reduced only on the last
+        chunk.  Returns the loss() outputs, each combined by the chunks'
+        shares of the terms its mean is over (value_error summed)."""
+        if rnn_state is None:
+            n, size = len(mb_inputs.action), self.microbatch_size
+            chunk_inputs = lambda c: (mb_inputs[c], None)
+        else:  # [T,B]: chunk along B.
+            n = mb_inputs.action.shape[1]
+            size = max(1, self.microbatch_size // mb_inputs.action.shape[0])
+            chunk_inputs = lambda c: (mb_inputs[:, c], rnn_state[c])
+        chunks = [chunk_inputs(slice(s, s + size)) for s in range(0, n, size)]
+        n_lead = 1 if rnn_state is None else 2
+        counts = [self.loss_count(inputs.agent_inputs, inputs.valid,
+            inputs.advantage.shape[:n_lead].numel()) for inputs, _ in chunks]
+        totals = [sum(c) for c in zip(*counts)]
+        n_samples = mb_inputs.advantage.shape[:n_lead].numel()
+        model = self.agent.model
+        outputs = list()
+        for i, ((inputs, chunk_rnn_state), count) in enumerate(
+                zip(chunks, counts)):
+            weight, entropy_weight = (c / t for c, t in zip(count, totals))
+            last = i == len(chunks) - 1
+            with (model.no_sync() if hasattr(model, "no_sync") and not last
+                    else contextlib.nullcontext()):
+                loss_outputs = self.loss(*inputs, chunk_rnn_state,
+                    loss_weights=(weight, entropy_weight))
+                loss_outputs[0].backward()  # (Weighted in loss().)
+            sample_weight = inputs.advantage.shape[:n_lead].numel() / n_samples
+            # loss, entropy, perplexity, value_error (sum), value, return_,
+            # advantage, ratio (plain means over all samples), kl.
+            weights = (1, entropy_weight, entropy_weight, 1) + (
+                sample_weight,) * 4 + (weight,)
+            outputs.append([x.detach() * w
+                for x, w in zip(loss_outputs, weights)])
+        return tuple(sum(x) for x in zip(*outputs))
+
+    def loss_count(self, agent_inputs, valid, n):
+        """Numbers of terms the policy and value losses, and the entropy
+        loss, of ``n`` samples average over: valid samples, or valid real
+        agents for per-agent terms with padded agents (as in loss())."""
+        n_valid = n if valid is None else valid.sum()
+        agent_mask = getattr(agent_inputs.observation, "agent_mask", None)
+        if agent_mask is None:
+            return n_valid, n_valid
+        n_real = (agent_mask if valid is None else
+            agent_mask * valid.unsqueeze(-1)).sum()
+        return (n_valid if self.ratio_prod else n_real,
+            n_valid if self.agent.distribution.factorized else n_real)
+
+    def reset_peak_memory(self):
+        """Starts the peak_memory() measure, at the start of optimize_agent().
+        On CPU, resets the process's peak resident set (Linux >= 4.0, through
+        /proc; elsewhere, peak_memory() is NaN)."""
+        if self.agent.device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(self.agent.device)
+            return
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            self._peak_rss_reset = True
+        except OSError:
+            self._peak_rss_reset = False
+
+    def peak_memory(self):
+        """Peak memory (MB) since reset_peak_memory(), i.e. of this
+        optimize_agent(): on GPU, allocated by torch; on CPU, the process's
+        resident set (samples and sampler included), NaN if not available."""
+        if self.agent.device.type == "cuda":
+            return torch.cuda.max_memory_allocated(self.agent.device) / 2 ** 20
+        if getattr(self, "_peak_rss_reset", False):
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 2 ** 10  # (kB.)
+        return float("nan")
+
+    def kl_exceeded(self, kl):
+        """Epoch mean KL over target_kl; averaged over ranks, so all stop
+        after the same number of updates."""
+        if (torch.distributed.is_available() and
+                torch.distributed.is_initialized()):
+            kl = kl.to(self.agent.device)
+            torch.distributed.all_reduce(kl)
+            kl = kl / torch.distributed.get_world_size()
+        return kl.item() > self.target_kl
 
     def loss(self, agent_inputs, action, return_, advantage, valid, old_dist_info,
-            init_rnn_state=None):
+            init_rnn_state=None, loss_weights=None):
+        """With ``loss_weights``, (policy and value, entropy) weights of the
+        loss terms, for gradient accumulation."""
         if init_rnn_state is not None:
             # [B,N,H] --> [N,B,H] (for cudnn).
             init_rnn_state = buffer_method(init_rnn_state, "transpose", 0, 1)
@@ -107,24 +206,48 @@ class MAPPO(PolicyGradientAlgo):
 
         ratio = dist.likelihood_ratio(action, old_dist_info=old_dist_info,
             new_dist_info=dist_info)
+        # Per-agent terms [...,n]: valid per agent, real agents only if padded.
+        agent_valid = None if valid is None else valid.unsqueeze(-1).expand(
+            value.shape)
+        agent_mask = getattr(agent_inputs.observation, "agent_mask", None)
+        if agent_mask is not None:
+            agent_valid = agent_mask.to(value.device, value.dtype)
+            if valid is not None:
+                agent_valid = agent_valid * valid.unsqueeze(-1)
+        pi_valid = valid if self.ratio_prod else agent_valid
         if self.ratio_prod:
             advantage = advantage[:, 0]
             value = value[:, 0]
             return_ = return_[:, 0]
-            ratio = torch.prod(ratio, dim=-1)
+            if not dist.factorized:  # Factorized ratio is already joint.
+                ratio = torch.prod(ratio, dim=-1)
         surr_1 = ratio * advantage
         clipped_ratio = torch.clamp(ratio, 1. - self.ratio_clip,
             1. + self.ratio_clip)
         surr_2 = clipped_ratio * advantage
         surrogate = torch.min(surr_1, surr_2)
-        pi_loss = - valid_mean(surrogate, valid)
+        pi_loss = - valid_mean(surrogate, pi_valid)
         value_error = 0.5 * (value - return_) ** 2
-        value_loss = self.value_loss_coeff * valid_mean(value_error, valid)
+        value_loss = self.value_loss_coeff * valid_mean(value_error,
+            pi_valid)
 
-        entropy = dist.mean_entropy(dist_info, valid, product=False)
+        entropy = dist.mean_entropy(dist_info,
+            valid if dist.factorized else agent_valid, product=False)
         entropy_loss = - self.entropy_loss_coeff * entropy
 
-        loss = pi_loss + value_loss + entropy_loss
+        if loss_weights is None:
+            loss = pi_loss + value_loss + entropy_loss
+        else:
+            loss = (loss_weights[0] * (pi_loss + value_loss) +
+                loss_weights[1] * entropy_loss)
+
+        perplexity = dist.mean_perplexity(dist_info,
+            valid if dist.factorized else agent_valid)
 
-        perplexity = dist.mean_perplexity(dist_info, valid)
-        return loss, entropy, perplexity, value_error.sum(), value.mean(), return_.mean(), advantage.mean(), ratio.mean()
+        with torch.no_grad():  # Approximate KL from the sampling policy.
+            kl = dist.kl(old_dist_info, dist_info)
+            if self.ratio_prod and not dist.factorized:
+                kl = kl.sum(dim=-1)  # Joint, as the ratio.
+            kl = valid_mean(kl, valid if self.ratio_prod or dist.factorized
+                else pi_valid)
+        return loss, entropy, perplexity, value_error.sum(), value.mean(), return_.mean(), advantage.mean(), ratio.mean(), kl
@@ -0,0 +1,114 @@
+
+import torch
+
+from rlpyt.algos.pg.base import OptInfoAccumulator
+from rlpyt.algos.pg.mappo import MAPPO, OptInfo
+
+
+class MultiSeedMAPPO(MAPPO):
+    """MAPPO for the N seeds of a MultiSeedAgent at once.  Each minibatch's
+    loss is computed for all seeds in one vmapped forward and backward of
+    their stacked models; gradients are clipped per seed, and Adam (being
+    elementwise) keeps per-seed optimizer state.  Each seed draws its own
+    minibatch order.  Takes and returns lists: samples in, one OptInfo per
+    seed out.  Not for recurrent agents, target_kl or microbatch_size, nor
+    for models with padded agents (``agent_counts``) or sparse communication
+    (``neighbours``), whose forwards branch on team sizes or build edge
+    lists of data-dependent size, which vmap cannot."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.target_kl is not None or self.microbatch_size is not None:
+            raise ValueError("MultiSeedMAPPO supports neither target_kl nor "
+                "microbatch_size.")
+
+    def initialize(self, agent, *args, **kwargs):
+        if agent.recurrent:
+            raise ValueError("MultiSeedMAPPO is not for recurrent agents.")
+        model = agent.agents[0].model
+        if (getattr(model, "agent_counts", None) is not None or
+                getattr(model, "neighbours", None) is not None):
+            raise ValueError("MultiSeedMAPPO cannot vmap models with "
+                "agent_counts or neighbours.")
+        super().initialize(agent, *args, **kwargs)
+
+    def optimize_agent(self, itr, samples):
+        agent = self.agent
+        loss_inputs = list()
+        for seed_agent, seed_samples in zip(agent.agents, samples):
+            self.agent = seed_agent  # process_returns() with its own agent.
+            try:
+                loss_inputs.append(self.build_loss_inputs(seed_samples))
+            finally:
+                self.agent = agent
+        n = agent.n_seeds
+        T, B = samples[0].env.reward.shape[:2]
+        flat_inputs = stack_buffers(loss_inputs, lambda x: x.reshape(
+            (T * B,) + tuple(x.shape[2:])))  # [N,T*B,...]
+        seeds = torch.arange(n).unsqueeze(1)
+        mb_size = T * B // self.minibatches
+        self.reset_peak_memory()
+        opt_info = OptInfoAccumulator(OptInfo)  # Transferred once, at end.
+        n_updates = 0
+        for _ in range(self.epochs):
+            idxs = torch.argsort(torch.rand(n, T * B), dim=1)  # Per seed.
+            epoch_inputs = flat_inputs[seeds, idxs]  # One copy per epoch.
+            for start in range(0, T * B - mb_size + 1, mb_size):
+                self.optimizer.zero_grad()
+                loss, entropy, perplexity, value_error, value_m, return_m, adv_m, ratio, kl = self.seed_losses(
+                    epoch_inputs[:, start:start + mb_size])
+                loss.sum().backward()  # Seeds' gradients are independent.
+                grad_norm = self.clip_seed_grad_norms()
+                self.optimizer.step()
+
+                opt_info.append(loss=loss, gradNorm=grad_norm,
+                    entropy=entropy, perplexity=perplexity,
+                    value_error=value_error, value=value_m, return_=return_m,
+                    adv=adv_m, ratio=ratio, kl=kl)
+                self.update_counter += 1
+                n_updates += 1
+        opt_info.append(nUpdates=n_updates, peakMemory=self.peak_memory())
+        opt_info = opt_info.opt_info()  # Values of seeds interleaved.
+        return [OptInfo(**{k: (v if k in ("nUpdates", "peakMemory") else
+            v[i::n]) for k, v in opt_info._asdict().items()})
+            for i in range(n)]
+
+    def seed_losses(self, mb_inputs):
+        """MAPPO.loss() outputs of every seed, for minibatch inputs with a
+        leading [N] dim, in one vmapped computation; outputs [N]."""
+        agent = self.agent
+        seed_agent = agent.agents[0]  # Stands in for each, with its model.
+        seed_model = seed_agent.model
+
+        def loss(model, inputs):
+            self.agent, seed_agent.model = seed_agent, model
+            try:
+                return self.loss(*inputs)
+            finally:
+                self.agent, seed_agent.model = agent, seed_model
+
+        return agent.model.vmap(loss, mb_inputs)
+
+    def clip_seed_grad_norms(self):
+        """clip_grad_norm_() of each seed's gradients; returns norms [N]."""
+        grads = [p.grad for p in self.agent.parameters()
+            if p.grad is not None]
+        norms = torch.stack([g.reshape(len(g), -1).pow(2).sum(dim=1)
+            for g in grads]).sum(dim=0).sqrt()
+        coef = (self.clip_grad_norm / (norms + 1e-6)).clamp(max=1.)
+        for g in grads:
+            g.mul_(coef.view((-1,) + (1,) * (g.dim() - 1)))
+        return norms
+
+
+def stack_buffers(buffers, func=None):
+    """Stacks a list of like buffers (namedarraytuples) along a new leading
+    dim, each leaf first mapped by ``func`` if given."""
+    if buffers[0] is None:
+        return None
+    if isinstance(buffers[0], torch.Tensor):
+        return torch.stack([x if func is None else func(x) for x in buffers])
+    contents = tuple(stack_buffers(b, func) for b in zip(*buffers))
+    if type(buffers[0]) is tuple:
+        return contents
+    return type(buffers[0])(*contents)
@@ -1,15 +1,11 @@
 import torch
 
-from rlpyt.algos.pg.base import PolicyGradientAlgo, OptInfo
-from rlpyt.agents.base import AgentInputs, AgentInputsRnn
+from rlpyt.algos.pg.base import (PolicyGradientAlgo, OptInfo,
+    OptInfoAccumulator)
+from rlpyt.agents.base import AgentInputsRnn
 from rlpyt.utils.tensor import valid_mean
 from rlpyt.utils.quick_args import save__init__args
-from rlpyt.utils.buffer import buffer_to, buffer_method
-from rlpyt.utils.collections import namedarraytuple
-from rlpyt.utils.misc import iterate_mb_idxs
-
-LossInputs = namedarraytuple("LossInputs",
-    ["agent_inputs", "action", "return_", "advantage", "valid", "old_dist_info"])
+from rlpyt.utils.buffer import buffer_method
 
 
 class PPO(PolicyGradientAlgo):
@@ -29,6 +25,7 @@ class PPO(PolicyGradientAlgo):
             epochs=4,
             ratio_clip=0.1,
             normalize_advantage=False,
+            vectorized_returns=True,
             ):
         if optim_kwargs is None:
             optim_kwargs = dict()
@@ -40,50 +37,29 @@ class PPO(PolicyGradientAlgo):
 
     def optimize_agent(self, itr, samples):
         recurrent = self.agent.recurrent
-        agent_inputs = AgentInputs(  # Move inputs to device once, index there.
-            observation=samples.env.observation,
-            prev_action=samples.agent.prev_action,
-            prev_reward=samples.env.prev_reward,
-        )
-        agent_inputs = buffer_to(agent_inputs, device=self.agent.device)
-        return_, advantage, valid = self.process_returns(samples)
-        loss_inputs = LossInputs(  # So can slice all.
-            agent_inputs=agent_inputs,
-            action=samples.agent.action,
-            return_=return_,
-            advantage=advantage,
-            valid=valid,
-            old_dist_info=samples.agent.agent_info.dist_info,
-        )
+        loss_inputs = self.build_loss_inputs(samples)
         if recurrent:
             # Leave in [B,N,H] for slicing to minibatches.
             init_rnn_state = samples.agent.agent_info.prev_rnn_state[0]  # T=0.
         T, B = samples.env.reward.shape[:2]
-        opt_info = OptInfo(*([] for _ in range(len(OptInfo._fields))))
-        # If recurrent, use whole trajectories, only shuffle B; else shuffle all.
-        batch_size = B if self.agent.recurrent else T * B
-        mb_size = batch_size // self.minibatches
-        for _ in range(self.epochs):
-            for idxs in iterate_mb_idxs(batch_size, mb_size, shuffle=True):
-                T_idxs = slice(None) if recurrent else idxs % T
-                B_idxs = idxs if recurrent else idxs // T
+        opt_info = OptInfoAccumulator(OptInfo)  # Transferred once, at end.
+        for minibatches in self.iterate_epochs(loss_inputs, T, B,
+                init_rnn_state if recurrent else None):
+            for mb_inputs, rnn_state in minibatches:
                 self.optimizer.zero_grad()
-                rnn_state = init_rnn_state[B_idxs] if recurrent else None
                 # NOTE: if not recurrent, will lose leading T dim, should be OK.
                 loss, entropy, perplexity = self.loss(
-                    *loss_inputs[T_idxs, B_idxs], rnn_state)
+                    *mb_inputs, rnn_state)
                 #print("loss", loss, loss.shape)
                 loss.backward()
                 grad_norm = torch.nn.utils.clip_grad_norm_(
                     self.agent.parameters(), self.clip_grad_norm)
                 self.optimizer.step()
 
-                opt_info.loss.append(loss.item())
-                opt_info.gradNorm.append(grad_norm)
-                opt_info.entropy.append(entropy.item())
-                opt_info.perplexity.append(perplexity.item())
+                opt_info.append(loss=loss, gradNorm=grad_norm,
+                    entropy=entropy, perplexity=perplexity)
                 self.update_counter += 1
-        return opt_info
+        return opt_info.opt_info()
 
     def loss(self, agent_inputs, action, return_, advantage, valid, old_dist_info,
             init_rnn_state=None):
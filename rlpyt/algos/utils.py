@@ -143,3 +143,137 @@ def generalized_advantage_estimation_tl(reward, value, done, bootstrap_value,
             discount * value[t + 1][tt] - value[t][tt])
     return_[:] = advantage + value
     return advantage, return_
+
+
+# Vectorized versions of the above, same results (up to float rounding):
+# each is the reverse linear recurrence x[t] = a[t] + g[t] * x[t + 1],
+# solved for all t at once.
+
+def reverse_linear_scan(a, g, x_last, block_size=16):
+    """Solves x[t] = a[t] + g[t] * x[t + 1] backwards in time, given x[T] =
+    x_last, without a loop over T.  Time-major inputs (``a`` and ``g`` of the
+    same shape), numpy or torch, optional other dimensions.
+
+    Blocked scan: within blocks of ``block_size`` steps, log2(block_size)
+    vectorized doubling steps give each x[t] as an affine function of the x
+    at the start of the next block; those block carries are the same
+    recurrence, T / block_size long, solved recursively."""
+    T = len(a)
+    n_blocks = -(-T // block_size)
+    pad = n_blocks * block_size - T
+    if pad:  # Padding with a = 0, g = 1 passes x_last through unchanged.
+        a = _cat([a, _steps_like(a, pad, 0)])
+        g = _cat([g, _steps_like(g, pad, 1)])
+    a = a.reshape((n_blocks, block_size) + tuple(a.shape[1:]))
+    g = g.reshape((n_blocks, block_size) + tuple(g.shape[1:]))
+    a, g = _copy(a), _copy(g)
+    k = 1
+    while k < block_size:
+        # Now a[:, t], g[:, t] span [t, t + k) within the block; compose
+        # with [t + k, t + 2k).
+        a[:, :-k] += g[:, :-k] * a[:, k:]
+        g[:, :-k] = g[:, :-k] * g[:, k:]
+        k *= 2
+    # x at the start of each block, then at the start of the next one.
+    x_last = 0 * a[:1, 0] + x_last
+    if n_blocks > 1:
+        x_start = reverse_linear_scan(a[1:, 0], g[1:, 0], x_last, block_size)
+        x_next = _cat([x_start, x_last])
+    else:
+        x_next = x_last
+    x = a + g * x_next[:, None]
+    return x.reshape((n_blocks * block_size,) + tuple(x.shape[2:]))[:T]
+
+
+def _cat(arrays):
+    if isinstance(arrays[0], torch.Tensor):
+        return torch.cat(arrays)
+    return np.concatenate(arrays)
+
+
+def _steps_like(x, n, fill_value):
+    shape = (n,) + tuple(x.shape[1:])
+    if isinstance(x, torch.Tensor):
+        return x.new_full(shape, fill_value)
+    return np.full(shape, fill_value, dtype=x.dtype)
+
+
+def _copy(x):
+    return x.clone() if isinstance(x, torch.Tensor) else x.copy()
+
+
+def _where(condition, x, y):
+    if isinstance(condition, torch.Tensor):
+        return torch.where(condition, x, y)
+    return np.where(condition, x, y)
+
+
+def _next_value(value, bootstrap_value):
+    """value[t + 1], with bootstrap_value at t = T - 1."""
+    bootstrap_value = bootstrap_value.reshape((1,) + tuple(value.shape[1:]))
+    return _cat([value[1:], bootstrap_value])
+
+
+def _to_dest(value, dest):
+    if dest is None:
+        return value
+    dest[:] = value
+    return dest
+
+
+def discount_return_scan(reward, done, bootstrap_value, discount,
+        return_dest=None):
+    """Vectorized discount_return()."""
+    nd = 1 - done
+    nd = nd.type(reward.dtype) if isinstance(nd, torch.Tensor) else nd
+    return_ = reverse_linear_scan(reward, discount * nd, bootstrap_value)
+    return _to_dest(return_, return_dest)
+
+
+def generalized_advantage_estimation_scan(reward, value, done,
+        bootstrap_value, discount, gae_lambda, advantage_dest=None,
+        return_dest=None):
+    """Vectorized generalized_advantage_estimation()."""
+    nd = 1 - done
+    nd = nd.type(reward.dtype) if isinstance(nd, torch.Tensor) else nd
+    delta = reward + discount * _next_value(value, bootstrap_value) * nd - value
+    advantage = reverse_linear_scan(delta, discount * gae_lambda * nd, 0.)
+    return_ = advantage + value
+    return (_to_dest(advantage, advantage_dest),
+        _to_dest(return_, return_dest))
+
+
+def discount_return_tl_scan(reward, done, bootstrap_value, discount, timeout,
+        value, return_dest=None):
+    """Vectorized discount_return_tl()."""
+    assert all(done[timeout])  # Anywhere timeout, was done (timeout is bool dtype).
+    nd = 1 - done
+    nd = nd.type(reward.dtype) if isinstance(nd, torch.Tensor) else nd
+    timeout = timeout.copy() if isinstance(timeout, np.ndarray) else timeout.clone()
+    timeout[-1] = False  # Loop version never replaces the last step.
+    return_ = reverse_linear_scan(_where(timeout, value, reward),
+        _where(timeout, 0 * nd, discount * nd), bootstrap_value)
+    return _to_dest(return_, return_dest)
+
+
+def generalized_advantage_estimation_tl_scan(reward, value, done,
+        bootstrap_value, discount, gae_lambda, timeout, advantage_dest=None,
+        return_dest=None):
+    """Vectorized generalized_advantage_estimation_tl()."""
+    assert all(done[timeout])  # timeout is bool dtype.
+    nd = 1 - done
+    nd = nd.type(reward.dtype) if isinstance(nd, torch.Tensor) else nd
+    next_value = _next_value(value, bootstrap_value)
+    delta = reward + discount * next_value * nd - value
+    delta_timeout = reward + discount * next_value - value
+    next_timeout = timeout.copy() if isinstance(timeout, np.ndarray) else \
+        timeout.clone()
+    next_timeout[:-1] = timeout[1:]  # Bootstrap where next step timed out.
+    next_timeout[-1] = False
+    advantage = reverse_linear_scan(
+        _where(next_timeout, delta_timeout, delta),
+        _where(next_timeout, 0 * nd, discount * gae_lambda * nd), 0.)
+    return_ = advantage + value
+    return (_to_dest(advantage, advantage_dest),
+        _to_dest(return_, return_dest))
+
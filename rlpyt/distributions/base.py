@@ -8,6 +8,10 @@ DistInfo = None
 
 class Distribution:
 
+    # True if likelihoods, ratios, KL and entropy already cover the joint
+    # action of all agents (no product over an agent dimension needed).
+    factorized = False
+
     @property
     def dim(self):
         raise NotImplementedError
@@ -9,14 +9,46 @@ from rlpyt.utils.tensor import valid_mean, select_at_indexes
 EPS = 1e-8
 
 DistInfo = namedarraytuple("DistInfo", ["prob"])
+# Normalized log-probabilities (model output through log_softmax), in place of
+# prob: every method uses them directly, instead of log(prob + EPS).
+DistInfoLogits = namedarraytuple("DistInfoLogits", ["logits"])
+
+
+def log_probs(dist_info):
+    if "logits" in dist_info:
+        return dist_info.logits
+    return torch.log(dist_info.prob + EPS)
+
+
+def probs(dist_info):
+    if "logits" in dist_info:
+        return torch.exp(dist_info.logits)
+    return dist_info.prob
+
+
+def selected_log_probs(indexes, dist_info):
+    if "logits" in dist_info:
+        return select_at_indexes(indexes, dist_info.logits)
+    return torch.log(select_at_indexes(indexes, dist_info.prob) + EPS)
+
+
+def selected_ratio(indexes, old_dist_info, new_dist_info):
+    """Likelihood ratio new / old of the selected entries."""
+    if "logits" in new_dist_info:
+        return torch.exp(select_at_indexes(indexes, new_dist_info.logits) -
+            select_at_indexes(indexes, old_dist_info.logits))
+    num = select_at_indexes(indexes, new_dist_info.prob)
+    den = select_at_indexes(indexes, old_dist_info.prob)
+    return (num + EPS) / (den + EPS)
+
 
 class Categorical(DiscreteMixin, Distribution):
     """Multinomial distribution over a discrete domain."""
 
     def kl(self, old_dist_info, new_dist_info):
-        p = old_dist_info.prob
-        q = new_dist_info.prob
-        return torch.sum(p * (torch.log(p + EPS) - torch.log(q + EPS)), dim=-1)
+        log_p = log_probs(old_dist_info)
+        return torch.sum(probs(old_dist_info) *
+            (log_p - log_probs(new_dist_info)), dim=-1)
 
     def mean_kl(self, old_dist_info, new_dist_info, valid=None):
         return valid_mean(self.kl(old_dist_info, new_dist_info), valid)
@@ -24,19 +56,15 @@ class Categorical(DiscreteMixin, Distribution):
     def sample(self, dist_info):
         """Sample from ``torch.multiomial`` over trailing dimension of
         ``dist_info.prob``."""
-        p = dist_info.prob
+        p = probs(dist_info)
         sample = torch.multinomial(p.view(-1, self.dim), num_samples=1)
         return sample.view(p.shape[:-1]).type(self.dtype)  # Returns indexes.
 
     def entropy(self, dist_info, value_dec=False):
-        p = dist_info.prob
-        return -torch.sum(p * torch.log(p + EPS), dim=-1)
+        return -torch.sum(probs(dist_info) * log_probs(dist_info), dim=-1)
 
     def log_likelihood(self, indexes, dist_info):
-        selected_likelihood = select_at_indexes(indexes, dist_info.prob)
-        return torch.log(selected_likelihood + EPS)
+        return selected_log_probs(indexes, dist_info)
 
     def likelihood_ratio(self, indexes, old_dist_info, new_dist_info):
-        num = select_at_indexes(indexes, new_dist_info.prob)
-        den = select_at_indexes(indexes, old_dist_info.prob)
-        return (num + EPS) / (den + EPS)
+        return selected_ratio(indexes, old_dist_info, new_dist_info)
@@ -2,8 +2,7 @@
 import torch
 
 from rlpyt.utils.tensor import to_onehot, from_onehot
-
-import itertools
+from rlpyt.utils.joint_action import JointActionCodec
 
 
 class DiscreteMixin:
@@ -14,10 +13,7 @@ class DiscreteMixin:
         self.onehot_dtype = onehot_dtype
         self.n_agents = n_agents
         self.n_actions = n_actions
-        self.act_prod = list(itertools.product(*[[i for i in
-                                                  range(self.n_actions)]
-                                                                   for _ in
-                                                                   range(self.n_agents)]))
+        self.codec = JointActionCodec(n_agents=n_agents, n_actions=n_actions)
 
     @property
     def dim(self):
@@ -28,3 +24,12 @@ class DiscreteMixin:
 
     def from_onehot(self, onehot, dtype=None):
         return from_onehot(onehot, dtpye=dtype or self.dtype)
+
+    def to_joint(self, actions):
+        """Per-agent actions [...,n_agents] --> joint indexes [...]."""
+        return self.codec.encode(actions)
+
+    def from_joint(self, indexes):
+        """Joint indexes [...] --> per-agent actions [...,n_agents]."""
+        return self.codec.decode(indexes)
+
@@ -0,0 +1,55 @@
+
+import torch
+
+from rlpyt.distributions.base import Distribution
+from rlpyt.distributions.discrete import DiscreteMixin
+from rlpyt.distributions.categorical import (log_probs, probs,
+    selected_log_probs)
+from rlpyt.utils.collections import namedarraytuple
+from rlpyt.utils.tensor import valid_mean
+
+EPS = 1e-8
+
+DistInfo = namedarraytuple("DistInfo", ["prob"])
+
+
+class FactorizedCategorical(DiscreteMixin, Distribution):
+    """Joint action distribution as a product of independent per-agent
+    categoricals.  Expects ``dist_info.prob`` shaped [...,n_agents,n_actions]
+    and actions shaped [...,n_agents].  Log-likelihood, KL and entropy are
+    summed over agents, so they describe the joint distribution without ever
+    building anything of size ``n_actions**n_agents``."""
+
+    factorized = True
+
+    def __init__(self, n_agents, n_actions, **kwargs):
+        super().__init__(dim=n_actions, n_agents=n_agents,
+            n_actions=n_actions, **kwargs)
+
+    def kl(self, old_dist_info, new_dist_info):
+        log_p = log_probs(old_dist_info)
+        kl = torch.sum(probs(old_dist_info) *
+            (log_p - log_probs(new_dist_info)), dim=-1)
+        return kl.sum(dim=-1)
+
+    def mean_kl(self, old_dist_info, new_dist_info, valid=None):
+        return valid_mean(self.kl(old_dist_info, new_dist_info), valid)
+
+    def sample(self, dist_info):
+        """Draws one action per agent, returns shape [...,n_agents]."""
+        p = probs(dist_info)
+        sample = torch.multinomial(p.reshape(-1, self.n_actions), num_samples=1)
+        return sample.view(p.shape[:-1]).type(self.dtype)
+
+    def entropy(self, dist_info, product=False):
+        """Joint entropy (sum over agents); ``product`` is accepted for
+        interface compatibility with ``MultiCategorical``."""
+        return -torch.sum(probs(dist_info) * log_probs(dist_info),
+            dim=(-2, -1))
+
+    def log_likelihood(self, indexes, dist_info):
+        return selected_log_probs(indexes, dist_info).sum(dim=-1)
+
+    def likelihood_ratio(self, indexes, old_dist_info, new_dist_info):
+        return torch.exp(self.log_likelihood(indexes, new_dist_info) -
+            self.log_likelihood(indexes, old_dist_info))
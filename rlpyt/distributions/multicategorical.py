@@ -3,8 +3,10 @@ import torch
 
 from rlpyt.distributions.base import Distribution
 from rlpyt.distributions.discrete import DiscreteMixin
+from rlpyt.distributions.categorical import (DistInfoLogits, log_probs, probs,
+    selected_log_probs, selected_ratio)
 from rlpyt.utils.collections import namedarraytuple
-from rlpyt.utils.tensor import valid_mean, select_at_indexes
+from rlpyt.utils.tensor import valid_mean
 
 EPS = 1e-8
 
@@ -14,16 +16,16 @@ DistInfo = namedarraytuple("DistInfo", ["prob"])
 class MultiCategorical(DiscreteMixin, Distribution):
 
     def kl(self, old_dist_info, new_dist_info):
-        p = old_dist_info.prob
-        q = new_dist_info.prob
-        return torch.sum(p * (torch.log(p + EPS) - torch.log(q + EPS)), dim=-1)
+        log_p = log_probs(old_dist_info)
+        return torch.sum(probs(old_dist_info) *
+            (log_p - log_probs(new_dist_info)), dim=-1)
 
     def mean_kl(self, old_dist_info, new_dist_info, valid=None):
         return valid_mean(self.kl(old_dist_info, new_dist_info), valid)
 
     def sample(self, dist_info):
         ### Rewritten to make batch * n_agents
-        p = dist_info.prob
+        p = probs(dist_info)
         if len(p.shape) > 2:
             bs = p.shape[0]
         else:
@@ -39,21 +41,18 @@ class MultiCategorical(DiscreteMixin, Distribution):
 
     def entropy(self, dist_info, product=False):
         if product:
-            p = torch.prod(dist_info.prob, dim=1)
-        else:
-            p = dist_info.prob
-        return -torch.sum(p * torch.log(p + EPS), dim=-1)
+            dist_info = self.multiply(dist_info)
+        return -torch.sum(probs(dist_info) * log_probs(dist_info), dim=-1)
 
     def log_likelihood(self, indexes, dist_info):
-        selected_likelihood = select_at_indexes(indexes, dist_info.prob)
-        return torch.log(selected_likelihood + EPS)
+        return selected_log_probs(indexes, dist_info)
 
     def likelihood_ratio(self, indexes, old_dist_info, new_dist_info):
-        num = select_at_indexes(indexes, new_dist_info.prob)
-        den = select_at_indexes(indexes, old_dist_info.prob)
-        return (num + EPS) / (den + EPS)
+        return selected_ratio(indexes, old_dist_info, new_dist_info)
 
     def multiply(self, dist_info):
         """
         """
+        if "logits" in dist_info:
+            return DistInfoLogits(logits=torch.sum(dist_info.logits, dim=1))
         return DistInfo(prob=torch.prod(dist_info.prob, dim=1))
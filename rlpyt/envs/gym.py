@@ -2,6 +2,7 @@
 import numpy as np
 import gym
 from gym import Wrapper
+from gym.spaces import Box, Dict, MultiDiscrete
 from gym.wrappers.time_limit import TimeLimit
 from collections import namedtuple
 import time
@@ -13,9 +14,15 @@ from rlpyt.utils.collections import is_namedtuple_class
 
 
 class GymEnvWrapper(Wrapper):
+    """With ``joint_action=True``, the agent acts with flat joint action
+    indexes (e.g. from a centralized ``Categorical``), which are decoded to
+    per-agent actions before stepping the wrapped env.  With ``obs_dtype``
+    (e.g. ``"uint8"`` for grid observations), observations are cast to that
+    dtype, so sample buffers store them compactly and models convert to
+    float on their own device."""
 
     def __init__(self, env, act_null_value=0, obs_null_value=0,
-                 force_float32=True):
+                 force_float32=True, joint_action=False, obs_dtype=None):
         super().__init__(env)
         o = self.env.reset()
         o, r, d, info = self.env.step(self.env.action_space.sample())
@@ -33,15 +40,28 @@ class GymEnvWrapper(Wrapper):
             name="act",
             null_value=act_null_value,
             force_float32=force_float32,
+            joint_action=joint_action,
         )
         self.observation_space = GymSpaceWrapper(
             space=self.env.observation_space,
             name="obs",
             null_value=obs_null_value,
             force_float32=force_float32,
+            force_dtype=obs_dtype,
         )
         build_info_tuples(info)
+        self._info_example = info
+        self._info_to_nt = compile_info_converter(info)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_info_to_nt"]  # Generated code; rebuilt on unpickling.
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        build_info_tuples(self._info_example)
+        self._info_to_nt = compile_info_converter(self._info_example)
 
     def step(self, action):
         a = self.action_space.revert(action)
@@ -52,7 +72,7 @@ class GymEnvWrapper(Wrapper):
                 info["timeout"] = info.pop("TimeLimit.truncated")
             else:
                 info["timeout"] = False
-        info = info_to_nt(info)
+        info = self._info_to_nt(info)
         return EnvStep(obs, r, d, info)
 
     def reset(self):
@@ -97,6 +117,31 @@ def info_to_nt(value, name="info"):
     return ntc(**values)
 
 
+def compile_info_converter(info, name="info"):
+    """Returns a function converting info dicts as ``info_to_nt()`` does, for
+    the schema of the example ``info`` (after ``build_info_tuples()``): the
+    field lookups and nesting are resolved once, into generated code, instead
+    of walking the dict and looking up namedtuple classes every step."""
+    namespace = dict(ntc=globals()[name])
+    args = list()
+    for k in namespace["ntc"]._fields:
+        if isinstance(info.get(k), dict):
+            namespace[f"convert_{k}"] = compile_info_converter(info[k],
+                "_".join([name, k]))
+            args.append(f"convert_{k}(get({k!r}, 0))")
+        else:
+            args.append(f"get({k!r}, 0)")
+    source = (
+        "def info_to_nt(value):\n"
+        "    if not isinstance(value, dict):\n"
+        "        return value\n"
+        "    get = value.get\n"
+        f"    return ntc({', '.join(args)})\n"
+    )
+    exec(source, namespace)
+    return namespace["info_to_nt"]
+
+
 # To use: return a dict of keys and default values which sometimes appear in
 # the wrapped env's env_info, so this env always presents those values (i.e.
 # make keys and values keep the same structure and shape at all time steps.)
@@ -122,6 +167,62 @@ class EnvInfoWrapper(Wrapper):
         return o, r, d, infill_info(info, self._sometimes_info)
 
 
+class PadAgentsWrapper(Wrapper):
+    """Pads a multi-agent grid env to ``max_agents`` agents, so envs with
+    different team sizes can share one sampler batch and one model forward
+    pass (models built with ``agent_counts``).  Observations become a dict
+    of the padded ``grid`` (agents' channels first, padding after, location
+    grid last) and the ``agent_mask``; per-agent rewards and dones are padded
+    with zeros, and padded agents' actions are dropped."""
+
+    def __init__(self, env, max_agents):
+        super().__init__(env)
+        space = env.action_space
+        if space.n_agents > max_agents:
+            raise ValueError(f"Env has {space.n_agents} agents, more than "
+                f"max_agents={max_agents}.")
+        self.n_agents = space.n_agents
+        self.max_agents = max_agents
+        self.action_space = MultiDiscrete([space.n_actions] * max_agents)
+        self.action_space.n_agents = max_agents
+        self.action_space.n_actions = space.n_actions
+        self.action_space.decentralized = space.decentralized
+        obs_space = env.observation_space
+        c, h, w = obs_space.shape
+        self._agent_channels = (c - 1) // self.n_agents
+        self._grid_shape = (self._agent_channels * max_agents + 1, h, w)
+        self.observation_space = Dict(dict(
+            grid=Box(low=np.min(obs_space.low), high=np.max(obs_space.high),
+                shape=self._grid_shape, dtype=obs_space.dtype),
+            agent_mask=Box(low=0, high=1, shape=(max_agents,),
+                dtype=np.uint8),
+        ))
+        self._agent_mask = np.zeros(max_agents, dtype=np.uint8)
+        self._agent_mask[:self.n_agents] = 1
+
+    def step(self, action):
+        o, r, d, info = self.env.step(np.asarray(action)[:self.n_agents])
+        return self.pad_observation(o), self.pad(r), self.pad(d), info
+
+    def reset(self, **kwargs):
+        return self.pad_observation(self.env.reset(**kwargs))
+
+    def pad_observation(self, o):
+        grid = np.zeros(self._grid_shape, dtype=np.asarray(o).dtype)
+        grid[:len(o) - 1] = o[:-1]
+        grid[-1] = o[-1]
+        return dict(grid=grid, agent_mask=self._agent_mask.copy())
+
+    def pad(self, value):
+        """Pads per-agent values; scalars (shared by all agents) pass."""
+        if np.ndim(value) == 0:
+            return value
+        value = np.asarray(value)
+        padded = np.zeros(self.max_agents, dtype=value.dtype)
+        padded[:self.n_agents] = value
+        return padded
+
+
 def infill_info(info, sometimes_info):
     for k, v in sometimes_info.items():
         if k not in info:
@@ -131,15 +232,27 @@ def infill_info(info, sometimes_info):
     return info
 
 
-def make(*args, info_example=None, **kwargs):
+def make(*args, info_example=None, joint_action=False, obs_dtype=None,
+         max_agents=None, **kwargs):
+    """Make a gym env wrapped for rlpyt.  If ``n_agents`` is a list of team
+    sizes, this env gets one of them at random, padded to the largest (or to
+    ``max_agents``) with ``PadAgentsWrapper``."""
+    if isinstance(kwargs.get('n_agents'), (list, tuple)):
+        agent_counts = kwargs['n_agents']
+        kwargs['n_agents'] = int(np.random.choice(agent_counts))
+        max_agents = max_agents or max(agent_counts)
     if 'init' in kwargs:
         init = kwargs['init']
         kwargs = {key:value for key, value in kwargs.items() if key is not
                   'init'}
     else:
         init = None
+    env = gym.make(*args, **kwargs)
+    if max_agents is not None:
+        env = PadAgentsWrapper(env, max_agents)
     if info_example is None:
-        return GymEnvWrapper(gym.make(*args, **kwargs))
+        return GymEnvWrapper(env,
+                             joint_action=joint_action, obs_dtype=obs_dtype)
     else:
-        return GymEnvWrapper(EnvInfoWrapper(
-            gym.make(*args, **kwargs), info_example))
+        return GymEnvWrapper(EnvInfoWrapper(env, info_example),
+            joint_action=joint_action, obs_dtype=obs_dtype)
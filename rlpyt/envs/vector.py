@@ -0,0 +1,133 @@
+
+from collections import namedtuple
+
+import numpy as np
+
+from rlpyt.utils.buffer import buffer_from_example
+
+
+VecEnvStep = namedtuple("VecEnvStep",
+    ["observation", "reward", "done", "env_info", "reset"])
+
+
+class VecEnv:
+    """B instances of an environment, stepped together with one action array
+    (e.g. [B,n_agents]).  Outputs are stacked, with a leading [B] dim:
+    observation and env_info as arrays or namedarraytuples (env_info None if
+    the env has none), reward and done as arrays.  Envs whose trajectory ends
+    are reset within ``step()``: their returned observation is the first of
+    the next trajectory, and the ``reset`` mask [B] (bool) marks them.
+    Returned arrays may be overwritten by the next step or reset, so copy what
+    must persist."""
+
+    def step(self, action):
+        """Returns VecEnvStep(observation, reward, done, env_info, reset)."""
+        raise NotImplementedError
+
+    def reset(self, mask=None):
+        """Resets all envs, or those where ``mask`` [B] (bool) is True;
+        returns the observation [B,...] of all envs."""
+        raise NotImplementedError
+
+    def sample_action(self):
+        """Random actions [B,...], e.g. for decorrelation."""
+        raise NotImplementedError
+
+    @property
+    def n_envs(self):
+        raise NotImplementedError
+
+    @property
+    def n_agents(self):
+        raise NotImplementedError
+
+    @property
+    def spaces(self):
+        """EnvSpaces of one instance."""
+        raise NotImplementedError
+
+    def __len__(self):
+        return self.n_envs
+
+    def close(self):
+        pass
+
+
+class ListVecEnv(VecEnv):
+    """VecEnv adapter for a list of envs (e.g. GymEnvWrapper), so existing
+    envs work with vector collectors.  Still steps each env in turn, but
+    writes straight into its stacked output arrays.  A trajectory ends with
+    ``env_info.traj_done`` if present, else when any of ``done`` (e.g. per
+    agent) is True."""
+
+    def __init__(self, envs):
+        self.envs = list(envs)
+        self._observation = None  # Stacked outputs, built from the first.
+        self._step = None
+
+    def reset(self, mask=None):
+        idxs = (range(len(self.envs)) if mask is None else
+            np.flatnonzero(mask))
+        for b in idxs:
+            o = self.envs[b].reset()
+            if self._observation is None:
+                self._observation = buffer_from_example(o, len(self.envs))
+            self._observation[b] = o
+        return self._observation
+
+    def step(self, action):
+        for b, env in enumerate(self.envs):
+            o, r, d, env_info = env.step(action[b])
+            if self._step is None:
+                self._step = self._build_step(r, d, env_info)
+            step = self._step
+            traj_done = getattr(env_info, "traj_done", np.any(d))
+            if traj_done:
+                o = env.reset()
+            self._observation[b] = o
+            step.reward[b] = r
+            step.done[b] = d
+            step.reset[b] = traj_done
+            if step.env_info is not None:
+                step.env_info[b] = env_info
+        return self._step._replace(observation=self._observation)
+
+    def _build_step(self, r, d, env_info):
+        B = len(self.envs)
+        return VecEnvStep(
+            observation=None,
+            reward=buffer_from_example(np.asarray(r, dtype="float32"), B),
+            done=buffer_from_example(d, B),
+            env_info=buffer_from_example(env_info, B) if env_info else None,
+            reset=np.zeros(B, dtype=bool),
+        )
+
+    def sample_action(self):
+        return np.stack([env.action_space.sample() for env in self.envs])
+
+    @property
+    def n_envs(self):
+        return len(self.envs)
+
+    @property
+    def n_agents(self):
+        return self.envs[0].n_agents
+
+    @property
+    def spaces(self):
+        return self.envs[0].spaces
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+
+def as_vec_env(envs):
+    """A VecEnv as is; a list of envs in a ListVecEnv."""
+    return envs if isinstance(envs, VecEnv) else ListVecEnv(envs)
+
+
+def any_done(done):
+    """[B] mask of envs with any of ``done`` [B,...] (e.g. per agent)."""
+    done = np.asarray(done)
+    return done.reshape(len(done), -1).any(axis=1)
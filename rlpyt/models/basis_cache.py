@@ -0,0 +1,169 @@
+"""
+On-disk cache for equivariant basis construction.  While ``basis_cache()`` is
+active, the symmetrizer's basis functions (``BASIS_FUNCTIONS``) are replaced
+by a wrapper which keys each call by the content of its arguments (group
+representations, layer shapes, n_agents, ...), and stores the result as .npy
+files with a small JSON description.  Later constructions (in workers, the
+example subprocess, etc.) load them memory-mapped instead of recomputing.
+Opt-in: set ``RLPYT_BASIS_CACHE`` (or ``BASIS_CACHE_DIR``) to a directory.
+Entries are keyed by the symmetrizer version too, so an upgrade recomputes.
+The hook is symmetrizer's ``get_basis(size, group, new_size, space)``, which
+its basis layers call at construction (and import into their own module,
+hence the patching in every symmetrizer module).  A construction inside
+``basis_cache()`` which never calls it raises, so a symmetrizer without that
+hook fails loudly instead of silently running uncached.
+"""
+from contextlib import contextmanager
+import functools
+import hashlib
+import json
+import os
+import os.path as osp
+import sys
+
+import numpy as np
+import torch
+
+from rlpyt.utils.logging import logger
+
+BASIS_CACHE_DIR = os.environ.get("RLPYT_BASIS_CACHE", "")  # "": disabled.
+BASIS_FUNCTIONS = ("get_basis",)  # Patched in all loaded symmetrizer modules.
+cache_stats = dict(hits=0, misses=0)  # Calls served from / added to cache.
+
+
+@contextmanager
+def basis_cache(cache_dir=None):
+    """Serve basis computations from ``cache_dir`` (default
+    ``BASIS_CACHE_DIR``; an empty string disables caching).  Raises
+    RuntimeError if no loaded symmetrizer module has any of
+    ``BASIS_FUNCTIONS``, or if none of them was called in the block (nothing
+    was cached)."""
+    cache_dir = BASIS_CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir:
+        yield
+        return
+    patched = list()
+    found = False
+    for name, module in list(sys.modules.items()):
+        if module is None or not name.startswith("symmetrizer"):
+            continue
+        for fn_name in BASIS_FUNCTIONS:
+            fn = getattr(module, fn_name, None)
+            if not callable(fn):
+                continue
+            found = True
+            if not getattr(fn, "basis_cached", False):  # (Nested caches.)
+                setattr(module, fn_name, cached(fn, cache_dir))
+                patched.append((module, fn_name, fn))
+    if not found:
+        raise RuntimeError(f"Basis cache found none of {BASIS_FUNCTIONS} in "
+            "the loaded symmetrizer modules; update BASIS_FUNCTIONS for this "
+            "symmetrizer version, or disable the cache.")
+    n_calls = cache_stats["hits"] + cache_stats["misses"]
+    try:
+        yield
+    finally:
+        for module, fn_name, fn in patched:
+            setattr(module, fn_name, fn)
+    if patched and cache_stats["hits"] + cache_stats["misses"] == n_calls:
+        raise RuntimeError(f"Basis cache: none of {BASIS_FUNCTIONS} was "
+            "called during construction, so this symmetrizer computes bases "
+            "elsewhere; update BASIS_FUNCTIONS, or disable the cache.")
+
+
+def cached(fn, cache_dir):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        h = hashlib.sha1()
+        fingerprint((symmetrizer_version(), fn.__module__, fn.__qualname__,
+            args, kwargs), h)
+        path = osp.join(cache_dir, h.hexdigest())
+        if osp.exists(path + ".json"):
+            cache_stats["hits"] += 1
+            return load(path)
+        cache_stats["misses"] += 1
+        result = fn(*args, **kwargs)
+        try:
+            save(path, result)
+        except OSError as e:  # e.g. read-only directory: just don't cache.
+            logger.log(f"WARNING: could not write basis cache entry {path} "
+                f"({e}); computing bases without the cache.")
+        return result
+    wrapper.basis_cached = True
+    return wrapper
+
+
+def symmetrizer_version():
+    symmetrizer = sys.modules.get("symmetrizer")
+    return getattr(symmetrizer, "__version__", None)
+
+
+def fingerprint(obj, h):
+    """Feed the content of obj into hash h (no object ids or addresses)."""
+    if isinstance(obj, torch.Tensor):
+        obj = obj.detach().cpu().numpy()
+    if isinstance(obj, np.ndarray):
+        h.update(f"array{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for o in obj:
+            fingerprint(o, h)
+    elif isinstance(obj, dict):
+        h.update(f"dict{len(obj)}".encode())
+        for k in sorted(obj, key=repr):
+            fingerprint(k, h)
+            fingerprint(obj[k], h)
+    elif obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        h.update(f"{type(obj).__name__}{obj!r}".encode())
+    elif hasattr(obj, "__qualname__"):  # Function or class.
+        h.update(f"{obj.__module__}.{obj.__qualname__}".encode())
+    else:  # e.g. group: class and attributes (representations).
+        h.update(f"{type(obj).__module__}.{type(obj).__qualname__}".encode())
+        fingerprint(getattr(obj, "__dict__", repr(obj)), h)
+
+
+def save(path, result):
+    """Arrays to <path>.<i>.npy, description last to <path>.json (written
+    atomically, so concurrent workers never read a partial entry)."""
+    os.makedirs(osp.dirname(path), exist_ok=True)
+    single = not isinstance(result, (tuple, list))
+    items = list()
+    for i, value in enumerate([result] if single else result):
+        if isinstance(value, (torch.Tensor, np.ndarray)):
+            kind = "torch" if isinstance(value, torch.Tensor) else "numpy"
+            array = (value.detach().cpu().numpy() if kind == "torch" else
+                value)
+            fname = f"{osp.basename(path)}.{i}.npy"
+            tmp = osp.join(osp.dirname(path), f".{fname}.{os.getpid()}")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, osp.join(osp.dirname(path), fname))
+            items.append(dict(kind=kind, file=fname))
+        else:
+            if isinstance(value, np.generic):  # e.g. rank as np.int64.
+                value = value.item()
+            items.append(dict(kind="value", value=value))
+    tmp = f"{path}.json.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(dict(single=single, sequence=type(result).__name__,
+            items=items), f)
+    os.replace(tmp, path + ".json")
+
+
+def load(path):
+    with open(path + ".json") as f:
+        desc = json.load(f)
+    values = list()
+    for item in desc["items"]:
+        if item["kind"] == "value":
+            values.append(item["value"])
+            continue
+        # Copy-on-write map: pages shared between processes until written.
+        array = np.load(osp.join(osp.dirname(path), item["file"]),
+            mmap_mode="c")
+        values.append(torch.from_numpy(array) if item["kind"] == "torch"
+            else array)
+    if desc["single"]:
+        return values[0]
+    return list(values) if desc["sequence"] == "list" else tuple(values)
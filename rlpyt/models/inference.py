@@ -0,0 +1,75 @@
+
+import torch
+
+
+class InferenceExport:
+    """Frozen TorchScript copies of a model's forward, for sampling.
+    Freezing folds the parameters into constants, so any weights computed
+    from them (e.g. basis coefficients times the equivariant basis) are
+    materialized once per export instead of in every forward pass.  Traced
+    once per input shape; make a new one (or ``refresh()``) whenever the
+    weights change.  Only for models consuming just the observation (and
+    optional ``locs``), with fixed team size.  With ``check``, the trace is
+    checked (``check_trace``) on its inputs and on the same inputs rolled
+    along the batch, and the first later call of each export is compared
+    with the model on that call's own, fresh inputs, so data-dependent
+    logic frozen at the tracing inputs raises instead of silently giving
+    wrong outputs."""
+
+    def __init__(self, model, check=True):
+        model = getattr(model, "module", model)  # Unwrap DDP.
+        if getattr(model, "agent_counts", None) is not None:
+            raise ValueError("Cannot export a model with padded agents: team "
+                "sizes would be fixed in the trace.")
+        self.model = model
+        self.check = check
+        self._exported = dict()
+        self._unchecked = set()  # Exports not yet compared on fresh inputs.
+
+    def refresh(self):
+        self._exported.clear()
+        self._unchecked.clear()
+
+    @torch.no_grad()
+    def __call__(self, observation, prev_action, prev_reward, locs=None):
+        inputs = (observation,) if locs is None else (observation, locs)
+        key = tuple((tuple(x.shape), x.dtype, x.device) for x in inputs)
+        exported = self._exported.get(key)
+        if exported is None:
+            exported = self._exported[key] = self.export(inputs)
+            if self.check:
+                self._unchecked.add(key)
+            return exported(*inputs)
+        outputs = exported(*inputs)
+        if key in self._unchecked:
+            self.compare(outputs, ObservationForward(self.model)(*inputs))
+            self._unchecked.discard(key)
+        return outputs
+
+    def export(self, inputs):
+        forward = ObservationForward(self.model).eval()
+        check_inputs = [inputs, tuple(torch.roll(x, 1, dims=0)
+            for x in inputs)] if inputs[0].dim() > 0 else [inputs]
+        traced = torch.jit.trace(forward, inputs, check_trace=self.check,
+            check_inputs=check_inputs, check_tolerance=1e-4)
+        return torch.jit.freeze(traced)
+
+    def compare(self, outputs, expected):
+        for x, y in zip(outputs, expected):
+            if not torch.allclose(x, y, rtol=1e-4, atol=1e-6):
+                raise RuntimeError("Exported model outputs do not match the "
+                    "model on new inputs: is there data-dependent logic in "
+                    "the forward pass (pass it as an input, like locs)?")
+
+
+class ObservationForward(torch.nn.Module):
+    """Model forward with only tensor arguments, for tracing."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, observation, locs=None):
+        if locs is None:
+            return self.model(observation, None, None)
+        return self.model(observation, None, None, locs=locs)
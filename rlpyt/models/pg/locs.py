@@ -0,0 +1,14 @@
+
+import torch
+
+from rlpyt.utils.tensor import infer_leading_dims, restore_leading_dims
+
+
+def extract_locs(inputs, n_agents, get_locs):
+    """Agent coordinates from the location grid (last observation channel),
+    with the same leading dims as inputs: [T,B], [B], or [].  ``get_locs``
+    is the env's (symmetrizer ops) function for a [N,H,W] batch of grids."""
+    loc_grid = inputs[..., -1, :, :].type(torch.float)  # May be uint8.
+    lead_dim, T, B, grid_shape = infer_leading_dims(loc_grid, 2)
+    locs = get_locs(loc_grid.reshape(T * B, *grid_shape), n_agents)
+    return restore_leading_dims(locs, lead_dim, T, B)
@@ -0,0 +1,77 @@
+
+import torch
+import torch.nn.functional as F
+
+from rlpyt.models.utils import tie_parameters
+from rlpyt.utils.tensor import infer_leading_dims, restore_leading_dims
+
+
+def build_team_networks(make_network, agent_counts):
+    """One network per team size in ``agent_counts`` (``make_network(n)``),
+    keyed by ``str(n)``, all sharing the parameters of the first."""
+    networks = torch.nn.ModuleDict()
+    for n in sorted(set(agent_counts)):
+        network = make_network(n)
+        if len(networks) > 0:
+            tie_parameters(network, next(iter(networks.values())))
+        networks[str(n)] = network
+    return networks
+
+
+def team_sizes(agent_mask):
+    """Flattened agent mask [T*B,max_agents] and the team sizes present."""
+    agent_mask = agent_mask.reshape(-1, agent_mask.shape[-1])
+    team_size = agent_mask.sum(dim=-1)
+    return agent_mask, team_size, torch.unique(team_size).tolist()
+
+
+def masked_extract_locs(inputs, get_locs):
+    """Agent coordinates [...,max_agents,2] for a padded observation
+    (``grid``, ``agent_mask``); zero for padded agents."""
+    lead_dim, T, B, img_shape = infer_leading_dims(inputs.grid, 3)
+    loc_grid = inputs.grid.reshape(T * B, *img_shape)[:, -1].type(torch.float)
+    agent_mask, team_size, counts = team_sizes(inputs.agent_mask)
+    locs = torch.zeros(T * B, agent_mask.shape[-1], 2, dtype=torch.long,
+        device=loc_grid.device)
+    for n in counts:
+        rows = torch.nonzero(team_size == n).squeeze(-1)
+        locs[rows, :n] = get_locs(loc_grid[rows], n).long()
+    return restore_leading_dims(locs, lead_dim, T, B)
+
+
+def masked_agents_forward(networks, inputs, get_locs, agent_channels,
+        locs=None, log_softmax=False):
+    """Forward a padded multi-agent batch in one pass.  ``inputs`` holds the
+    ``grid`` ([...,max_agents*agent_channels+1,H,W], real agents first,
+    location grid last) and the ``agent_mask`` [...,max_agents].  Rows are
+    grouped by team size and each group runs through its network from
+    ``build_team_networks()``.  Padded agents get a constant policy (action
+    0) and zero value, so they add nothing to outputs, likelihood ratios or
+    gradients.  Returns pi [...,max_agents,A] (log-probabilities if
+    ``log_softmax``) and v [...,max_agents]."""
+    lead_dim, T, B, img_shape = infer_leading_dims(inputs.grid, 3)
+    grid = inputs.grid.reshape(T * B, *img_shape)
+    agent_mask, team_size, counts = team_sizes(inputs.agent_mask)
+    if locs is not None:
+        locs = locs.reshape(T * B, *locs.shape[-2:]).long()
+    pi = v = None
+    for n in counts:
+        rows = torch.nonzero(team_size == n).squeeze(-1)
+        img = grid[rows, :n * agent_channels].type(torch.float)
+        team_locs = (get_locs(grid[rows, -1].type(torch.float), n)
+            if locs is None else locs[rows, :n])
+        logits, value = networks[str(n)](team_locs, img)
+        if pi is None:
+            if log_softmax:  # Finite, so padded terms stay 0, not nan.
+                pi = logits.new_full((T * B, agent_mask.shape[-1],
+                    logits.shape[-1]), torch.finfo(logits.dtype).min)
+                pi[..., 0] = 0.
+            else:
+                pi = logits.new_zeros(T * B, agent_mask.shape[-1],
+                    logits.shape[-1])
+                pi[..., 0] = 1.
+            v = value.new_zeros(T * B, agent_mask.shape[-1])
+        pi[rows, :n] = (F.log_softmax if log_softmax else F.softmax)(logits,
+            dim=-1)
+        v[rows, :n] = value
+    return restore_leading_dims((pi, v), lead_dim, T, B)
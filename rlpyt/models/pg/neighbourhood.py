@@ -0,0 +1,119 @@
+
+import torch
+import torch.nn.functional as F
+
+from rlpyt.models.conv2d import Conv2dHeadModel
+from rlpyt.models.mlp import MlpModel
+from rlpyt.utils.tensor import infer_leading_dims, restore_leading_dims
+
+
+def knn_neighbours(locs, k, radius=None):
+    """For agent locations [N,n,2], each agent's k nearest other agents
+    [N,n,k] (nearest first) and which of them lie within ``radius`` (all, if
+    None).  Valid neighbours always come first."""
+    locs = locs.type(torch.float)
+    n = locs.shape[-2]
+    dist = torch.cdist(locs, locs)
+    dist.diagonal(dim1=-2, dim2=-1).fill_(float("inf"))  # Not own neighbour.
+    dist, neighbours = dist.topk(min(k, n - 1), dim=-1, largest=False)
+    valid = (torch.ones_like(dist, dtype=torch.bool) if radius is None else
+        dist <= radius)
+    return neighbours, valid
+
+
+def neighbour_edges(locs, k, radius=None):
+    """Edge list [2,E] (source, destination) of the k-nearest (within
+    ``radius``) neighbour graphs of a batch of agent locations [N,n,2], all
+    N graphs in one: agent i of sample b is node b*n+i.  E <= N*n*k."""
+    N, n = locs.shape[:2]
+    neighbours, valid = knn_neighbours(locs, k, radius)
+    offset = (torch.arange(N, device=locs.device) * n).view(N, 1, 1)
+    agent = torch.arange(n, device=locs.device).view(1, n, 1)
+    src = (neighbours + offset)[valid]
+    dst = (agent + offset).expand_as(neighbours)[valid]
+    return torch.stack([src, dst])
+
+
+class NeighbourhoodNetwork(torch.nn.Module):
+    """Decentralized network with one round of message passing over an edge
+    list (``neighbour_edges()``), for sparse communication.  Each agent
+    encodes its own view (conv layers and MLP) into h_i; each edge j->i
+    carries the message MLP([h_j, loc_j - loc_i]); each agent averages its
+    incoming messages and acts (policy logits, value) from [h_i, mean].
+    Cost is n encodings and E <= n*k messages per sample, instead of n**2
+    for all-to-all communication (which this network also does, with
+    k >= n - 1).  The steps are separate methods, so each agent can run its
+    own (see DecentralizedRuntime)."""
+
+    def __init__(
+            self,
+            image_shape,  # [H,W] of each agent's view.
+            n_actions,
+            channels=None,
+            kernel_sizes=None,
+            strides=None,
+            paddings=None,
+            hidden_sizes=[512],
+            ):
+        super().__init__()
+        self.encoder = Conv2dHeadModel(
+            image_shape=(1,) + tuple(image_shape[-2:]),
+            channels=channels or [16, 32],
+            kernel_sizes=kernel_sizes or [3, 3],
+            strides=strides or [1, 1],
+            paddings=paddings,
+            hidden_sizes=hidden_sizes,
+        )
+        size = self.encoder.output_size
+        self.message_mlp = MlpModel(size + 2, [size])
+        self.pi = torch.nn.Linear(2 * size, n_actions)
+        self.value = torch.nn.Linear(2 * size, 1)
+
+    def encode(self, image):
+        """Agents' views [M,H,W] to their states h [M,S]."""
+        return self.encoder(image.unsqueeze(1))
+
+    def message(self, h_src, offset):
+        """Messages [E,S] of source states [E,S], with the sources'
+        locations relative to their destinations [E,2]."""
+        return self.message_mlp(torch.cat([h_src, offset.type(h_src.dtype)],
+            dim=-1))
+
+    def act(self, h, message):
+        """Policy logits [M,A] and values [M] from states and mean incoming
+        messages [M,S] (zeros if none)."""
+        z = torch.cat([h, message], dim=-1)
+        return self.pi(z), self.value(z).squeeze(-1)
+
+    def forward(self, locs, image, edges):
+        """Logits [N,n,A] and values [N,n] from locations [N,n,2], views
+        [N,n,H,W] and edges [2,E] between the N*n agents."""
+        N, n = locs.shape[:2]
+        h = self.encode(image.reshape(N * n, *image.shape[-2:]))
+        locs = locs.reshape(N * n, 2)
+        src, dst = edges
+        messages = self.message(h[src], locs[src] - locs[dst])
+        total = h.new_zeros(N * n, messages.shape[-1]).index_add_(0, dst,
+            messages)
+        count = torch.bincount(dst, minlength=N * n).clamp(min=1)
+        logits, value = self.act(h, total / count.unsqueeze(-1).type(h.dtype))
+        return logits.view(N, n, -1), value.view(N, n)
+
+
+def neighbourhood_forward(network, inputs, get_locs, k, radius=None,
+        locs=None, log_softmax=False):
+    """Sparse communication: each agent only receives messages from its k
+    nearest neighbours (within ``radius``), over one edge list for all T*B
+    samples, through ``network`` (a NeighbourhoodNetwork).  Inputs are
+    [...,n+1,H,W]: one view per agent, then the location grid.  Returns pi
+    [...,n,A] (log-probabilities if ``log_softmax``) and v [...,n]."""
+    lead_dim, T, B, img_shape = infer_leading_dims(inputs, 3)
+    N, n = T * B, img_shape[0] - 1
+    inputs = inputs.reshape(N, *img_shape)
+    if locs is None:
+        locs = get_locs(inputs[:, -1].type(torch.float), n)
+    locs = locs.reshape(N, n, 2).long()
+    edges = neighbour_edges(locs, k, radius)
+    logits, v = network(locs, inputs[:, :-1].type(torch.float), edges)
+    pi = (F.log_softmax if log_softmax else F.softmax)(logits, dim=-1)
+    return restore_leading_dims((pi, v), lead_dim, T, B)
@@ -1,6 +1,10 @@
 import torch
 import torch.nn.functional as F
 
+from rlpyt.models.basis_cache import basis_cache
+from rlpyt.models.pg.masked_agents import (build_team_networks,
+    masked_agents_forward, masked_extract_locs)
+from rlpyt.models.pg.locs import extract_locs
 from rlpyt.utils.tensor import infer_leading_dims, restore_leading_dims
 from symmetrizer.nn.traffic_networks import StandardDecentralizedModel, \
     BasisDecentralizedModel
@@ -9,6 +13,8 @@ from symmetrizer.ops.traffic_ops import get_locs
 
 class TrafficGraphModel(torch.nn.Module):
 
+    agent_input_fields = ("observation",)  # prev_action, prev_reward unused.
+
     def __init__(
             self,
             image_shape,
@@ -19,29 +25,53 @@ class TrafficGraphModel(torch.nn.Module):
             strides=None,
             paddings=None,
             basis=None,
+            n_agents=4,
+            agent_counts=None,  # Team sizes, for padded observations.
+            log_softmax=False,  # Output log-probabilities instead.
             ):
         super().__init__()
-        self.conv = StandardDecentralizedModel(3, n_agents=4,
-                                               channels=channels,
-                                               filters=kernel_sizes,
-                                               strides=strides,
-                                               paddings=paddings,
-                                               hidden_sizes=fc_sizes)
 
-    def forward(self, inputs, prev_action, prev_reward, imshow=False):
+        def make_network(n):
+            return StandardDecentralizedModel(3, n_agents=n,
+                                              channels=channels,
+                                              filters=kernel_sizes,
+                                              strides=strides,
+                                              paddings=paddings,
+                                              hidden_sizes=fc_sizes)
+        if agent_counts is None:
+            self.conv = make_network(n_agents)
+        else:  # One network per team size, shared parameters.
+            self.convs = build_team_networks(make_network, agent_counts)
+            n_agents = max(agent_counts)
+        self.n_agents = n_agents
+        self.agent_counts = agent_counts
+        self.log_softmax = log_softmax
+
+    def forward(self, inputs, prev_action, prev_reward, imshow=False,
+            locs=None):
         """Feedforward layers process as [T*B,H]. Return same leading dims as
-        input, can be [T,B], [B], or []."""
+        input, can be [T,B], [B], or []. Agent coordinates can be passed in
+        as ``locs`` (from ``extract_locs()``) instead of recomputed.  With
+        ``agent_counts``, inputs are padded observations (grid, agent_mask).
+        With ``log_softmax``, pi holds log-probabilities."""
+        if self.agent_counts is not None:
+            return masked_agents_forward(self.convs, inputs, get_locs, 3,
+                locs, self.log_softmax)
         if len(inputs.shape) == 3:
             inputs = inputs.unsqueeze(0)
+            locs = None if locs is None else locs.unsqueeze(0)
         image = inputs[:, :-1]
-        loc_grid = inputs[:, -1]
-        locs = get_locs(loc_grid, 4)
+        if locs is None:
+            locs = self.extract_locs(inputs)
+        else:
+            locs = locs.long()
         img = image.type(torch.float)  # Expect torch.uint8 inputs
 
         # Infer (presence of) leading dimensions: [T,B], [B], or [].
         lead_dim, T, B, img_shape = infer_leading_dims(img, 3)
         fc_out = self.conv(locs, img.view(T * B, *img_shape))
-        pi = F.softmax(fc_out[0], dim=-1)
+        pi = (F.log_softmax if self.log_softmax else F.softmax)(fc_out[0],
+            dim=-1)
         v = fc_out[1]
 
         pi = pi.squeeze(0)
@@ -51,9 +81,16 @@ class TrafficGraphModel(torch.nn.Module):
         pi, v = restore_leading_dims((pi, v), lead_dim, T, B)
         return pi, v
 
+    def extract_locs(self, inputs):
+        if self.agent_counts is not None:
+            return masked_extract_locs(inputs, get_locs)
+        return extract_locs(inputs, self.n_agents, get_locs)
+
 
 class TrafficBasisGraphModel(torch.nn.Module):
 
+    agent_input_fields = ("observation",)  # prev_action, prev_reward unused.
+
     def __init__(
             self,
             image_shape,
@@ -64,30 +101,62 @@ class TrafficBasisGraphModel(torch.nn.Module):
             strides=None,
             paddings=None,
             basis=None,
+            n_agents=4,
+            agent_counts=None,  # Team sizes, for padded observations.
+            log_softmax=False,  # Output log-probabilities instead.
             ):
         super().__init__()
-        self.conv = BasisDecentralizedModel(3, n_agents=4, channels=channels,
-                                            filters=kernel_sizes,
-                                            strides=strides, paddings=paddings,
-                                            hidden_sizes=fc_sizes,
-                                            basis=basis)
 
-    def forward(self, inputs, prev_action, prev_reward, imshow=False):
+        def make_network(n):
+            with basis_cache():  # Load basis if computed before.
+                return BasisDecentralizedModel(3, n_agents=n,
+                                               channels=channels,
+                                               filters=kernel_sizes,
+                                               strides=strides,
+                                               paddings=paddings,
+                                               hidden_sizes=fc_sizes,
+                                               basis=basis)
+        if agent_counts is None:
+            self.conv = make_network(n_agents)
+        else:  # One network per team size, shared parameters.
+            self.convs = build_team_networks(make_network, agent_counts)
+            n_agents = max(agent_counts)
+        self.n_agents = n_agents
+        self.agent_counts = agent_counts
+        self.log_softmax = log_softmax
+
+    def forward(self, inputs, prev_action, prev_reward, imshow=False,
+            locs=None):
         """Feedforward layers process as [T*B,H]. Return same leading dims as
-        input, can be [T,B], [B], or []."""
+        input, can be [T,B], [B], or []. Agent coordinates can be passed in
+        as ``locs`` (from ``extract_locs()``) instead of recomputed.  With
+        ``agent_counts``, inputs are padded observations (grid, agent_mask).
+        With ``log_softmax``, pi holds log-probabilities."""
+        if self.agent_counts is not None:
+            return masked_agents_forward(self.convs, inputs, get_locs, 3,
+                locs, self.log_softmax)
         if len(inputs.shape) == 3:
             inputs = inputs.unsqueeze(0)
+            locs = None if locs is None else locs.unsqueeze(0)
         image = inputs[:, :-1]
-        loc_grid = inputs[:, -1]
-        locs = get_locs(loc_grid, 4)
+        if locs is None:
+            locs = self.extract_locs(inputs)
+        else:
+            locs = locs.long()
         img = image.type(torch.float)  # Expect torch.uint8 inputs
 
         # Infer (presence of) leading dimensions: [T,B], [B], or [].
         lead_dim, T, B, img_shape = infer_leading_dims(img, 3)
         fc_out = self.conv(locs, img.view(T * B, *img_shape))
-        pi = F.softmax(fc_out[0], dim=-1).squeeze(0)
+        pi = (F.log_softmax if self.log_softmax else F.softmax)(fc_out[0],
+            dim=-1).squeeze(0)
         v = fc_out[1].squeeze()
 
         # Restore leading dimensions: [T,B], [B], or [], as input.
         pi, v = restore_leading_dims((pi, v), lead_dim, T, B)
         return pi, v
+
+    def extract_locs(self, inputs):
+        if self.agent_counts is not None:
+            return masked_extract_locs(inputs, get_locs)
+        return extract_locs(inputs, self.n_agents, get_locs)
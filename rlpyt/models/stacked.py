@@ -0,0 +1,73 @@
+
+import copy
+
+import torch
+from torch.func import functional_call, stack_module_state, vmap
+
+from rlpyt.utils.buffer import buffer_func
+
+
+class StackedModels(torch.nn.Module):
+    """N independent models of one architecture as one module: parameters
+    and buffers stacked along a new leading dim [N,...], so a forward and
+    backward of all N is one batched computation (torch.func vmap over
+    functional_call).  An elementwise optimizer (e.g. Adam) on the stacked
+    parameters keeps independent state per model.  The given models are not
+    modified; copy_to_models() writes the stacked values back into them."""
+
+    def __init__(self, models):
+        super().__init__()
+        params, buffers = stack_module_state(models)
+        self.n_models = len(models)
+        self._param_names = list(params)
+        self._buffer_names = list(buffers)
+        self.params = torch.nn.ParameterList([torch.nn.Parameter(p.detach())
+            for p in params.values()])
+        for i, b in enumerate(buffers.values()):
+            self.register_buffer(f"stacked_buffer_{i}", b)
+        self._models = list(models)  # (Plain attributes, not submodules.)
+        self._base = [copy.deepcopy(models[0]).to("meta")]  # Structure only.
+
+    def train(self, mode=True):
+        super().train(mode)
+        self._base[0].train(mode)  # Used by functional_call.
+        return self
+
+    def vmap(self, func, *args):
+        """Returns func(model, *args) for all N models at once: each of args
+        with a leading [N] dim (None fields allowed), seen by func without it,
+        and ``model`` calls that model.  Outputs get a leading [N] dim."""
+        params = dict(zip(self._param_names, self.params))
+        buffers = dict(zip(self._buffer_names, self.buffers()))
+        base = self._base[0]
+
+        def model_func(params, buffers, *args):
+            model = lambda *a, **k: functional_call(base, (params, buffers),
+                a, k)
+            return func(model, *args)
+
+        in_dims = (0, 0) + tuple(buffer_func(a, lambda x: 0) for a in args)
+        return vmap(model_func, in_dims=in_dims)(params, buffers, *args)
+
+    def forward(self, *args, **kwargs):
+        """Inputs and outputs with a leading [N] dim."""
+        keys = list(kwargs)
+        n_args = len(args)
+        return self.vmap(lambda model, *a: model(*a[:n_args],
+            **dict(zip(keys, a[n_args:]))), *args, *kwargs.values())
+
+    @torch.no_grad()
+    def copy_to_models(self):
+        for i, model in enumerate(self._models):
+            for name, p in zip(self._param_names, self.params):
+                model.get_parameter(name).copy_(p[i])
+            for name, b in zip(self._buffer_names, self.buffers()):
+                model.get_buffer(name).copy_(b[i])
+
+    @torch.no_grad()
+    def copy_from_models(self):
+        for i, model in enumerate(self._models):
+            for name, p in zip(self._param_names, self.params):
+                p[i].copy_(model.get_parameter(name))
+            for name, b in zip(self._buffer_names, self.buffers()):
+                b[i].copy_(model.get_buffer(name))
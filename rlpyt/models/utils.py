@@ -52,3 +52,17 @@ def strip_ddp_state_dict(state_dict):
         key = k[7:] if k[:7] == "module." else k
         clean_state_dict[key] = v
     return clean_state_dict
+
+
+def tie_parameters(module, reference):
+    """Replace every parameter of ``module`` by the same-named parameter of
+    ``reference``, e.g. to share one set of weights between copies of a
+    network built for different numbers of agents."""
+    shared = dict(reference.named_parameters())
+    for name, param in list(module.named_parameters()):
+        if name not in shared or shared[name].shape != param.shape:
+            raise ValueError(f"Cannot tie parameter '{name}' of shape "
+                f"{tuple(param.shape)} to reference.")
+        owner_name, _, param_name = name.rpartition(".")
+        owner = module.get_submodule(owner_name) if owner_name else module
+        setattr(owner, param_name, shared[name])
@@ -0,0 +1,101 @@
+
+from rlpyt.runners.minibatch_rl import MinibatchRl
+from rlpyt.runners.pipelined_rl import PipelinedRl
+from rlpyt.utils.logging import logger
+from rlpyt.utils.seed import make_seed
+
+
+class BackgroundEvalMixin:
+    """Tracks performance offline, like the Eval runners, but without pausing
+    training: at each log interval, a snapshot of the agent's weights goes to
+    an EvalService, which evaluates it in its own processes.  Finished
+    evaluations are logged under ``Eval/`` at the next log interval, one row
+    each, with ``EvalIteration``, the iteration of its snapshot (the latest
+    in the row of the interval), and the last ones after training.  Training trajectories are logged as by
+    MinibatchRl."""
+
+    def __init__(self, eval_service, **kwargs):
+        super().__init__(**kwargs)
+        self.eval_service = eval_service
+
+    def startup(self):
+        if self.seed is None:
+            self.seed = make_seed()
+        # Forks the eval workers before the agent is initialized.
+        self.eval_service.initialize(self.agent, seed=self.seed + 2,
+            traj_info_kwargs=self.get_traj_info_kwargs())
+        n_itr = super().startup()
+        self.submit_evaluation(0)
+        return n_itr
+
+    def initialize_logging(self):
+        super().initialize_logging()
+        self._cum_eval_time = 0
+        self._cum_eval_skipped = 0
+
+    def submit_evaluation(self, itr):
+        if itr < self.min_itr_learn - 1 and itr != 0:
+            return
+        if not self.eval_service.submit(itr, self.agent.state_dict()):
+            self._cum_eval_skipped += 1
+            logger.log(f"Eval workers busy, skipped evaluation of itr {itr}.")
+
+    def log_diagnostics(self, itr):
+        evaluations = self.eval_service.poll()  # (Frees workers first.)
+        self.submit_evaluation(itr)
+        self.record_evaluation(evaluations)
+        super().log_diagnostics(itr)
+
+    def record_evaluation(self, evaluations):
+        """Records each of ``evaluations`` (itr, traj_infos, eval_time) in a
+        row of its own, in order of itr: all but the last dumped here (by
+        dump_eval_row()), the last left in the row being recorded (NaN if
+        none, so every row has the same keys)."""
+        evaluations = sorted(evaluations, key=lambda e: e[0])
+        for evaluation in evaluations[:-1]:
+            self.record_eval_row(*evaluation)
+            self.dump_eval_row()
+        self.record_eval_row(*(evaluations[-1] if evaluations else
+            (float('nan'), None, float('nan'))))
+
+    def record_eval_row(self, eval_itr, traj_infos, eval_time):
+        if traj_infos is not None:
+            self._cum_eval_time += eval_time
+            logger.log(f"Evaluation of itr {eval_itr} complete: "
+                f"{len(traj_infos)} trajectories in {eval_time:.1f} s.")
+            if not traj_infos:
+                logger.log("WARNING: had no complete trajectories in eval.")
+        logger.record_tabular('EvalIteration', eval_itr)
+        logger.record_tabular('EvalTime', eval_time)
+        logger.record_tabular('CumuEvalTime', self._cum_eval_time)
+        logger.record_tabular('CumuEvalSkipped', self._cum_eval_skipped)
+        with logger.tabular_prefix("Eval/"):
+            for k in self.eval_service.TrajInfoCls():
+                if not k.startswith("_"):
+                    logger.record_tabular_misc_stat(k,
+                        [info[k] for info in traj_infos or []])
+
+    def dump_eval_row(self):
+        """Dumps a row of evaluation keys only, NaN for the other keys of the
+        last row."""
+        recorded = set(logger.get_tabular_keys())
+        for k in logger.get_last_tabular_keys():
+            if k not in recorded:
+                logger.record_tabular(k, float('nan'))
+        logger.dump_tabular(with_prefix=False)
+
+    def shutdown(self):
+        super().shutdown()
+        logger.log("Waiting for pending evaluations...")
+        evaluations = self.eval_service.shutdown()
+        if evaluations:
+            self.record_evaluation(evaluations)
+            self.dump_eval_row()
+
+
+class MinibatchRlBackgroundEval(BackgroundEvalMixin, MinibatchRl):
+    pass
+
+
+class PipelinedRlBackgroundEval(BackgroundEvalMixin, PipelinedRl):
+    pass
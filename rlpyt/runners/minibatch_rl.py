@@ -64,8 +64,10 @@ class MinibatchRlBase(BaseRunner):
         self.itr_batch_size = self.sampler.batch_spec.size * world_size
         n_itr = self.get_n_itr()
         self.agent.to_device(self.affinity.get("cuda_idx", None))
-        if world_size > 1:
-            self.agent.data_parallel()
+        if getattr(self, "max_policy_lag", 0) > 0:  # Sampling overlaps training.
+            self.agent.async_cpu(share_memory=False)
+        if world_size > 1:  # Gradients all-reduced across ranks.
+            self.agent.data_parallel(getattr(self, "bucket_cap_mb", 25))
         self.algo.initialize(
             agent=self.agent,
             n_itr=n_itr,
@@ -0,0 +1,53 @@
+
+from collections import deque
+
+from rlpyt.runners.minibatch_rl import MinibatchRlBase, MinibatchRl
+from rlpyt.utils.logging import logger
+
+
+class MinibatchRlMultiSeed(MinibatchRl):
+    """Runs N independent seeds of one experiment in one process, with a
+    MultiSeedAgent, MultiSeedSampler and MultiSeedMAPPO; tracks performance
+    online using learning trajectories, with a trajectory window and
+    diagnostics per seed, logged under ``Seed<i>/`` prefixes.  Steps are
+    counted per seed."""
+
+    def initialize_logging(self):
+        super().initialize_logging()
+        n = self.agent.n_seeds
+        self._seed_traj_infos = [deque(maxlen=self.log_traj_window)
+            for _ in range(n)]
+        self._seed_new_completed_trajs = [0] * n
+        self._seed_opt_infos = [{k: list() for k in self.algo.opt_info_fields}
+            for _ in range(n)]
+        self._opt_infos = dict()  # (Per seed instead.)
+
+    def store_diagnostics(self, itr, traj_infos, opt_info):
+        for i, (seed_traj_infos, seed_opt_info) in enumerate(
+                zip(traj_infos, opt_info)):
+            self._seed_new_completed_trajs[i] += len(seed_traj_infos)
+            self._seed_traj_infos[i].extend(seed_traj_infos)
+            for k, v in self._seed_opt_infos[i].items():
+                new_v = getattr(seed_opt_info, k, [])
+                v.extend(new_v if isinstance(new_v, list) else [new_v])
+        self._cum_completed_trajs += sum(len(t) for t in traj_infos)
+        self.pbar.update((itr + 1) % self.log_interval_itrs)
+
+    def log_diagnostics(self, itr):
+        for i, traj_infos in enumerate(self._seed_traj_infos):
+            with logger.tabular_prefix(f"Seed{i}/"):
+                logger.record_tabular('NewCompletedTrajs',
+                    self._seed_new_completed_trajs[i])
+                logger.record_tabular('StepsInTrajWindow',
+                    sum(info["Length"] for info in traj_infos))
+                if traj_infos:
+                    for k in traj_infos[0]:
+                        if not k.startswith("_"):
+                            logger.record_tabular_misc_stat(k,
+                                [info[k] for info in traj_infos])
+                for k, v in self._seed_opt_infos[i].items():
+                    logger.record_tabular_misc_stat(k, v)
+            self._seed_new_completed_trajs[i] = 0
+            self._seed_opt_infos[i] = {k: list()
+                for k in self._seed_opt_infos[i]}
+        MinibatchRlBase.log_diagnostics(self, itr)
@@ -0,0 +1,80 @@
+
+from rlpyt.runners.minibatch_rl import MinibatchRl, MinibatchRlEval
+from rlpyt.utils.logging import logger
+
+
+class PipelinedRlMixin:
+    """On-policy minibatch RL with sampling overlapped with optimization:
+    while the algorithm trains on the batch of iteration itr, the workers
+    already collect the batch of itr+1, with the weights from before that
+    update (policy lag of one iteration).  The algorithm's likelihood ratio
+    is taken against the behaviour ``dist_info`` stored in the samples, so
+    the lag is corrected for like any other off-policyness within the PPO
+    clip.  Needs a sampler with start_samples() and finish_samples(), and two
+    sample buffers, e.g. PipelinedCpuSampler.  With ``max_policy_lag=0``, runs
+    sequentially as the parent runner.  On CPU, the learner trains its own
+    copy of the model, sent to the workers only between batches."""
+
+    def __init__(self, max_policy_lag=1, **kwargs):
+        super().__init__(**kwargs)
+        if max_policy_lag not in (0, 1):
+            raise ValueError("Two sample buffers allow max_policy_lag of 0 or "
+                f"1, not {max_policy_lag}.")
+        self.max_policy_lag = max_policy_lag
+
+    def startup(self):
+        if self.max_policy_lag > 0 and not hasattr(self.sampler,
+                "start_samples"):
+            raise TypeError("max_policy_lag > 0 needs a sampler with "
+                "start_samples(), e.g. PipelinedCpuSampler, not "
+                f"{type(self.sampler).__name__}.")
+        return super().startup()
+
+    def train(self):
+        n_itr = self.startup()
+        if self._eval:
+            with logger.prefix("itr #0 "):
+                eval_traj_infos, eval_time = self.evaluate_agent(0)
+                self.log_diagnostics(0, eval_traj_infos, eval_time)
+        self.start_samples(0)
+        for itr in range(n_itr):
+            with logger.prefix(f"itr #{itr} "):
+                samples, traj_infos = self.finish_samples()
+                log = (itr + 1) % self.log_interval_itrs == 0
+                # Workers must be idle for evaluation.
+                overlap = self.max_policy_lag > 0 and not (log and self._eval)
+                if overlap and itr + 1 < n_itr:
+                    self.start_samples(itr + 1)  # With weights before update.
+                self.agent.train_mode(itr)
+                opt_info = self.algo.optimize_agent(itr, samples)
+                self.store_diagnostics(itr, traj_infos, opt_info)
+                if log:
+                    if self._eval:
+                        eval_traj_infos, eval_time = self.evaluate_agent(itr)
+                        self.log_diagnostics(itr, eval_traj_infos, eval_time)
+                    else:
+                        self.log_diagnostics(itr)
+                if not overlap and itr + 1 < n_itr:
+                    self.start_samples(itr + 1)
+        self.shutdown()
+
+    def start_samples(self, itr):
+        self.agent.sample_mode(itr)  # Might not be this agent sampling.
+        if self.max_policy_lag > 0:
+            self.sampler.start_samples(itr)
+        else:
+            self._samples = self.sampler.obtain_samples(itr)
+
+    def finish_samples(self):
+        if self.max_policy_lag > 0:
+            return self.sampler.finish_samples()
+        samples, self._samples = self._samples, None
+        return samples
+
+
+class PipelinedRl(PipelinedRlMixin, MinibatchRl):
+    pass
+
+
+class PipelinedRlEval(PipelinedRlMixin, MinibatchRlEval):
+    pass
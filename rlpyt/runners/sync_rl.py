@@ -16,6 +16,14 @@ from rlpyt.utils.synchronize import drain_queue, find_port
 
 
 class SyncRlMixin:
+    """One runner per rank (from the list of affinities), each with its own
+    sampler over its share of the environments; the agent is data-parallel
+    (torch.distributed, gloo on CPU), with gradients all-reduced in buckets
+    of ``bucket_cap_mb``."""
+
+    def __init__(self, bucket_cap_mb=25, **kwargs):
+        super().__init__(**kwargs)
+        self.bucket_cap_mb = bucket_cap_mb
 
     def startup(self):
         self.launch_workers()
@@ -42,6 +50,7 @@ class SyncRlMixin:
             seed=self.seed + 100 * rank,
             affinity=self.affinities[rank],
             log_interval_steps=self.log_interval_steps,
+            bucket_cap_mb=self.bucket_cap_mb,
             rank=rank,
             world_size=world_size,
             port=port,
@@ -60,6 +69,12 @@ class SyncRlMixin:
             init_method=f"tcp://127.0.0.1:{port}",
         )
 
+    def shutdown(self):
+        super().shutdown()
+        for w in self.workers:
+            w.join()
+        torch.distributed.destroy_process_group()
+
     def build_par_objs(self, world_size):
         barrier = mp.Barrier(world_size)
         traj_infos_queue = mp.Queue()
@@ -108,6 +123,7 @@ class SyncWorkerMixin:
             seed,
             affinity,
             log_interval_steps,
+            bucket_cap_mb,
             rank,
             world_size,
             port,
@@ -132,6 +148,7 @@ class SyncWorkerMixin:
 
     def shutdown(self):
         self.sampler.shutdown()
+        torch.distributed.destroy_process_group()
 
 
 class SyncWorker(SyncWorkerMixin, MinibatchRl):
@@ -139,7 +156,7 @@ class SyncWorker(SyncWorkerMixin, MinibatchRl):
     def store_diagnostics(self, itr, traj_infos, opt_info):
         for traj_info in traj_infos:
             self.par.traj_infos_queue.put(traj_info)
-        # Leave worker opt_info un-recorded.
+        # Leave worker opt_info un-recorded (master's is the mean of ranks).
 
     def log_diagnostics(self, *args, **kwargs):
         pass
@@ -54,7 +54,8 @@ class AsyncSerialSampler(AsyncSamplerMixin, BaseSampler):
         self.agent.async_cpu(share_memory=False)
 
         agent_inputs, traj_infos = collector.start_envs(
-            self.max_decorrelation_steps)
+            self.max_decorrelation_steps, self.decorrelation_mode,
+            self.decorrelation_kwargs)
         collector.start_agent()
 
         self.collector = collector
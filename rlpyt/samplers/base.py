@@ -17,6 +17,8 @@ class BaseSampler:
             batch_B,
             CollectorCls,
             max_decorrelation_steps=100,
+            decorrelation_mode="serial",  # Or "pool", "snapshot".
+            decorrelation_kwargs=None,  # e.g. n_workers, path.
             TrajInfoCls=TrajInfo,
             eval_n_envs=0,  # 0 for no eval setup.
             eval_CollectorCls=None,  # Must supply if doing eval.
@@ -1,6 +1,8 @@
 
 from collections import namedtuple
 
+import numpy as np
+
 from rlpyt.utils.collections import namedarraytuple, AttrDict
 
 
@@ -73,3 +75,72 @@ class TrajInfo(AttrDict):
         #print("terminating from", self.scapt, self.fcapt, self.colliders,
         #      self.Return, self.Length)
         return self
+
+
+class VecTrajInfo:
+    """TrajInfo statistics of B envs' current trajectories, as arrays [B,...]
+    (e.g. Return [B,n_agents] for per-agent rewards), each updated with one
+    vector operation per step instead of B TrajInfo.step() calls.
+    ``terminate(mask)`` returns TrajInfoCls records of the trajectories
+    ending, as TrajInfo.terminate() would, and starts new ones.  Mirrors
+    TrajInfo: a TrajInfoCls with other fields needs a matching subclass."""
+
+    _env_info_fields = ("scapt", "fcapt", "colliders", "wait_time",
+        "sim_time")
+
+    def __init__(self, B, TrajInfoCls=TrajInfo):
+        self.B = B
+        self.TrajInfoCls = TrajInfoCls
+        self._discount = TrajInfoCls._discount  # (Set by sampler, if given.)
+        self._fields = [k for k in TrajInfoCls() if not k.startswith("_")]
+        self._values = None  # Built at first step, from its shapes.
+
+    def _build(self, reward, env_info):
+        shapes = dict(Return=np.shape(reward), NonzeroRewards=np.shape(reward),
+            DiscountedReturn=np.shape(reward))
+        for k in self._env_info_fields:
+            if getattr(env_info, k, None) is not None:
+                shapes[k] = np.shape(getattr(env_info, k))
+        self._values = {k: np.zeros(shapes.get(k, self.B))
+            for k in self._fields}
+        self._cur_discount = np.ones(self.B)
+
+    def step(self, observation, action, reward, done, agent_info, env_info):
+        """All args with leading [B] dim; only reward and env_info used."""
+        if self._values is None:
+            self._build(reward, env_info)
+        v = self._values
+        reward = np.asarray(reward)
+        discount = self._cur_discount.reshape((self.B,) +
+            (1,) * (reward.ndim - 1))
+        v["Length"] += 1
+        v["Return"] += reward
+        v["NonzeroRewards"] += reward != 0
+        v["DiscountedReturn"] += discount * reward
+        self._cur_discount *= self._discount
+        for k in self._env_info_fields:
+            value = getattr(env_info, k, None)
+            if value is not None:
+                v[k] += value
+
+    def terminate(self, mask):
+        """TrajInfoCls records of envs where ``mask`` [B] (bool) is True, whose
+        statistics are then reset for new trajectories."""
+        traj_infos = list()
+        for b in np.flatnonzero(mask):
+            traj_info = self.TrajInfoCls()
+            for k, value in self._values.items():
+                traj_info[k] = (value[b].copy() if value.ndim > 1 else
+                    value[b].item())
+            traj_infos.append(traj_info.terminate(None))
+        self.reset(mask)
+        return traj_infos
+
+    def reset(self, mask=None):
+        """New trajectories for all envs, or those where ``mask`` is True."""
+        if self._values is None:
+            return
+        idxs = slice(None) if mask is None else np.asarray(mask, dtype=bool)
+        for value in self._values.values():
+            value[idxs] = 0
+        self._cur_discount[idxs] = 1
@@ -1,8 +1,14 @@
+import multiprocessing as mp
+import os
+import pickle
 
 import numpy as np
 
 from rlpyt.agents.base import AgentInputs
-from rlpyt.utils.buffer import buffer_from_example, torchify_buffer, numpify_buffer
+from rlpyt.envs.vector import as_vec_env, any_done
+from rlpyt.samplers.collections import VecTrajInfo
+from rlpyt.utils.buffer import (buffer_from_example, torchify_buffer,
+    numpify_buffer, buffer_method)
 from rlpyt.utils.logging import logger
 from rlpyt.utils.quick_args import save__init__args
 
@@ -68,8 +74,17 @@ class BaseEvalCollector:
 
 class DecorrelatingStartCollector(BaseCollector):
 
-    def start_envs(self, max_decorrelation_steps=0):
-        """Calls reset() on every env and returns agent_inputs buffer."""
+    def start_envs(self, max_decorrelation_steps=0, decorrelation_mode="serial",
+            decorrelation_kwargs=None):
+        """Calls reset() on every env and returns agent_inputs buffer.  Each
+        env then takes 1 to ``max_decorrelation_steps`` random steps, by
+        ``decorrelation_mode``: "serial", one env after another; "pool", envs
+        sent to a process pool of ``n_workers`` (default: all CPUs) and back
+        (envs must pickle); or "snapshot", each env restored from a file of
+        decorrelated envs of its global env rank, written by the first run
+        (``path`` prefix; must differ per env config), then reseeded from
+        this run's seed (see ``reseed_env()``).  ``decorrelation_kwargs``
+        holds ``n_workers`` and ``path``."""
         traj_infos = [self.TrajInfoCls() for _ in range(len(self.envs))]
         observations = list()
         n_agents = self.envs[0].n_agents
@@ -85,22 +100,11 @@ class DecorrelatingStartCollector(BaseCollector):
             logger.log("Sampler decorrelating envs, max steps: "
                 f"{max_decorrelation_steps}")
         if max_decorrelation_steps != 0:
-            for b, env in enumerate(self.envs):
-                n_steps = 1 + int(np.random.rand() * max_decorrelation_steps)
-                for _ in range(n_steps):
-                    a = env.action_space.sample()
-                    o, r, d, info = env.step(a)
-                    traj_infos[b].step(o, a, r, d, None, info)
-                    if type(d) == list:
-                        check_done = d[0]
-                    else:
-                        check_done = d
-                    if getattr(info, "traj_done", check_done):
-                        o = env.reset()
-                        traj_infos[b] = self.TrajInfoCls()
-                    if check_done:
-                        a = env.action_space.null_value()
-                        r = 0
+            states = self.decorrelate(max_decorrelation_steps, traj_infos,
+                decorrelation_mode, **(decorrelation_kwargs or dict()))
+            for b, (env, o, a, r, traj_info) in enumerate(states):
+                self.envs[b] = env  # (In place, same list as the sampler's.)
+                traj_infos[b] = traj_info
                 observation[b] = o
                 prev_action[b] = a
                 prev_reward[b] = r
@@ -110,3 +114,139 @@ class DecorrelatingStartCollector(BaseCollector):
             self.step_buffer_np.action[:] = prev_action
             self.step_buffer_np.reward[:] = prev_reward
         return AgentInputs(observation, prev_action, prev_reward), traj_infos
+
+    def decorrelate(self, max_steps, traj_infos, mode="serial", n_workers=None,
+            path=None):
+        """Returns the (env, observation, prev_action, prev_reward, traj_info)
+        of each env after its random steps."""
+        if mode == "serial":
+            return [decorrelate_env(env, 1 + int(np.random.rand() * max_steps),
+                traj_info) for env, traj_info in zip(self.envs, traj_infos)]
+        elif mode == "pool":
+            B = len(self.envs)
+            n_steps = 1 + (np.random.rand(B) * max_steps).astype(int)
+            seeds = np.random.randint(2 ** 31, size=B)
+            with mp.Pool(n_workers) as pool:
+                return pool.starmap(decorrelate_env, zip(self.envs,
+                    n_steps.tolist(), traj_infos, seeds.tolist()))
+        elif mode == "snapshot":
+            if path is None:
+                raise ValueError("Snapshot decorrelation needs a path.")
+            B = len(self.envs)
+            env_ranks = (self.env_ranks if self.env_ranks is not None else
+                range(self.rank * B, (self.rank + 1) * B))
+            path = f"{path}_envs{env_ranks[0]}-{env_ranks[-1]}.pkl"
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    snapshot = pickle.load(f)
+                if len(snapshot) != B:
+                    raise ValueError(f"Snapshot {path} holds {len(snapshot)} "
+                        f"envs, not {B}; remove it or change path.")
+                seeds = np.random.randint(2 ** 31, size=B)
+                for (env, *_), seed in zip(snapshot, seeds.tolist()):
+                    reseed_env(env, seed)
+                logger.log(f"Restored decorrelated envs from {path}.")
+                return snapshot
+            states = self.decorrelate(max_steps, traj_infos,
+                "serial" if n_workers is None else "pool", n_workers)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                pickle.dump(states, f)
+            os.replace(path + ".tmp", path)  # Complete files only.
+            logger.log(f"Saved decorrelated envs to {path}.")
+            return states
+        raise ValueError(f"Unknown decorrelation_mode: {mode}.")
+
+
+def decorrelate_env(env, n_steps, traj_info, seed=None):
+    """Takes ``n_steps`` random steps in ``env``; returns (env, observation,
+    prev_action, prev_reward, traj_info) after them.  At module level, for
+    process pools, where a ``seed`` for numpy gives each env its own random
+    stream (instead of the one forked into all workers)."""
+    if seed is not None:
+        np.random.seed(seed)
+    for _ in range(n_steps):
+        a = env.action_space.sample()
+        o, r, d, info = env.step(a)
+        traj_info.step(o, a, r, d, None, info)
+        if type(d) == list:
+            check_done = d[0]
+        else:
+            check_done = d
+        if getattr(info, "traj_done", check_done):
+            o = env.reset()
+            traj_info = type(traj_info)()
+        if check_done:
+            a = env.action_space.null_value()
+            r = 0
+    return env, o, a, r, traj_info
+
+
+def reseed_env(env, seed):
+    """Gives a restored env its own random stream, from ``seed``, instead of
+    the one saved with it: by ``env.seed()`` if it has one, else by seeding
+    any numpy RandomState among its attributes.  (Envs drawing from the
+    global numpy stream follow the process seed anyway.)"""
+    if callable(getattr(env, "seed", None)):
+        env.seed(seed)
+        return
+    for value in vars(env).values():
+        if isinstance(value, np.random.RandomState):
+            value.seed(seed)
+
+
+class VecEnvMixin:
+    """For collectors stepping all their envs at once, as ``self.vec_env``:
+    ``envs`` given as a VecEnv, or as a list of envs (in a ListVecEnv)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vec_env = as_vec_env(self.envs)
+
+
+class VecDecorrelatingStartCollector(VecEnvMixin, DecorrelatingStartCollector):
+
+    def start_envs(self, max_decorrelation_steps=0, decorrelation_mode="serial",
+            decorrelation_kwargs=None):
+        """Resets all envs and returns agent_inputs buffer.  Decorrelates as
+        DecorrelatingStartCollector, each env getting up to
+        ``max_decorrelation_steps`` random steps into its trajectory, but
+        stepping all envs together: all take the largest number of steps,
+        and each is reset that many of its own steps before the end.  Only
+        "serial" decorrelation_mode."""
+        if decorrelation_mode != "serial":
+            raise ValueError("Vector env collectors only decorrelate serially.")
+        vec_env = self.vec_env
+        B = vec_env.n_envs
+        traj_infos = VecTrajInfo(B, self.TrajInfoCls)
+        observation = buffer_method(vec_env.reset(), "copy")
+        prev_action = buffer_from_example(vec_env.spaces.action.null_value(),
+            B)
+        prev_reward = np.zeros((B, vec_env.n_agents), dtype="float32")
+        if self.rank == 0:
+            logger.log("Sampler decorrelating envs, max steps: "
+                f"{max_decorrelation_steps}")
+        if max_decorrelation_steps != 0:
+            n_steps = 1 + (np.random.rand(B) * max_decorrelation_steps
+                ).astype(int)
+            start = n_steps.max() - n_steps
+            for t in range(n_steps.max()):
+                if t > 0 and np.any(start == t):
+                    vec_env.reset(start == t)
+                    traj_infos.reset(start == t)
+                a = vec_env.sample_action()
+                o, r, d, env_info, reset = vec_env.step(a)
+                traj_infos.step(o, a, r, d, None, env_info)
+                traj_infos.reset(reset)
+            observation[:] = o
+            prev_action[:] = a
+            prev_reward[:] = r
+            done = any_done(d)
+            prev_action[done] = vec_env.spaces.action.null_value()
+            prev_reward[done] = 0
+        # For action-server samplers.
+        if hasattr(self, "step_buffer_np") and self.step_buffer_np is not None:
+            self.step_buffer_np.observation[:] = observation
+            self.step_buffer_np.action[:] = prev_action
+            self.step_buffer_np.reward[:] = prev_reward
+        return AgentInputs(observation, prev_action, prev_reward), traj_infos
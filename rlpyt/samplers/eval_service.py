@@ -0,0 +1,152 @@
+
+import multiprocessing as mp
+import queue
+import time
+
+from rlpyt.models.utils import strip_ddp_state_dict
+from rlpyt.samplers.collections import TrajInfo
+from rlpyt.samplers.parallel.worker import initialize_worker
+from rlpyt.samplers.serial.collectors import SerialEvalCollector
+from rlpyt.utils.logging import logger
+from rlpyt.utils.quick_args import save__init__args
+
+
+class EvalService:
+    """Evaluates snapshots of the agent's weights in background processes,
+    while the master keeps training.  Each of ``n_workers`` processes builds
+    its own ``n_envs`` eval envs, agent and serial eval collector (e.g.
+    SerialEvalCollector or VecSerialEvalCollector), on CPU.  ``submit()``
+    sends a CPU copy of the weights, tagged with their iteration; ``poll()``
+    returns the finished evaluations as (itr, traj_infos, eval_time).  Never
+    waits: a snapshot submitted while every worker is busy is skipped.
+    Initialize before the agent (fork with no model built and no CUDA)."""
+
+    def __init__(
+            self,
+            EnvCls,
+            env_kwargs,
+            n_envs=25,
+            max_steps=12500,  # Per evaluation, over a worker's envs.
+            max_trajectories=None,  # Optional earlier cutoff.
+            n_workers=1,
+            TrajInfoCls=TrajInfo,
+            eval_CollectorCls=SerialEvalCollector,
+            cpus=None,  # Per worker, e.g. [[4], [5]].
+            torch_threads=1,
+            ):
+        max_steps = int(max_steps)
+        max_trajectories = (None if max_trajectories is None else
+            int(max_trajectories))
+        save__init__args(locals())
+        self.workers = list()
+
+    def initialize(self, agent, seed, traj_info_kwargs=None):
+        self.requests = mp.Queue()
+        self.results = mp.Queue()
+        self._n_pending = 0
+        self.workers = [mp.Process(
+            target=eval_process,
+            kwargs=dict(
+                rank=rank,
+                seed=seed + rank,
+                cpus=None if self.cpus is None else self.cpus[rank],
+                torch_threads=self.torch_threads,
+                agent=agent,
+                EnvCls=self.EnvCls,
+                env_kwargs=self.env_kwargs,
+                n_envs=self.n_envs,
+                TrajInfoCls=self.TrajInfoCls,
+                traj_info_kwargs=traj_info_kwargs,
+                eval_CollectorCls=self.eval_CollectorCls,
+                max_T=self.max_steps // self.n_envs,
+                max_trajectories=self.max_trajectories,
+                requests=self.requests,
+                results=self.results,
+            ),
+            daemon=True,  # Not holding up exit if training fails.
+            ) for rank in range(self.n_workers)]
+        for w in self.workers:
+            w.start()
+        logger.log(f"Eval service started {self.n_workers} workers.")
+
+    def submit(self, itr, state_dict):
+        """Queues an evaluation of ``state_dict`` (the agent's), unless every
+        worker is busy; returns whether it was queued."""
+        if self._n_pending >= self.n_workers:
+            return False
+        self.requests.put((itr, cpu_state_dict(state_dict)))
+        self._n_pending += 1
+        return True
+
+    def poll(self):
+        """Returns the evaluations finished since the last call, as list of
+        (itr, traj_infos, eval_time), in order of completion."""
+        finished = list()
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        self._n_pending -= len(finished)
+        return finished
+
+    def shutdown(self, wait=True):
+        """Stops the workers; with ``wait``, after the pending evaluations,
+        which are returned (as from ``poll()``)."""
+        finished = self.poll()
+        while wait and self._n_pending > 0 and any(w.is_alive()
+                for w in self.workers):
+            try:
+                finished.append(self.results.get(timeout=1))
+                self._n_pending -= 1
+            except queue.Empty:
+                pass
+        for _ in self.workers:
+            self.requests.put(None)
+        for w in self.workers:
+            w.join(timeout=None if wait else 1)
+            if w.is_alive():
+                w.terminate()
+        self.workers = list()
+        return finished
+
+
+def cpu_state_dict(state_dict):
+    """Copy of ``state_dict`` on CPU (nested dicts, e.g. of several models,
+    allowed), without DistributedDataParallel prefixes.  Copies even CPU
+    tensors, which keep training in place while the copy is sent."""
+    return strip_ddp_state_dict(type(state_dict)(
+        (k, cpu_state_dict(v) if isinstance(v, dict) else
+            v.detach().to("cpu", copy=True))
+        for k, v in state_dict.items()))
+
+
+def eval_process(rank, seed, cpus, torch_threads, agent, EnvCls, env_kwargs,
+        n_envs, TrajInfoCls, traj_info_kwargs, eval_CollectorCls, max_T,
+        max_trajectories, requests, results):
+    """Evaluates each (itr, state_dict) request, until None."""
+    initialize_worker(rank, seed, cpus, torch_threads)
+    envs = [EnvCls(**env_kwargs) for _ in range(n_envs)]
+    agent.initialize(envs[0].spaces, share_memory=False, global_B=n_envs,
+        env_ranks=list(range(n_envs)))
+    if traj_info_kwargs:
+        for k, v in traj_info_kwargs.items():
+            setattr(TrajInfoCls, "_" + k, v)  # Avoid passing at init.
+    collector = eval_CollectorCls(
+        envs=envs,
+        agent=agent,
+        TrajInfoCls=TrajInfoCls,
+        max_T=max_T,
+        max_trajectories=max_trajectories,
+    )
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        itr, state_dict = request
+        agent.load_state_dict(state_dict)
+        start = time.time()
+        traj_infos = collector.collect_evaluation(itr)
+        results.put((itr, traj_infos, time.time() - start))
+    for env in envs:
+        env.close()
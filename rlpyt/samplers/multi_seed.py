@@ -0,0 +1,90 @@
+
+import copy
+import random
+
+import numpy as np
+import torch
+
+from rlpyt.utils.seed import set_seed
+
+
+class MultiSeedSampler:
+    """One sampler per seed (copies of ``sampler``, e.g. a SerialSampler),
+    each with its own environments, for the seed agents of a
+    MultiSeedAgent.  Seed i is initialized under its own seed (``seeds``, or
+    the runner's seed + 100 * i), so it gets its own initial weights, and
+    keeps its own random streams (python, numpy and torch global states,
+    swapped in around its sampler's calls), so its actions and env
+    randomness are those of a run of its own.  obtain_samples() and
+    evaluate_agent() return lists with one entry per seed."""
+
+    def __init__(self, sampler, n_seeds, seeds=None):
+        self.samplers = [copy.deepcopy(sampler) for _ in range(n_seeds)]
+        self.seeds = seeds
+        self.batch_spec = sampler.batch_spec
+        self.mid_batch_reset = sampler.mid_batch_reset
+
+    def initialize(self, agent, affinity=None, seed=None,
+            bootstrap_value=False, traj_info_kwargs=None, rank=0,
+            world_size=1):
+        seeds = (self.seeds if self.seeds is not None else
+            [seed + 100 * i for i in range(len(self.samplers))])
+        rng_state = get_rng_state()  # Process streams, left to the algo.
+        self._rng_states = list()
+        for sampler, seed_agent, seed_i in zip(self.samplers, agent.agents,
+                seeds):
+            set_seed(seed_i)
+            examples = sampler.initialize(seed_agent, affinity=affinity,
+                seed=seed_i, bootstrap_value=bootstrap_value,
+                traj_info_kwargs=traj_info_kwargs, rank=rank,
+                world_size=world_size)
+            self._rng_states.append(get_rng_state())
+        set_rng_state(rng_state)
+        self.seeds = seeds
+        self.agent = agent
+        return examples  # (Same for all seeds.)
+
+    def obtain_samples(self, itr):
+        self.agent.sync_models()  # New weights in seed agents, if needed.
+        samples, traj_infos = zip(*self.per_seed(
+            lambda sampler: sampler.obtain_samples(itr)))
+        return list(samples), list(traj_infos)
+
+    def evaluate_agent(self, itr):
+        self.agent.sync_models()
+        return self.per_seed(lambda sampler: sampler.evaluate_agent(itr))
+
+    def per_seed(self, func):
+        """[func(sampler) for each seed's sampler], each under the seed's
+        own random streams."""
+        rng_state = get_rng_state()
+        results = list()
+        for i, sampler in enumerate(self.samplers):
+            set_rng_state(self._rng_states[i])
+            results.append(func(sampler))
+            self._rng_states[i] = get_rng_state()
+        set_rng_state(rng_state)
+        return results
+
+    def shutdown(self):
+        for sampler in self.samplers:
+            sampler.shutdown()
+
+    @property
+    def batch_size(self):
+        return self.batch_spec.size  # Per seed.
+
+
+def get_rng_state():
+    """Global random states of python, numpy and torch (CPU and CUDA)."""
+    return (random.getstate(), np.random.get_state(), torch.get_rng_state(),
+        torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None)
+
+
+def set_rng_state(rng_state):
+    python_state, numpy_state, torch_state, cuda_states = rng_state
+    random.setstate(python_state)
+    np.random.set_state(numpy_state)
+    torch.set_rng_state(torch_state)
+    if cuda_states is not None:
+        torch.cuda.set_rng_state_all(cuda_states)
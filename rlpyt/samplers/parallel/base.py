@@ -168,6 +168,8 @@ class ParallelSamplerBase(BaseSampler):
             traj_infos_queue=self.traj_infos_queue,
             ctrl=self.ctrl,
             max_decorrelation_steps=self.max_decorrelation_steps,
+            decorrelation_mode=self.decorrelation_mode,
+            decorrelation_kwargs=self.decorrelation_kwargs,
             torch_threads=affinity.get("worker_torch_threads", 1),
             global_B=global_B,
         )
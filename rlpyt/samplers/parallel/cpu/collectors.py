@@ -2,8 +2,10 @@
 import numpy as np
 
 from rlpyt.samplers.collectors import (DecorrelatingStartCollector,
-    BaseEvalCollector)
+    BaseEvalCollector, VecDecorrelatingStartCollector, VecEnvMixin)
 from rlpyt.agents.base import AgentInputs
+from rlpyt.envs.vector import any_done
+from rlpyt.samplers.collections import VecTrajInfo
 from rlpyt.utils.buffer import (torchify_buffer, numpify_buffer, buffer_from_example,
     buffer_method)
 
@@ -11,6 +13,8 @@ from rlpyt.utils.buffer import (torchify_buffer, numpify_buffer, buffer_from_exa
 class CpuResetCollector(DecorrelatingStartCollector):
 
     mid_batch_reset = True
+    step_ahead = False  # See CpuStepAheadResetCollector.
+    _step_ahead = None
 
     def collect_batch(self, agent_inputs, traj_infos, itr):
         # Numpy arrays can be written to from numpy arrays or torch tensors
@@ -25,7 +29,11 @@ class CpuResetCollector(DecorrelatingStartCollector):
         for t in range(self.batch_T):
             env_buf.observation[t] = observation
             # Agent inputs and outputs are torch tensors.
-            act_pyt, agent_info = self.agent.step(obs_pyt, act_pyt, rew_pyt)
+            if t == 0 and self._step_ahead is not None:
+                act_pyt, agent_info = self._step_ahead  # From end of last batch.
+                self._step_ahead = None
+            else:
+                act_pyt, agent_info = self.agent.step(obs_pyt, act_pyt, rew_pyt)
             action = numpify_buffer(act_pyt)
             for b, env in enumerate(self.envs):
                 # Environment inputs and outputs are numpy arrays.
@@ -52,13 +60,79 @@ class CpuResetCollector(DecorrelatingStartCollector):
             if agent_info:
                 agent_buf.agent_info[t] = agent_info
 
-        if "bootstrap_value" in agent_buf:
+        self.write_bootstrap_value(agent_buf, obs_pyt, act_pyt, rew_pyt)
+
+        return AgentInputs(observation, action, reward), traj_infos, completed_infos
+
+    def write_bootstrap_value(self, agent_buf, obs_pyt, act_pyt, rew_pyt):
+        if "bootstrap_value" in agent_buf and self.step_ahead:
+            # First step of the next batch, its value is the bootstrap value.
+            self._step_ahead = self.agent.step(obs_pyt, act_pyt, rew_pyt)
+            agent_buf.bootstrap_value[:] = self._step_ahead.agent_info.value
+        elif "bootstrap_value" in agent_buf:
             # agent.value() should not advance rnn state.
             agent_buf.bootstrap_value[:] = self.agent.value(obs_pyt, act_pyt, rew_pyt)
 
+
+class CpuStepAheadResetCollector(CpuResetCollector):
+    """Runs the first agent step of the next batch at the end of this one,
+    and takes the bootstrap value from it, instead of a separate
+    ``agent.value()`` forward pass on the same observation (one forward pass
+    fewer per batch).  That step, whose action and agent_info are recorded
+    as usual, uses the agent parameters and sample mode of the previous
+    iteration.  For agents whose agent_info has the ``value``."""
+
+    step_ahead = True
+
+
+class VecCpuResetCollector(VecDecorrelatingStartCollector, CpuResetCollector):
+    """CpuResetCollector stepping all envs at once (see VecEnv): one
+    ``step()`` with the [B] actions per time step, whose stacked outputs are
+    written into the samples buffer as whole [B] slices.  Trajectory
+    statistics are kept in a VecTrajInfo (as ``traj_infos``)."""
+
+    def collect_batch(self, agent_inputs, traj_infos, itr):
+        agent_buf, env_buf = self.samples_np.agent, self.samples_np.env
+        completed_infos = list()
+        observation, action, reward = agent_inputs
+        obs_pyt, act_pyt, rew_pyt = torchify_buffer(agent_inputs)
+        agent_buf.prev_action[0] = action  # Leading prev_action.
+        env_buf.prev_reward[0] = reward
+        self.agent.sample_mode(itr)
+        for t in range(self.batch_T):
+            env_buf.observation[t] = observation
+            if t == 0 and self._step_ahead is not None:
+                act_pyt, agent_info = self._step_ahead  # From end of last batch.
+                self._step_ahead = None
+            else:
+                act_pyt, agent_info = self.agent.step(obs_pyt, act_pyt, rew_pyt)
+            action = numpify_buffer(act_pyt)
+            o, r, d, env_info, reset = self.vec_env.step(action)
+            traj_infos.step(observation, action, r, d, agent_info, env_info)
+            completed_infos.extend(traj_infos.terminate(reset))
+            for b in np.flatnonzero(any_done(d)):
+                self.agent.reset_one(idx=b)
+            observation[:] = o
+            reward[:] = r
+            env_buf.done[t] = d
+            if env_info is not None:
+                env_buf.env_info[t] = env_info
+            agent_buf.action[t] = action
+            env_buf.reward[t] = reward
+            if agent_info:
+                agent_buf.agent_info[t] = agent_info
+
+        self.write_bootstrap_value(agent_buf, obs_pyt, act_pyt, rew_pyt)
+
         return AgentInputs(observation, action, reward), traj_infos, completed_infos
 
 
+class VecCpuStepAheadResetCollector(VecCpuResetCollector):
+    """VecCpuResetCollector with the step ahead of CpuStepAheadResetCollector."""
+
+    step_ahead = True
+
+
 class CpuWaitResetCollector(DecorrelatingStartCollector):
 
     mid_batch_reset = False
@@ -168,3 +242,35 @@ class CpuEvalCollector(BaseEvalCollector):
             if self.sync.stop_eval.value:
                 break
         self.traj_infos_queue.put(None)  # End sentinel.
+
+
+class VecCpuEvalCollector(VecEnvMixin, CpuEvalCollector):
+    """CpuEvalCollector stepping all envs at once (see VecEnv)."""
+
+    def collect_evaluation(self, itr):
+        vec_env = self.vec_env
+        B = vec_env.n_envs
+        traj_infos = VecTrajInfo(B, self.TrajInfoCls)
+        observation = buffer_method(vec_env.reset(), "copy")
+        action = buffer_from_example(vec_env.spaces.action.null_value(), B)
+        reward = np.zeros((B, vec_env.n_agents), dtype="float32")
+        obs_pyt, act_pyt, rew_pyt = torchify_buffer((observation, action, reward))
+        self.agent.reset()
+        self.agent.eval_mode(itr)
+        for t in range(self.max_T):
+            act_pyt, agent_info = self.agent.step(obs_pyt, act_pyt, rew_pyt)
+            action = numpify_buffer(act_pyt)
+            o, r, d, env_info, reset = vec_env.step(action)
+            traj_infos.step(observation, action, r, d, agent_info, env_info)
+            for traj_info in traj_infos.terminate(reset):
+                self.traj_infos_queue.put(traj_info)
+            observation[:] = o
+            reward[:] = r
+            done = any_done(d)
+            action[done] = 0  # Next prev_action.
+            reward[done] = 0
+            for b in np.flatnonzero(done):
+                self.agent.reset_one(idx=b)
+            if self.sync.stop_eval.value:
+                break
+        self.traj_infos_queue.put(None)  # End sentinel.
@@ -1,11 +1,14 @@
 
 import multiprocessing as mp
+import ctypes
 import time
 
 
+from rlpyt.samplers.buffer import build_samples_buffer
 from rlpyt.samplers.parallel.base import ParallelSamplerBase
 from rlpyt.samplers.parallel.cpu.collectors import (CpuResetCollector, 
     CpuEvalCollector)
+from rlpyt.utils.synchronize import drain_queue
 
 
 class CpuSampler(ParallelSamplerBase):
@@ -23,3 +26,56 @@ class CpuSampler(ParallelSamplerBase):
     def evaluate_agent(self, itr):
         self.agent.sync_shared_memory()
         return super().evaluate_agent(itr)
+
+
+class PipelinedCpuSampler(CpuSampler):
+    """CpuSampler with two sample buffers, alternating by iteration, so
+    workers can collect the batch of iteration itr+1 (start_samples()) while
+    the learner still trains on the batch of itr, and collect it with the
+    weights the agent has at start_samples().  Only one batch in flight at a
+    time: finish_samples() before the next start_samples() or
+    evaluate_agent()."""
+
+    def start_samples(self, itr):
+        """Sends the agent's current weights to the workers and starts them
+        on the batch of ``itr``; returns without waiting."""
+        self.agent.sync_shared_memory()  # Workers are idle here.
+        self._buffer_idx = itr % 2
+        self.ctrl.buffer_idx.value = self._buffer_idx
+        self.ctrl.itr.value = itr
+        self.ctrl.barrier_in.wait()
+
+    def finish_samples(self):
+        """Waits for the batch started last and returns it, as
+        obtain_samples()."""
+        self.ctrl.barrier_out.wait()
+        traj_infos = drain_queue(self.traj_infos_queue)
+        return self.samples_buffers[self._buffer_idx][0], traj_infos
+
+    def obtain_samples(self, itr):
+        self.start_samples(itr)
+        return self.finish_samples()
+
+    def _build_buffers(self, env, bootstrap_value):
+        examples = super()._build_buffers(env, bootstrap_value)
+        samples_pyt, samples_np, _ = build_samples_buffer(self.agent, env,
+            self.batch_spec, bootstrap_value, agent_shared=True,
+            env_shared=True, subprocess=True, examples=examples)
+        self.samples_buffers = ((self.samples_pyt, self.samples_np),
+            (samples_pyt, samples_np))
+        return examples
+
+    def _build_parallel_ctrl(self, n_worker):
+        super()._build_parallel_ctrl(n_worker)
+        self.ctrl.buffer_idx = mp.RawValue(ctypes.c_int, 0)
+
+    def _assemble_workers_kwargs(self, affinity, seed, n_envs_list):
+        workers_kwargs = super()._assemble_workers_kwargs(affinity, seed,
+            n_envs_list)
+        i_env = 0
+        for worker_kwargs, n_envs in zip(workers_kwargs, n_envs_list):
+            slice_B = slice(i_env, i_env + n_envs)
+            worker_kwargs["samples_np_buffers"] = tuple(samples_np[:, slice_B]
+                for _, samples_np in self.samples_buffers)
+            i_env += n_envs
+        return workers_kwargs
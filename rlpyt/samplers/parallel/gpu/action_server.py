@@ -11,6 +11,9 @@ EVAL_TRAJ_CHECK = 20  # [steps].
 
 class ActionServer:
 
+    step_ahead = False  # See StepAheadActionServer.
+    _step_ahead = None
+
     def serve_actions(self, itr):
         obs_ready, act_ready = self.sync.obs_ready, self.sync.act_ready
         step_np, agent_inputs = self.step_buffer_np, self.agent_inputs
@@ -19,12 +22,17 @@ class ActionServer:
             for b in obs_ready:
                 b.acquire()  # Workers written obs and rew, first prev_act.
                 # assert not b.acquire(block=False)  # Debug check.
-            if self.mid_batch_reset and np.any(step_np.done):
-                for b_reset in np.where(step_np.done)[0]:
-                    step_np.action[b_reset] = 0  # Null prev_action into agent.
-                    step_np.reward[b_reset] = 0  # Null prev_reward into agent.
-                    self.agent.reset_one(idx=b_reset)
-            action, agent_info = self.agent.step(*agent_inputs)
+            if t == 0 and self._step_ahead is not None:
+                # From end of last batch, after its resets.
+                action, agent_info = self._step_ahead
+                self._step_ahead = None
+            else:
+                if self.mid_batch_reset and np.any(step_np.done):
+                    for b_reset in np.where(step_np.done)[0]:
+                        step_np.action[b_reset] = 0  # Null prev_action into agent.
+                        step_np.reward[b_reset] = 0  # Null prev_reward into agent.
+                        self.agent.reset_one(idx=b_reset)
+                action, agent_info = self.agent.step(*agent_inputs)
             step_np.action[:] = action  # Worker applies to env.
             step_np.agent_info[:] = agent_info  # Worker sends to traj_info.
             for w in act_ready:
@@ -34,7 +42,7 @@ class ActionServer:
         for b in obs_ready:
             b.acquire()
             assert not b.acquire(block=False)  # Debug check.
-        if "bootstrap_value" in self.samples_np.agent:
+        if "bootstrap_value" in self.samples_np.agent and not self.step_ahead:
             self.samples_np.agent.bootstrap_value[:] = self.agent.value(
                 *agent_inputs)
         if np.any(step_np.done):  # Reset at end of batch; ready for next.
@@ -43,6 +51,14 @@ class ActionServer:
                 step_np.reward[b_reset] = 0  # Null prev_reward into agent.
                 self.agent.reset_one(idx=b_reset)
             # step_np.done[:] = False  # Worker resets at start of next.
+        if "bootstrap_value" in self.samples_np.agent and self.step_ahead:
+            # First step of the next batch, its value is the bootstrap value
+            # (differs only where done, which is masked in the returns).
+            # Held here: workers still read this batch's action as the next
+            # prev_action.
+            self._step_ahead = self.agent.step(*agent_inputs)
+            self.samples_np.agent.bootstrap_value[:] = \
+                self._step_ahead.agent_info.value
         for w in act_ready:
             assert not w.acquire(block=False)  # Debug check.
 
@@ -90,6 +106,17 @@ class ActionServer:
         return traj_infos
 
 
+class StepAheadActionServer(ActionServer):
+    """Serves the first action of the next batch at the end of this one, and
+    takes the bootstrap value from it, instead of a separate
+    ``agent.value()`` forward pass on the same observation (one forward pass
+    fewer per batch).  That step uses the agent parameters and sample mode
+    of the previous iteration.  For agents whose agent_info has the
+    ``value``."""
+
+    step_ahead = True
+
+
 class AlternatingActionServer:
     """Two environment instance groups may execute partially simultaneously."""
 
@@ -2,7 +2,8 @@
 import numpy as np
 
 from rlpyt.samplers.collectors import (DecorrelatingStartCollector,
-    BaseEvalCollector)
+    BaseEvalCollector, VecDecorrelatingStartCollector, VecEnvMixin)
+from rlpyt.samplers.collections import VecTrajInfo
 from rlpyt.utils.buffer import buffer_method
 
 
@@ -47,6 +48,41 @@ class GpuResetCollector(DecorrelatingStartCollector):
         return None, traj_infos, completed_infos
 
 
+class VecGpuResetCollector(VecDecorrelatingStartCollector, GpuResetCollector):
+    """GpuResetCollector stepping all envs at once (see VecEnv), writing
+    whole [B] slices into the step and samples buffers."""
+
+    def collect_batch(self, agent_inputs, traj_infos, itr):
+        """Params agent_inputs and itr unused."""
+        act_ready, obs_ready = self.sync.act_ready, self.sync.obs_ready
+        step = self.step_buffer_np
+        agent_buf, env_buf = self.samples_np.agent, self.samples_np.env
+        agent_buf.prev_action[0] = step.action
+        env_buf.prev_reward[0] = step.reward
+        obs_ready.release()  # Previous obs already written, ready for new.
+        completed_infos = list()
+        for t in range(self.batch_T):
+            env_buf.observation[t] = step.observation
+            act_ready.acquire()  # Need sampled actions from server.
+            o, r, d, env_info, reset = self.vec_env.step(step.action)
+            traj_infos.step(step.observation, step.action, r, d,
+                step.agent_info, env_info)
+            completed_infos.extend(traj_infos.terminate(reset))
+            step.observation[:] = o
+            step.reward[:] = r
+            step.done[:] = d
+            if env_info is not None:
+                env_buf.env_info[t] = env_info
+            agent_buf.action[t] = step.action  # OPTIONAL BY SERVER
+            env_buf.reward[t] = step.reward
+            env_buf.done[t] = step.done
+            if step.agent_info:
+                agent_buf.agent_info[t] = step.agent_info  # OPTIONAL BY SERVER
+            obs_ready.release()  # Ready for server to use/write step buffer.
+
+        return None, traj_infos, completed_infos
+
+
 class GpuWaitResetCollector(DecorrelatingStartCollector):
     """Valid to run episodic lives."""
 
@@ -152,3 +188,32 @@ class GpuEvalCollector(BaseEvalCollector):
                 step.done[b] = d
             obs_ready.release()
         self.traj_infos_queue.put(None)  # End sentinel.
+
+
+class VecGpuEvalCollector(VecEnvMixin, GpuEvalCollector):
+    """GpuEvalCollector stepping all envs at once (see VecEnv)."""
+
+    def collect_evaluation(self, itr):
+        """Param itr unused."""
+        traj_infos = VecTrajInfo(self.vec_env.n_envs, self.TrajInfoCls)
+        act_ready, obs_ready = self.sync.act_ready, self.sync.obs_ready
+        step = self.step_buffer_np
+        step.observation[:] = self.vec_env.reset()
+        step.done[:] = False
+        obs_ready.release()
+
+        for t in range(self.max_T):
+            act_ready.acquire()
+            if self.sync.stop_eval.value:
+                obs_ready.release()  # Always release at end of loop.
+                break
+            o, r, d, env_info, reset = self.vec_env.step(step.action)
+            traj_infos.step(step.observation, step.action, r, d,
+                step.agent_info, env_info)
+            for traj_info in traj_infos.terminate(reset):
+                self.traj_infos_queue.put(traj_info)
+            step.observation[:] = o
+            step.reward[:] = r
+            step.done[:] = d
+            obs_ready.release()
+        self.traj_infos_queue.put(None)  # End sentinel.
@@ -3,7 +3,8 @@ import multiprocessing as mp
 
 from rlpyt.agents.base import AgentInputs
 from rlpyt.samplers.parallel.base import ParallelSamplerBase
-from rlpyt.samplers.parallel.gpu.action_server import ActionServer
+from rlpyt.samplers.parallel.gpu.action_server import (ActionServer,
+    StepAheadActionServer)
 from rlpyt.samplers.parallel.gpu.collectors import (GpuResetCollector,
     GpuEvalCollector)
 from rlpyt.utils.collections import namedarraytuple, AttrDict
@@ -102,6 +103,10 @@ class GpuSampler(ActionServer, GpuSamplerBase):
     pass
 
 
+class GpuStepAheadSampler(StepAheadActionServer, GpuSamplerBase):
+    pass
+
+
 def build_step_buffer(examples, B):
     step_bufs = {k: buffer_from_example(examples[k], B, share_memory=True)
         for k in ["observation", "action", "reward", "done", "agent_info"]}
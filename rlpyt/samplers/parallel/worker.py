@@ -48,7 +48,8 @@ def sampling_process(common_kwargs, worker_kwargs):
         global_B=c.get("global_B", 1),
         env_ranks=w.get("env_ranks", None),
     )
-    agent_inputs, traj_infos = collector.start_envs(c.max_decorrelation_steps)
+    agent_inputs, traj_infos = collector.start_envs(c.max_decorrelation_steps,
+        c.decorrelation_mode, c.decorrelation_kwargs)
     collector.start_agent()
 
     if c.get("eval_n_envs", 0) > 0:
@@ -76,6 +77,9 @@ def sampling_process(common_kwargs, worker_kwargs):
         if ctrl.do_eval.value:
             eval_collector.collect_evaluation(ctrl.itr.value)  # Traj_infos to queue inside.
         else:
+            if "samples_np_buffers" in w:  # Double-buffered sampler.
+                collector.samples_np = w.samples_np_buffers[
+                    ctrl.buffer_idx.value]
             agent_inputs, traj_infos, completed_infos = collector.collect_batch(
                 agent_inputs, traj_infos, ctrl.itr.value)
             for info in completed_infos:
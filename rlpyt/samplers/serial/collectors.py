@@ -1,9 +1,12 @@
 
 import numpy as np
 
-from rlpyt.samplers.collectors import BaseEvalCollector
+from rlpyt.samplers.collectors import BaseEvalCollector, VecEnvMixin
 from rlpyt.agents.base import AgentInputs
-from rlpyt.utils.buffer import buffer_from_example, torchify_buffer, numpify_buffer
+from rlpyt.envs.vector import any_done
+from rlpyt.samplers.collections import VecTrajInfo
+from rlpyt.utils.buffer import (buffer_from_example, torchify_buffer,
+    numpify_buffer, buffer_method)
 from rlpyt.utils.logging import logger
 from rlpyt.utils.quick_args import save__init__args
 
@@ -34,7 +37,8 @@ class SerialEvalCollector(BaseEvalCollector):
             observation[b] = o
         action = buffer_from_example(self.envs[0].action_space.null_value(),
             len(self.envs))
-        reward = np.zeros((len(self.envs), 3), dtype="float32")
+        reward = np.zeros((len(self.envs), self.envs[0].n_agents),
+            dtype="float32")
         obs_pyt, act_pyt, rew_pyt = torchify_buffer((observation, action, reward))
         self.agent.reset()
         self.agent.eval_mode(itr)
@@ -68,3 +72,41 @@ class SerialEvalCollector(BaseEvalCollector):
             logger.log("Evaluation reached max num time steps "
                 f"({self.max_T}).")
         return completed_traj_infos
+
+
+class VecSerialEvalCollector(VecEnvMixin, SerialEvalCollector):
+    """SerialEvalCollector stepping all envs at once (see VecEnv)."""
+
+    def collect_evaluation(self, itr):
+        vec_env = self.vec_env
+        B = vec_env.n_envs
+        traj_infos = VecTrajInfo(B, self.TrajInfoCls)
+        completed_traj_infos = list()
+        observation = buffer_method(vec_env.reset(), "copy")
+        action = buffer_from_example(vec_env.spaces.action.null_value(), B)
+        reward = np.zeros((B, vec_env.n_agents), dtype="float32")
+        obs_pyt, act_pyt, rew_pyt = torchify_buffer((observation, action, reward))
+        self.agent.reset()
+        self.agent.eval_mode(itr)
+        for t in range(self.max_T):
+            act_pyt, agent_info = self.agent.step(obs_pyt, act_pyt, rew_pyt)
+            action = numpify_buffer(act_pyt)
+            o, r, d, env_info, reset = vec_env.step(action)
+            traj_infos.step(observation, action, r, d, agent_info, env_info)
+            completed_traj_infos.extend(traj_infos.terminate(reset))
+            observation[:] = o
+            reward[:] = r
+            done = any_done(d)
+            action[done] = 0  # Prev_action for next step.
+            reward[done] = 0
+            for b in np.flatnonzero(done):
+                self.agent.reset_one(idx=b)
+            if (self.max_trajectories is not None and
+                    len(completed_traj_infos) >= self.max_trajectories):
+                logger.log("Evaluation reached max num trajectories "
+                    f"({self.max_trajectories}).")
+                break
+        if t == self.max_T - 1:
+            logger.log("Evaluation reached max num time steps "
+                f"({self.max_T}).")
+        return completed_traj_infos
@@ -63,7 +63,8 @@ class SerialSampler(BaseSampler):
             )
 
         agent_inputs, traj_infos = collector.start_envs(
-            self.max_decorrelation_steps)
+            self.max_decorrelation_steps, self.decorrelation_mode,
+            self.decorrelation_kwargs)
         collector.start_agent()
 
         self.agent = agent
@@ -5,15 +5,26 @@ from collections import namedtuple
 
 from rlpyt.utils.collections import is_namedtuple_class, is_namedtuple
 from rlpyt.spaces.composite import Composite
+from rlpyt.utils.joint_action import JointActionCodec
 
 
 class GymSpaceWrapper:
-    """Wraps a gym space to interface from dictionaries to namedtuples."""
-
-    def __init__(self, space, null_value=0, name="obs", force_float32=True):
+    """Wraps a gym space to interface from dictionaries to namedtuples.
+    With ``joint_action=True`` (multi-agent action spaces), values are
+    presented as flat joint action indexes and reverted to per-agent actions
+    for the wrapped env.  With ``force_dtype`` (e.g. ``np.uint8`` for grid
+    observations), values are cast to that dtype on ``convert()``, so
+    buffers built from them use it too."""
+
+    def __init__(self, space, null_value=0, name="obs", force_float32=True,
+            joint_action=False, force_dtype=None):
         self._gym_space = space
         self._base_name = name
         self._null_value = null_value
+        self._force_dtype = (None if force_dtype is None else
+            np.dtype(force_dtype))
+        self.codec = (JointActionCodec(n_agents=space.n_agents,
+            n_actions=space.n_actions) if joint_action else None)
         if isinstance(space, GymDict):
             nt = globals().get(name)
             if nt is None:
@@ -27,20 +38,26 @@ class GymSpaceWrapper:
                 space=v,
                 null_value=null_value,
                 name="_".join([name, k]),
-                force_float32=force_float32)
+                force_float32=force_float32,
+                force_dtype=force_dtype)
                 for k, v in space.spaces.items()]
             self.space = Composite(spaces, nt)
             self._dtype = None
         else:
             self.space = space
-            self._dtype = np.float32 if (space.dtype == np.float64 and
-                force_float32) else None
+            if self._force_dtype is not None:
+                self._dtype = self._force_dtype
+            else:
+                self._dtype = np.float32 if (space.dtype == np.float64 and
+                    force_float32) else None
 
     def sample(self):
         sample = self.space.sample()
         if self.space is self._gym_space:  # Not Composite.
             # Force numpy array, might force float64->float32.
             sample = np.asarray(sample, dtype=self._dtype)
+        if self.codec is not None:
+            sample = self.codec.encode(sample)
         return sample
 
     def null_value(self):
@@ -55,14 +72,19 @@ class GymSpaceWrapper:
                 null.fill(0)
         else:  # Is composite.
             null = self.space.null_value()
+        if self.codec is not None:
+            null = self.codec.encode(null)
         return null
 
     def convert(self, value):
         # Convert wrapped env's observation from dict to namedtuple.
-        return dict_to_nt(value, name=self._base_name)
+        return dict_to_nt(value, name=self._base_name,
+            dtype=self._force_dtype)
 
     def revert(self, value):
         # Revert namedtuple action into wrapped env's dict.
+        if self.codec is not None:
+            return self.codec.decode(value)
         return nt_to_dict(value)
 
     @property
@@ -71,6 +93,8 @@ class GymSpaceWrapper:
 
     @property
     def shape(self):
+        if self.codec is not None:
+            return ()
         return self.space.shape
 
     def contains(self, x):
@@ -107,11 +131,13 @@ class GymSpaceWrapper:
         return self.space.n_actions
 
 
-def dict_to_nt(value, name):
+def dict_to_nt(value, name, dtype=None):
     if isinstance(value, dict):
-        values = {k: dict_to_nt(v, "_".join([name, k]))
+        values = {k: dict_to_nt(v, "_".join([name, k]), dtype)
             for k, v in value.items()}
         return globals()[name](**values)
+    if dtype is not None:
+        return np.asarray(value, dtype=dtype)
     if isinstance(value, np.ndarray) and value.dtype == np.float64:
         return np.asarray(value, dtype=np.float32)
     return value
@@ -0,0 +1,42 @@
+
+import numpy as np
+import torch
+
+
+class JointActionCodec:
+    """Mixed-radix conversion between per-agent actions, shaped
+    [...,n_agents], and flat joint action indexes, shaped [...].  Uses the
+    ordering of ``itertools.product`` (first agent is the most significant
+    digit), computed with array arithmetic on numpy arrays or torch tensors
+    (any device), so no table of n_actions**n_agents entries is built."""
+
+    def __init__(self, n_agents, n_actions):
+        self.n_agents = n_agents
+        self.n_actions = n_actions
+        self._radix = n_actions ** np.arange(n_agents - 1, -1, -1,
+            dtype=np.int64)
+        self._radix_pyt = dict()  # Per device.
+
+    @property
+    def n_joint(self):
+        return self.n_actions ** self.n_agents
+
+    def encode(self, actions):
+        if isinstance(actions, torch.Tensor):
+            radix = self._radix_on(actions.device)
+            return torch.sum(actions.long() * radix, dim=-1)
+        return np.sum(np.asarray(actions, dtype=np.int64) * self._radix, axis=-1)
+
+    def decode(self, indexes):
+        if isinstance(indexes, torch.Tensor):
+            radix = self._radix_on(indexes.device)
+            return (indexes.long().unsqueeze(-1) // radix) % self.n_actions
+        indexes = np.asarray(indexes, dtype=np.int64)
+        return (indexes[..., None] // self._radix) % self.n_actions
+
+    def _radix_on(self, device):
+        radix = self._radix_pyt.get(device)
+        if radix is None:
+            radix = self._radix_pyt[device] = torch.from_numpy(
+                self._radix).to(device)
+        return radix
@@ -24,6 +24,7 @@ _tabular_prefixes = []
 _tabular_prefix_str = ''
 
 _tabular = []
+_last_tabular_keys = []
 
 _text_outputs = []
 _tabular_outputs = []
@@ -204,6 +205,16 @@ def record_tabular(key, val, *args, **kwargs):
     _tabular.append((_tabular_prefix_str + str(key), str(val)))
 
 
+def get_tabular_keys():
+    """Keys recorded so far for the next dump_tabular()."""
+    return [k for k, _ in _tabular]
+
+
+def get_last_tabular_keys():
+    """Keys of the last row dumped by dump_tabular()."""
+    return list(_last_tabular_keys)
+
+
 def push_tabular_prefix(key):
     _tabular_prefixes.append(key)
     global _tabular_prefix_str
@@ -308,6 +319,7 @@ def dump_tabular(*args, **kwargs):
                             tabular_dict[key] = np.nan
                     writer.writerow(tabular_dict)
                     tabular_fd.flush()
+            _last_tabular_keys[:] = [k for k, _ in _tabular]
             del _tabular[:]
 
 